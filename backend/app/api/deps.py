@@ -1,10 +1,12 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, status, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from backend.app.core.database import get_db
-from backend.app.core.security import decode_access_token
+from backend.app.core.sql import is_unique_violation
 from backend.app.models.user import User
+from backend.app.services.auth_cache import auth_cache
 from typing import Optional
 
 security = HTTPBearer()
@@ -21,19 +23,31 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    token = credentials.credentials
-    payload = decode_access_token(token)
+    user = await _get_user_by_token(credentials.credentials, db)
 
-    if payload is None:
+    if user is None:
         raise credentials_exception
 
-    user_id: Optional[str] = payload.get("sub")
-    if user_id is None:
+    return user
+
+
+async def get_current_user_for_stream(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+    token: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """获取当前认证用户，允许通过token查询参数传递（浏览器EventSource无法设置请求头）"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="无法验证凭据",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    raw_token = credentials.credentials if credentials is not None else token
+    if raw_token is None:
         raise credentials_exception
 
-    # 查询用户
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await _get_user_by_token(raw_token, db)
 
     if user is None:
         raise credentials_exception
@@ -41,6 +55,22 @@ async def get_current_user(
     return user
 
 
+async def _get_user_by_token(token: str, db: AsyncSession) -> Optional[User]:
+    """
+    解码JWT并获取对应用户（优先读缓存，返回游离态User），无效时返回None
+    未命中时查询主库：刚注册或刚修改信息的用户不受副本复制延迟影响
+    """
+    user_id = auth_cache.user_id_for_token(token)
+    if user_id is None:
+        return None
+
+    async def load(user_id: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.id == user_id))
+        return result.scalar_one_or_none()
+
+    return await auth_cache.get_user(user_id, load)
+
+
 async def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
     db: AsyncSession = Depends(get_db)
@@ -50,18 +80,16 @@ async def get_current_user_optional(
         return None
 
     try:
-        token = credentials.credentials
-        payload = decode_access_token(token)
-
-        if payload is None:
-            return None
-
-        user_id: Optional[str] = payload.get("sub")
-        if user_id is None:
-            return None
-
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
-        return user
+        return await _get_user_by_token(credentials.credentials, db)
     except Exception:
         return None
+
+
+async def commit_unique(db: AsyncSession, detail: str) -> None:
+    """提交写入，违反唯一约束时返回400（由 get_db 回滚），写入前无需再查询是否重复"""
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        if not is_unique_violation(e):
+            raise
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
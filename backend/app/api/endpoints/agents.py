@@ -1,45 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import List
-from backend.app.core.database import get_db
+from sqlalchemy import select
+from typing import List, Optional
+from backend.app.core.database import get_db, get_read_db
+from backend.app.core.sql import json_array_length
 from backend.app.models.user import User
 from backend.app.models.agent import Agent
-from backend.app.schemas.agent import AgentCreate, AgentUpdate, AgentResponse, AgentListResponse
-from backend.app.api.deps import get_current_user
+from backend.app.schemas.agent import AgentCreate, AgentUpdate, AgentValidateRequest, AgentResponse, AgentListResponse
+from backend.app.schemas.validation import ValidationResponse
+from backend.app.api.deps import commit_unique, get_current_user
+from backend.app.api.pagination import paginate, page_response
+from backend.app.services.handoff_graph import handoff_graph
+from backend.app.services.team_runtime import team_runtime_cache
+from backend.app.services.tool_catalog import tool_catalog
 
 router = APIRouter()
 
 
+# 列表只查询需要的列，handoffs/tools 的数量在SQL中计算，不读取 system_message
+AGENT_LIST_COLUMNS = (
+    Agent.id,
+    Agent.name,
+    Agent.created_by,
+    Agent.created_at,
+    json_array_length(Agent.handoffs).label("handoff_count"),
+    json_array_length(Agent.tools).label("tool_count"),
+)
+
+
 @router.get("", response_model=List[AgentListResponse])
 async def get_agents(
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """获取Agent列表"""
-    result = await db.execute(
-        select(Agent)
-        .offset(skip)
-        .limit(limit)
-        .order_by(Agent.created_at.desc())
-    )
-    agents = result.scalars().all()
-
-    # 构造响应
-    response = []
-    for agent in agents:
-        response.append(AgentListResponse(
-            id=agent.id,
-            name=agent.name,
-            created_by=agent.created_by,
-            created_at=agent.created_at,
-            handoff_count=len(agent.handoffs) if agent.handoffs else 0,
-            tool_count=len(agent.tools) if agent.tools else 0
-        ))
-
-    return response
+    """获取Agent列表（游标分页，下一页游标见 X-Next-Cursor 响应头）"""
+    result = await db.execute(paginate(select(*AGENT_LIST_COLUMNS), Agent, cursor, limit))
+    return page_response(result.all(), limit)
 
 
 @router.post("", response_model=AgentResponse, status_code=status.HTTP_201_CREATED)
@@ -48,16 +46,8 @@ async def create_agent(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """创建新Agent"""
-    # 检查名称是否已存在
-    result = await db.execute(select(Agent).where(Agent.name == agent_in.name))
-    existing_agent = result.scalar_one_or_none()
-
-    if existing_agent:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Agent名称'{agent_in.name}'已存在"
-        )
+    """创建新Agent（名称唯一性由唯一索引保证）"""
+    _check_tools(agent_in.tools)
 
     # 创建Agent
     db_agent = Agent(
@@ -69,17 +59,36 @@ async def create_agent(
     )
 
     db.add(db_agent)
-    await db.commit()
-    await db.refresh(db_agent)
+    await commit_unique(db, f"Agent名称'{agent_in.name}'已存在")
+    await handoff_graph.agent_saved(db_agent)
 
     return db_agent
 
 
+@router.post("/validate", response_model=ValidationResponse)
+async def validate_agent(
+    agent_in: AgentValidateRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """验证Agent配置（handoff目标是否存在、是否构成循环），不保存"""
+    return await handoff_graph.validate_agent(agent_in.name, agent_in.handoffs, agent_in.agent_id)
+
+
+def _check_tools(tools: List[str]) -> None:
+    """工具必须存在于工具目录中（目录不完整时由 unknown_tools 放行）"""
+    unknown = tool_catalog.unknown_tools(tools)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"未知的工具: {', '.join(unknown)}"
+        )
+
+
 @router.get("/{agent_id}", response_model=AgentResponse)
 async def get_agent(
     agent_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取Agent详情"""
     result = await db.execute(select(Agent).where(Agent.id == agent_id))
@@ -112,16 +121,8 @@ async def update_agent(
             detail="Agent不存在"
         )
 
-    # 如果更新名称，检查是否重复
+    # 更新名称（是否重复由唯一索引判断）
     if agent_update.name and agent_update.name != agent.name:
-        result = await db.execute(select(Agent).where(Agent.name == agent_update.name))
-        existing_agent = result.scalar_one_or_none()
-
-        if existing_agent:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Agent名称'{agent_update.name}'已存在"
-            )
         agent.name = agent_update.name
 
     # 更新其他字段
@@ -130,10 +131,12 @@ async def update_agent(
     if agent_update.handoffs is not None:
         agent.handoffs = agent_update.handoffs
     if agent_update.tools is not None:
+        _check_tools(agent_update.tools)
         agent.tools = agent_update.tools
 
-    await db.commit()
-    await db.refresh(agent)
+    await commit_unique(db, f"Agent名称'{agent_update.name}'已存在")
+    await team_runtime_cache.invalidate_agent(agent_id)
+    await handoff_graph.agent_saved(agent)
 
     return agent
 
@@ -156,6 +159,8 @@ async def delete_agent(
 
     await db.delete(agent)
     await db.commit()
+    await team_runtime_cache.invalidate_agent(agent_id)
+    await handoff_graph.agent_deleted(agent_id)
 
     return None
 
@@ -163,23 +168,8 @@ async def delete_agent(
 @router.get("/available/list", response_model=List[AgentListResponse])
 async def get_available_agents(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取可用于handoff的Agent列表"""
-    result = await db.execute(
-        select(Agent).order_by(Agent.name)
-    )
-    agents = result.scalars().all()
-
-    response = []
-    for agent in agents:
-        response.append(AgentListResponse(
-            id=agent.id,
-            name=agent.name,
-            created_by=agent.created_by,
-            created_at=agent.created_at,
-            handoff_count=len(agent.handoffs) if agent.handoffs else 0,
-            tool_count=len(agent.tools) if agent.tools else 0
-        ))
-
-    return response
+    result = await db.execute(select(*AGENT_LIST_COLUMNS).order_by(Agent.name))
+    return page_response(result.all())
@@ -1,35 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Header, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
-from backend.app.core.database import get_db
+from typing import List, Optional
+import gzip
+import json
+from backend.app.core.database import get_db, get_read_db, read_session_factory, utcnow
 from backend.app.models.user import User
-from backend.app.models.conversation import Conversation
+from backend.app.models.conversation import Conversation, ConversationStatus, FINISHED_STATUSES
 from backend.app.models.team import Team
-from backend.app.schemas.conversation import ConversationCreate, ConversationResponse, ConversationListResponse
-from backend.app.api.deps import get_current_user
+from backend.app.models.event import Event, EventType
+from backend.app.schemas.conversation import (
+    ConversationCreate,
+    ConversationResponse,
+    ConversationListResponse,
+    SchedulerStatsResponse,
+)
+from backend.app.schemas.event import EventResponse
+from backend.app.schemas.transfer import ConversationImportResponse
+from backend.app.api.deps import get_current_user, get_current_user_for_stream
+from backend.app.api.pagination import paginate, page_response
+from backend.app.services.event_archive import event_archive
+from backend.app.services.event_writer import event_writer
+from backend.app.services.event_service import stream_events
+from backend.app.services import replay_cache
+from backend.app.services import scheduler
+from backend.app.services import transfer
 
 router = APIRouter()
 
 
 @router.get("", response_model=List[ConversationListResponse])
 async def get_conversations(
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """获取对话列表"""
-    result = await db.execute(
-        select(Conversation)
-        .where(Conversation.user_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
-        .order_by(Conversation.created_at.desc())
-    )
-    conversations = result.scalars().all()
-
-    return conversations
+    """获取对话列表（游标分页，下一页游标见 X-Next-Cursor 响应头）"""
+    query = select(
+        Conversation.id,
+        Conversation.task,
+        Conversation.team_id,
+        Conversation.status,
+        Conversation.created_at,
+        Conversation.started_at,
+        Conversation.completed_at,
+    ).where(Conversation.user_id == current_user.id)
+    result = await db.execute(paginate(query, Conversation, cursor, limit))
+    return page_response(result.all(), limit)
 
 
 @router.post("", response_model=ConversationResponse, status_code=status.HTTP_201_CREATED)
@@ -38,7 +57,15 @@ async def create_conversation(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """创建新对话（暂不运行，只创建记录）"""
+    """创建新对话（pending状态即进入运行队列，由worker进程领取运行），队列已满时返回429"""
+    try:
+        await scheduler.check_capacity(db, current_user.id)
+    except scheduler.SchedulerFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
+        )
+
     # 验证Team是否存在
     result = await db.execute(select(Team).where(Team.id == conversation_in.team_id))
     team = result.scalar_one_or_none()
@@ -54,21 +81,50 @@ async def create_conversation(
         user_id=current_user.id,
         team_id=conversation_in.team_id,
         task=conversation_in.task,
-        status="pending"
+        status="pending",
+        priority=conversation_in.priority
     )
 
     db.add(db_conversation)
     await db.commit()
-    await db.refresh(db_conversation)
 
     return db_conversation
 
 
+@router.post("/import", response_model=ConversationImportResponse, status_code=status.HTTP_201_CREATED)
+async def import_conversation(
+    request: Request,
+    team_id: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    导入 GET /conversations/{id}/export 导出的NDJSON（请求体逐行读取，事件分批写入）
+    team_id 指定导入后所属的Team，默认沿用导出时的Team；未结束的对话导入为已取消
+    """
+    try:
+        return await transfer.import_conversation(db, request.stream(), current_user.id, team_id)
+    except transfer.InvalidImport as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/scheduler/stats", response_model=SchedulerStatsResponse)
+async def get_scheduler_stats(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """获取运行队列状态：队列深度、运行数与排队等待时间"""
+    return await scheduler.get_stats(db, current_user.id)
+
+
 @router.get("/{conversation_id}", response_model=ConversationResponse)
 async def get_conversation(
     conversation_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取对话详情"""
     result = await db.execute(
@@ -109,7 +165,220 @@ async def delete_conversation(
             detail="对话不存在"
         )
 
+    await replay_cache.invalidate(db, conversation_id)
     await db.delete(conversation)
     await db.commit()
+    event_writer.discard(conversation_id)
+    event_archive.discard(conversation_id)
 
     return None
+
+
+@router.post("/{conversation_id}/cancel", response_model=ConversationResponse)
+async def cancel_conversation(
+    conversation_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """取消排队中或运行中的对话（运行中的对话由worker在下次续约时停止）"""
+    result = await db.execute(
+        select(Conversation).where(
+            Conversation.id == conversation_id,
+            Conversation.user_id == current_user.id
+        )
+    )
+    conversation = result.scalar_one_or_none()
+
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="对话不存在"
+        )
+
+    if conversation.status in FINISHED_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="对话已结束"
+        )
+
+    conversation.status = ConversationStatus.CANCELLED
+    conversation.completed_at = utcnow()
+    await db.commit()
+
+    return conversation
+
+
+@router.get("/{conversation_id}/events", response_model=List[EventResponse])
+async def get_conversation_events(
+    conversation_id: str,
+    after_sequence: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    event_type: Optional[EventType] = None,
+    agent_name: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    获取对话事件（键集分页）
+    返回sequence大于after_sequence的事件，下一页以本页最后一条的sequence作为after_sequence，
+    借助 (conversation_id, sequence) 复合索引，任意深度的分页开销相同；已归档的对话从归档读取
+    """
+    result = await db.execute(
+        select(Conversation.archived_at).where(
+            Conversation.id == conversation_id,
+            Conversation.user_id == current_user.id
+        )
+    )
+    conversation = result.first()
+    if conversation is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="对话不存在"
+        )
+
+    if conversation.archived_at is not None:
+        return await event_archive.read_events(
+            conversation_id, after_sequence, limit, event_type=event_type, agent_name=agent_name, db=db
+        )
+
+    query = select(Event).where(
+        Event.conversation_id == conversation_id,
+        Event.sequence > after_sequence
+    )
+    if event_type is not None:
+        query = query.where(Event.event_type == event_type)
+    if agent_name is not None:
+        query = query.where(Event.agent_name == agent_name)
+
+    result = await db.execute(query.order_by(Event.sequence).limit(limit))
+    return result.scalars().all()
+
+
+@router.get("/{conversation_id}/events/stream")
+async def stream_conversation_events(
+    conversation_id: str,
+    after_sequence: int = Query(0, ge=0),
+    last_event_id: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user_for_stream),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    SSE事件流，事件id即sequence
+    重连时浏览器自动携带 Last-Event-ID，服务端从该sequence之后补齐遗漏事件再切换到实时推送
+    """
+    result = await db.execute(
+        select(Conversation.status, Conversation.archived_at).where(
+            Conversation.id == conversation_id,
+            Conversation.user_id == current_user.id
+        )
+    )
+    conversation = result.first()
+
+    if conversation is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="对话不存在"
+        )
+
+    if last_event_id is not None and last_event_id.isdigit():
+        after_sequence = int(last_event_id)
+
+    # 已结束的对话只需补齐历史事件
+    follow = conversation.status not in FINISHED_STATUSES
+    archived = conversation.archived_at is not None
+
+    async def event_source():
+        async for payload in stream_events(conversation_id, after_sequence, follow, archived=archived):
+            if payload is None:
+                yield ": heartbeat\n\n"
+            else:
+                yield f"id: {payload['sequence']}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/{conversation_id}/export")
+async def export_conversation(
+    conversation_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """导出对话及其全部事件（NDJSON流，事件经服务端游标分批读取，内存占用与事件数无关）"""
+    result = await db.execute(
+        select(Conversation.id).where(
+            Conversation.id == conversation_id,
+            Conversation.user_id == current_user.id
+        )
+    )
+    if result.first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="对话不存在"
+        )
+
+    # 响应体在依赖的会话关闭后才开始发送，导出使用自己的会话
+    return StreamingResponse(
+        transfer.export_conversation(read_session_factory(request), conversation_id),
+        media_type=transfer.MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="conversation-{conversation_id}.ndjson"'}
+    )
+
+
+@router.get("/{conversation_id}/replay")
+async def get_conversation_replay(
+    conversation_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    获取完整的对话回放数据：{"conversation": {...}, "events": [...]}
+    已结束的对话返回预先构建并压缩的快照，支持ETag条件请求与长时间缓存
+    """
+    result = await db.execute(
+        select(Conversation).where(
+            Conversation.id == conversation_id,
+            Conversation.user_id == current_user.id
+        )
+    )
+    conversation = result.scalar_one_or_none()
+
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="对话不存在"
+        )
+
+    finished = conversation.status in FINISHED_STATUSES
+    if_none_match = request.headers.get("if-none-match")
+
+    if finished and if_none_match:
+        etag = await replay_cache.get_etag(db, conversation_id)
+        if etag is not None and etag in if_none_match:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_replay_headers(etag, finished))
+
+    etag, content = await replay_cache.get_or_build(db, conversation)
+    headers = _replay_headers(etag, finished)
+
+    if if_none_match and etag in if_none_match:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        content = gzip.decompress(content)
+
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+def _replay_headers(etag: str, finished: bool) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=86400" if finished else "no-store",
+        "Vary": "Accept-Encoding, Authorization",
+    }
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Response
+from sqlalchemy import func, select
+from typing import List
+from backend.app.core.database import AsyncSessionLocal, engine
+from backend.app.core.metrics import CONTENT_TYPE, http_request_duration, pool_metrics, render_metric
+from backend.app.models.conversation import Conversation, ConversationStatus
+from backend.app.websocket.manager import manager
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 指标（文本格式）；事件写入、工具缓存与MCP调用指标由worker的指标端口提供"""
+    lines = http_request_duration.render()
+    lines += pool_metrics(engine.sync_engine.pool)
+    lines += await _conversation_metrics()
+    lines += render_metric(
+        "agentput_event_subscribers", "gauge", "本进程的WebSocket/SSE事件订阅者数",
+        [({}, manager.subscriber_count())],
+    )
+    return Response(content="\n".join(lines) + "\n", media_type=CONTENT_TYPE)
+
+
+async def _conversation_metrics() -> List[str]:
+    """各状态对话数与运行队列深度（一条按 (status, priority) 索引分组的查询）"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Conversation.status, func.count()).group_by(Conversation.status)
+        )
+        counts = dict(result.all())
+
+    lines = render_metric(
+        "agentput_conversations", "gauge", "各状态的对话数",
+        [({"status": s.value}, counts.get(s, 0)) for s in ConversationStatus],
+    )
+    lines += render_metric(
+        "agentput_run_queue_depth", "gauge", "等待worker领取的对话数",
+        [({}, counts.get(ConversationStatus.PENDING, 0))],
+    )
+    return lines
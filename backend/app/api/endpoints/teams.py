@@ -1,64 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
-from backend.app.core.database import get_db
+from typing import List, Optional
+from backend.app.core.database import get_db, get_read_db, read_session_factory
+from backend.app.core.sql import json_array_length
 from backend.app.models.user import User
 from backend.app.models.team import Team
-from backend.app.models.agent import Agent
-from backend.app.schemas.team import TeamCreate, TeamUpdate, TeamResponse, TeamListResponse
+from backend.app.schemas.team import TeamCreate, TeamUpdate, TeamValidateRequest, TeamResponse, TeamListResponse
+from backend.app.schemas.transfer import TeamImportResponse
+from backend.app.schemas.validation import ValidationResponse
 from backend.app.api.deps import get_current_user
+from backend.app.api.loaders import Loaders, get_loaders, get_read_loaders
+from backend.app.api.pagination import paginate, page_response
+from backend.app.services import transfer
+from backend.app.services.handoff_graph import handoff_graph
+from backend.app.services.team_runtime import team_runtime_cache
 
 router = APIRouter()
 
 
+async def _check_agents(agent_ids: List[str], loaders: Loaders) -> None:
+    """验证所有Agent ID是否存在（一次查询）"""
+    agents = await loaders.agents.load_many(agent_ids)
+    for agent_id, agent in zip(agent_ids, agents):
+        if agent is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Agent ID '{agent_id}' 不存在"
+            )
+
+
+async def _team_response(team: Team, loaders: Loaders) -> TeamResponse:
+    """构造Team详情，附带各Agent的名称（已删除的Agent不出现在agent_names中）"""
+    agents = await loaders.agents.load_many(team.agents or [])
+    response = TeamResponse.model_validate(team)
+    response.agent_names = {agent.id: agent.name for agent in agents if agent is not None}
+    return response
+
+
 @router.get("", response_model=List[TeamListResponse])
 async def get_teams(
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """获取Team列表"""
-    result = await db.execute(
-        select(Team)
-        .offset(skip)
-        .limit(limit)
-        .order_by(Team.created_at.desc())
+    """获取Team列表（游标分页，下一页游标见 X-Next-Cursor 响应头）"""
+    query = select(
+        Team.id,
+        Team.name,
+        Team.description,
+        json_array_length(Team.agents).label("agent_count"),
+        Team.entry_agent,
+        Team.created_at,
     )
-    teams = result.scalars().all()
-
-    # 构造响应
-    response = []
-    for team in teams:
-        response.append(TeamListResponse(
-            id=team.id,
-            name=team.name,
-            description=team.description,
-            agent_count=len(team.agents) if team.agents else 0,
-            entry_agent=team.entry_agent,
-            created_at=team.created_at
-        ))
-
-    return response
+    result = await db.execute(paginate(query, Team, cursor, limit))
+    return page_response(result.all(), limit)
 
 
 @router.post("", response_model=TeamResponse, status_code=status.HTTP_201_CREATED)
 async def create_team(
     team_in: TeamCreate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """创建新Team"""
     # 验证所有Agent ID是否存在
-    for agent_id in team_in.agents:
-        result = await db.execute(select(Agent).where(Agent.id == agent_id))
-        agent = result.scalar_one_or_none()
-        if not agent:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Agent ID '{agent_id}' 不存在"
-            )
+    await _check_agents(team_in.agents, loaders)
 
     # 验证entry_agent是否在agents列表中
     if team_in.entry_agent not in team_in.agents:
@@ -78,16 +88,45 @@ async def create_team(
 
     db.add(db_team)
     await db.commit()
-    await db.refresh(db_team)
 
-    return db_team
+    return await _team_response(db_team, loaders)
+
+
+@router.post("/validate", response_model=ValidationResponse)
+async def validate_team(
+    team_in: TeamValidateRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """验证Team配置（入口Agent、handoff是否在Team内、循环与孤立Agent），不保存"""
+    return await handoff_graph.validate_team(team_in.agents, team_in.entry_agent)
+
+
+@router.post("/import", response_model=TeamImportResponse, status_code=status.HTTP_201_CREATED)
+async def import_team(
+    request: Request,
+    name_suffix: str = Query("", max_length=50),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    导入 GET /teams/{id}/export 导出的NDJSON，Team与Agent使用新的ID
+    Agent名称已存在时返回400，可通过 name_suffix 为导入的Agent名称加后缀
+    """
+    try:
+        return await transfer.import_team(db, request.stream(), current_user.id, name_suffix)
+    except transfer.InvalidImport as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 
 @router.get("/{team_id}", response_model=TeamResponse)
 async def get_team(
     team_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db),
+    loaders: Loaders = Depends(get_read_loaders)
 ):
     """获取Team详情"""
     result = await db.execute(select(Team).where(Team.id == team_id))
@@ -99,7 +138,29 @@ async def get_team(
             detail="Team不存在"
         )
 
-    return team
+    return await _team_response(team, loaders)
+
+
+@router.get("/{team_id}/export")
+async def export_team(
+    team_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """导出Team及其全部Agent（NDJSON流）"""
+    result = await db.execute(select(Team.id).where(Team.id == team_id))
+    if result.first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team不存在"
+        )
+
+    return StreamingResponse(
+        transfer.export_team(read_session_factory(request), team_id),
+        media_type=transfer.MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="team-{team_id}.ndjson"'}
+    )
 
 
 @router.put("/{team_id}", response_model=TeamResponse)
@@ -107,7 +168,8 @@ async def update_team(
     team_id: str,
     team_update: TeamUpdate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """更新Team"""
     # 查找Team
@@ -122,14 +184,7 @@ async def update_team(
 
     # 验证agents
     if team_update.agents is not None:
-        for agent_id in team_update.agents:
-            result = await db.execute(select(Agent).where(Agent.id == agent_id))
-            agent = result.scalar_one_or_none()
-            if not agent:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Agent ID '{agent_id}' 不存在"
-                )
+        await _check_agents(team_update.agents, loaders)
         team.agents = team_update.agents
 
     # 验证entry_agent
@@ -149,9 +204,9 @@ async def update_team(
         team.description = team_update.description
 
     await db.commit()
-    await db.refresh(team)
+    await team_runtime_cache.invalidate_team(team_id)
 
-    return team
+    return await _team_response(team, loaders)
 
 
 @router.delete("/{team_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -172,5 +227,6 @@ async def delete_team(
 
     await db.delete(team)
     await db.commit()
+    await team_runtime_cache.invalidate_team(team_id)
 
     return None
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List
+from backend.app.models.user import User
+from backend.app.schemas.tool import ToolResponse, ToolSchemaResponse, MCPServerStatusResponse
+from backend.app.api.deps import get_current_user
+from backend.app.services.mcp_service import mcp_manager
+from backend.app.services.tool_catalog import tool_catalog
+
+router = APIRouter()
+
+
+@router.get("", response_model=List[ToolResponse])
+async def get_tools(
+    current_user: User = Depends(get_current_user)
+):
+    """获取所有可用工具列表（来自内存中的工具目录）"""
+    return tool_catalog.list_tools()
+
+
+@router.get("/servers", response_model=List[MCPServerStatusResponse])
+async def get_servers(
+    current_user: User = Depends(get_current_user)
+):
+    """获取MCP服务器连接状态"""
+    return _servers_status()
+
+
+@router.post("/servers/reload", response_model=List[MCPServerStatusResponse])
+async def reload_servers(
+    current_user: User = Depends(get_current_user)
+):
+    """重新加载MCP服务器配置并重新发现工具"""
+    await tool_catalog.reload()
+    return _servers_status()
+
+
+@router.get("/{tool_name}/schema", response_model=ToolSchemaResponse)
+async def get_tool_schema(
+    tool_name: str,
+    current_user: User = Depends(get_current_user)
+):
+    """获取特定工具的参数schema"""
+    tool = tool_catalog.get(tool_name)
+
+    if not tool:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="工具不存在"
+        )
+
+    return tool
+
+
+def _servers_status() -> List[dict]:
+    servers = mcp_manager.servers_status()
+    for server in servers:
+        server["tool_count"] = tool_catalog.tool_count(server["name"])
+    return servers
@@ -2,32 +2,34 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from backend.app.core.database import get_db
-from backend.app.core.security import get_password_hash, verify_password, create_access_token
+from backend.app.core.security import CryptoBusy, crypto_executor, get_password_hash, verify_password, create_access_token
 from backend.app.models.user import User
 from backend.app.schemas.user import UserCreate, UserLogin, UserResponse, Token, UserUpdate
-from backend.app.api.deps import get_current_user
+from backend.app.api.deps import commit_unique, get_current_user
+from backend.app.services.auth_cache import auth_cache
 
 router = APIRouter()
 
 
+async def _run_crypto(func, *args):
+    """在密码运算线程池中执行，排队已满时返回503"""
+    try:
+        return await crypto_executor.run(func, *args)
+    except CryptoBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="登录请求过多，请稍后重试",
+            headers={"Retry-After": "1"},
+        )
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_in: UserCreate,
     db: AsyncSession = Depends(get_db)
 ):
-    """用户注册"""
-    # 检查邮箱是否已存在
-    result = await db.execute(select(User).where(User.email == user_in.email))
-    existing_user = result.scalar_one_or_none()
-
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="邮箱已被注册"
-        )
-
-    # 创建新用户
-    hashed_password = get_password_hash(user_in.password)
+    """用户注册（邮箱唯一性由唯一索引保证）"""
+    hashed_password = await _run_crypto(get_password_hash, user_in.password)
     db_user = User(
         name=user_in.name,
         email=user_in.email,
@@ -35,8 +37,7 @@ async def register(
     )
 
     db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
+    await commit_unique(db, "邮箱已被注册")
 
     return db_user
 
@@ -46,12 +47,12 @@ async def login(
     user_in: UserLogin,
     db: AsyncSession = Depends(get_db)
 ):
-    """用户登录"""
+    """用户登录（查询主库，注册后可立即登录）"""
     # 查找用户
     result = await db.execute(select(User).where(User.email == user_in.email))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(user_in.password, user.hashed_password):
+    if not user or not await _run_crypto(verify_password, user_in.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="邮箱或密码错误",
@@ -59,7 +60,7 @@ async def login(
         )
 
     # 创建访问令牌
-    access_token = create_access_token(data={"sub": user.id})
+    access_token = await _run_crypto(create_access_token, {"sub": user.id})
 
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -79,23 +80,18 @@ async def update_profile(
     db: AsyncSession = Depends(get_db)
 ):
     """更新用户信息"""
-    # 如果要更新邮箱，检查是否已被占用
+    # 认证缓存返回的是游离态User，挂回当前会话后再修改
+    db.add(current_user)
+
+    # 更新邮箱（是否已被占用由唯一索引判断）
     if user_update.email and user_update.email != current_user.email:
-        result = await db.execute(select(User).where(User.email == user_update.email))
-        existing_user = result.scalar_one_or_none()
-
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="邮箱已被使用"
-            )
         current_user.email = user_update.email
 
     # 更新名称
     if user_update.name:
         current_user.name = user_update.name
 
-    await db.commit()
-    await db.refresh(current_user)
+    await commit_unique(db, "邮箱已被使用")
+    await auth_cache.invalidate(current_user.id)
 
     return current_user
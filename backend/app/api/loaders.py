@@ -0,0 +1,100 @@
+"""
+请求级批量加载器
+
+同一请求内按ID查询 Agent / Team / User 时，先登记ID，在当前事件循环轮次结束时合并为每个模型一条 IN 查询：
+    loaders.agents.load_many(agent_ids)   # 无论多少个ID，只查询一次
+已加载的对象在请求内缓存，重复查询同一ID不再访问数据库。
+加载器与请求的数据库会话绑定，只能在该请求内使用。
+"""
+import asyncio
+from typing import Dict, Generic, Iterable, List, Optional, Type, TypeVar
+
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.database import get_db, get_read_db
+from backend.app.models.agent import Agent
+from backend.app.models.team import Team
+from backend.app.models.user import User
+
+ModelT = TypeVar("ModelT")
+
+# 单条 IN 查询的最大ID数，超过时分批查询
+MAX_BATCH_SIZE = 500
+
+
+class BatchLoader(Generic[ModelT]):
+    """按主键批量加载单个模型"""
+
+    def __init__(self, db: AsyncSession, model: Type[ModelT]):
+        self.db = db
+        self.model = model
+        self._cache: Dict[str, Optional[ModelT]] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._dispatch_scheduled = False
+
+    async def load(self, id: str) -> Optional[ModelT]:
+        """按ID加载，不存在时返回None"""
+        if id in self._cache:
+            return self._cache[id]
+
+        future = self._pending.get(id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[id] = future
+            if not self._dispatch_scheduled:
+                # 推迟到本轮登记完成后再查询，同一轮次内的ID合并为一次查询
+                self._dispatch_scheduled = True
+                loop.call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+        return await future
+
+    async def load_many(self, ids: Iterable[str]) -> List[Optional[ModelT]]:
+        """按ID列表加载，结果顺序与ids一致"""
+        return list(await asyncio.gather(*(self.load(id) for id in ids)))
+
+    def prime(self, obj: ModelT) -> None:
+        """放入已查询到的对象，之后按其ID加载时不再访问数据库"""
+        self._cache[obj.id] = obj
+
+    async def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        self._dispatch_scheduled = False
+        ids = list(pending)
+        try:
+            found: Dict[str, ModelT] = {}
+            for start in range(0, len(ids), MAX_BATCH_SIZE):
+                batch = ids[start:start + MAX_BATCH_SIZE]
+                result = await self.db.execute(select(self.model).where(self.model.id.in_(batch)))
+                found.update((obj.id, obj) for obj in result.scalars())
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for id, future in pending.items():
+            obj = found.get(id)
+            self._cache[id] = obj
+            if not future.done():
+                future.set_result(obj)
+
+
+class Loaders:
+    """一个请求内使用的全部加载器"""
+
+    def __init__(self, db: AsyncSession):
+        self.agents: BatchLoader[Agent] = BatchLoader(db, Agent)
+        self.teams: BatchLoader[Team] = BatchLoader(db, Team)
+        self.users: BatchLoader[User] = BatchLoader(db, User)
+
+
+async def get_loaders(db: AsyncSession = Depends(get_db)) -> Loaders:
+    """依赖注入：与请求的数据库会话绑定的加载器"""
+    return Loaders(db)
+
+
+async def get_read_loaders(db: AsyncSession = Depends(get_read_db)) -> Loaders:
+    """依赖注入：与请求的只读会话绑定的加载器（只读接口使用）"""
+    return Loaders(db)
@@ -0,0 +1,67 @@
+"""
+游标分页
+
+按 (created_at, id) 倒序做键集分页：升级前的数据主键是随机的 uuid4，只按 id 排序时新旧数据会混在一起，
+因此以创建时间为主排序键，同一时间内再按 id 区分。
+游标是上一页最后一行 (created_at, id) 经base64编码后的不透明字符串，查询借助 (created_at, id) 索引
+（对话为 (user_id, created_at, id)）定位，深页与首页开销相同。
+列表接口只查询响应需要的列，结果行由 page_response 直接用 orjson 序列化，不再逐行构造Pydantic模型。
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import and_, or_
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, id: str) -> str:
+    """将最后一行的 (created_at, id) 编码为游标"""
+    raw = f"{created_at.isoformat()}|{id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """解析游标，格式错误时返回400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, separator, id = base64.urlsafe_b64decode(padded.encode()).decode().partition("|")
+        if not separator or not id:
+            raise ValueError(cursor)
+        return datetime.fromisoformat(created_at), id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的分页游标"
+        )
+
+
+def paginate(query: Select, model, cursor: Optional[str], limit: int) -> Select:
+    """为查询附加游标条件、按 (created_at, id) 倒序排序和数量限制（查询的列中须包含 created_at 与 id）"""
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        query = query.where(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < id),
+        ))
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int) -> None:
+    """本页已满时通过响应头返回下一页游标"""
+    if len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def page_response(rows: Sequence[Row], limit: Optional[int] = None) -> ORJSONResponse:
+    """把列投影查询的结果行直接序列化为JSON数组；传入limit时按需附带下一页游标"""
+    response = ORJSONResponse([row._asdict() for row in rows])
+    if limit is not None:
+        set_next_cursor(response, rows, limit)
+    return response
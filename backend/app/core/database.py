@@ -1,30 +1,127 @@
+import hashlib
+import hmac
+import math
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import Request, Response
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from backend.app.core.config import settings
+from backend.app.core.query_stats import instrument_engine
+from backend.app.core.security import decode_access_token
 
-# 创建异步引擎
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=10,
-    echo=True,  # 开发环境开启SQL日志
-)
+
+def _create_engine(url: str):
+    # 保留连接池默认的归还重置（ROLLBACK）：请求被取消或任务被中断时连接可能停在事务中途，
+    # 多一次往返换取不把残留事务和锁交给下一个使用者
+    options = {"echo": settings.SQL_ECHO}
+    if url.startswith("mysql"):
+        # 应用侧用 utcnow() 写入UTC，列的 server_default=func.now() 取会话时区：连接时固定为UTC，
+        # 两种来源的时间一致，不受数据库服务器时区配置影响
+        options["connect_args"] = {"init_command": "SET time_zone = '+00:00'"}
+    if not url.startswith("sqlite"):
+        # SQLite（本地检查脚本）不使用连接池参数
+        options.update(pool_size=settings.DATABASE_POOL_SIZE, max_overflow=10)
+    async_engine = create_async_engine(url, **options)
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+
+def _create_sessionmaker(bind):
+    return async_sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+
+# 创建异步引擎：主库承担全部写入；配置了只读副本时，只读接口的查询走副本
+engine = _create_engine(settings.DATABASE_URL)
+replica_engine = _create_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else engine
 
 # 创建异步会话工厂
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+AsyncSessionLocal = _create_sessionmaker(engine)
+ReplicaSessionLocal = _create_sessionmaker(replica_engine) if replica_engine is not engine else AsyncSessionLocal
 
 # 创建基类
 Base = declarative_base()
 
 
+def utcnow() -> datetime:
+    """
+    模型时间列的默认值：在应用侧生成，写入后无需再查询数据库取回
+    取UTC并去掉时区与微秒，与从MySQL DATETIME读回的值一致，写接口与读接口返回相同的时间；
+    MySQL连接的会话时区固定为UTC（见 _create_engine），与 server_default 生成的时间一致
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+class ReadRouter:
+    """
+    只读会话的路由：默认走副本；用户提交写入后的 REPLICA_PIN_SECONDS 内走主库，
+    保证用户刚创建或修改的数据在随后的读请求中可见。
+    写请求的响应带上以 SECRET_KEY 签名的短期cookie（用户ID + 截止时间），由客户端携带，
+    任何worker进程都能在本地校验，不依赖进程间同步。
+    """
+
+    COOKIE_NAME = "agentput_read_pin"
+
+    def __init__(self, pin_seconds: float = settings.REPLICA_PIN_SECONDS, secret: str = settings.SECRET_KEY):
+        self.pin_seconds = pin_seconds
+        self._secret = secret.encode()
+
+    @property
+    def enabled(self) -> bool:
+        return replica_engine is not engine
+
+    def issue(self, user_id: str) -> str:
+        """生成该用户的主库读取标记，截止时间为毫秒时间戳"""
+        value = f"{user_id}.{int((time.time() + self.pin_seconds) * 1000)}"
+        return f"{value}.{self._sign(value)}"
+
+    def is_pinned(self, cookie: Optional[str], user_id: Optional[str]) -> bool:
+        """标记签名有效、属于该用户且未过期时返回True"""
+        if not cookie or user_id is None:
+            return False
+        value, _, signature = cookie.rpartition(".")
+        owner, _, deadline = value.rpartition(".")
+        if owner != user_id or not hmac.compare_digest(signature, self._sign(value)):
+            return False
+        return deadline.isdigit() and int(deadline) > time.time() * 1000
+
+    def _sign(self, value: str) -> str:
+        return hmac.new(self._secret, value.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+read_router = ReadRouter()
+
+
+def _request_user_id(request: Request) -> Optional[str]:
+    """从访问令牌中取用户ID（SSE通过token查询参数传递令牌），令牌无效时返回None"""
+    authorization = request.headers.get("authorization")
+    token = authorization.partition(" ")[2] if authorization else request.query_params.get("token")
+    payload = decode_access_token(token) if token else None
+    return payload.get("sub") if payload else None
+
+
 # 依赖注入函数
-async def get_db():
+async def get_db(request: Request, response: Response):
+    # 写请求成功后，该用户随后的读请求暂时走主库。cookie只在接口正常返回时随响应发出，
+    # 之后的提交失败时异常向上抛出，响应不会发出
+    if read_router.enabled and request.method not in ("GET", "HEAD", "OPTIONS"):
+        user_id = _request_user_id(request)
+        if user_id is not None:
+            response.set_cookie(
+                read_router.COOKIE_NAME,
+                read_router.issue(user_id),
+                max_age=math.ceil(read_router.pin_seconds),
+                httponly=True,
+                samesite="lax",
+            )
+
     async with AsyncSessionLocal() as session:
         try:
             yield session
@@ -34,3 +131,18 @@ async def get_db():
             raise
         finally:
             await session.close()
+
+
+def read_session_factory(request: Request):
+    """只读请求应使用的会话工厂：配置了副本且该用户未在写入后的主库读取期内时为副本"""
+    if read_router.enabled:
+        cookie = request.cookies.get(read_router.COOKIE_NAME)
+        if cookie and read_router.is_pinned(cookie, _request_user_id(request)):
+            return AsyncSessionLocal
+    return ReplicaSessionLocal
+
+
+async def get_read_db(request: Request):
+    """只读会话：不提交也不回滚，关闭会话时结束事务并归还连接（只读接口使用，配置了副本时读副本）"""
+    async with read_session_factory(request)() as session:
+        yield session
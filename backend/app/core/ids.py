@@ -0,0 +1,45 @@
+"""
+时间有序ID生成
+
+采用 UUIDv7 布局：高48位为毫秒时间戳，其后为版本号、计数器与随机位。
+新ID按生成时间递增，插入时落在InnoDB主键索引的尾部，避免UUID4造成的页分裂。
+"""
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """生成一个 UUIDv7，同一毫秒内通过12位计数器保持单调递增"""
+    global _last_ms, _counter
+
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                # 计数器溢出时借用下一毫秒
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & 0x3FFFFFFFFFFFFFFF
+    value = (ms & 0xFFFFFFFFFFFF) << 80
+    value |= 0x7 << 76
+    value |= counter << 64
+    value |= 0b10 << 62
+    value |= rand_b
+    return uuid.UUID(int=value)
+
+
+def generate_id() -> str:
+    """生成模型主键（36位字符串形式的UUIDv7）"""
+    return str(uuid7())
@@ -0,0 +1,170 @@
+"""
+Prometheus 指标
+
+请求路径上只做一次计时和一次直方图桶计数（二分查找 + 整数自增），不加锁、不分配对象；
+连接池、事件管线、订阅数、运行队列等状态型指标在抓取 /metrics 时才采集。
+输出格式为 Prometheus 文本格式 0.0.4，无需额外依赖。
+worker进程没有HTTP应用，由 start_server 提供一个只读的最简HTTP监听。
+"""
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 请求耗时直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Histogram:
+    """带标签的直方图，桶计数为非累积存储，输出时再累加"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # [各桶计数..., +Inf桶计数, 总和]
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        bounds = [*(_format_value(bound) for bound in self.buckets), "+Inf"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                label_text = _format_labels((*self.label_names, "le"), (*labels, bound))
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+def render_metric(
+    name: str,
+    metric_type: str,
+    documentation: str,
+    samples: Iterable[Tuple[Dict[str, str], float]],
+) -> List[str]:
+    """渲染一个 gauge / counter 指标，samples 为 (标签字典, 值)"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+    return lines
+
+
+def pool_metrics(pool) -> List[str]:
+    """连接池状态（不支持统计的连接池类型，如SQLite的NullPool，不输出）"""
+    lines = []
+    for name, documentation, method in (
+        ("agentput_db_pool_size", "连接池大小", "size"),
+        ("agentput_db_pool_checked_out", "已借出的连接数", "checkedout"),
+        ("agentput_db_pool_checked_in", "池中空闲的连接数", "checkedin"),
+        ("agentput_db_pool_overflow", "超出连接池大小的连接数（为负表示尚未建满）", "overflow"),
+    ):
+        if hasattr(pool, method):
+            lines += render_metric(name, "gauge", documentation, [({}, getattr(pool, method)())])
+    return lines
+
+
+# 路径 -> 返回 (Content-Type, 响应体) 的函数
+Routes = Dict[str, Callable[[], Tuple[str, bytes]]]
+
+
+async def start_server(routes: Routes, host: str, port: int) -> asyncio.AbstractServer:
+    """启动只响应 GET 的最简HTTP/1.0服务，每个请求处理完即关闭连接"""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)).strip():
+                pass
+            method, _, target = request_line.decode("latin-1").partition(" ")
+            route = routes.get(target.split(" ", 1)[0].split("?", 1)[0])
+            if method != "GET" or route is None:
+                status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", b"not found\n"
+            else:
+                status = "200 OK"
+                content_type, body = route()
+            writer.write(
+                f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception:
+            logger.exception("指标请求处理失败")
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+http_request_duration = Histogram(
+    "agentput_http_request_duration_seconds",
+    "HTTP请求耗时（按路由模板）",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+
+
+class MetricsMiddleware:
+    """记录每个HTTP请求的耗时；路由标签取路由模板（如 /api/agents/{agent_id}），未匹配的请求记为 unmatched"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            http_request_duration.observe(
+                (scope["method"], getattr(route, "path_format", None) or "unmatched", str(status_code)),
+                time.perf_counter() - start,
+            )
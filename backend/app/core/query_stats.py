@@ -0,0 +1,142 @@
+"""
+请求级SQL统计
+
+在引擎上挂载执行事件，把每条SQL的耗时记到当前请求上：
+- 每个请求统计查询条数、数据库总耗时和最慢的一条语句
+- 同一请求内相同形状（参数占位、IN列表长度归一后）的语句执行次数达到 SQL_N_PLUS_ONE_THRESHOLD 时，记为疑似N+1并输出警告
+- 超过 SQL_SLOW_QUERY_MS 的语句以JSON格式写入 backend.slow_query 日志（不记录参数值）
+- SQL_DEBUG_HEADERS 开启时，统计结果通过 X-DB-* 响应头返回
+
+请求之外（事件写入、压缩、worker）执行的SQL不计入请求统计，但仍会记录慢查询。
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("backend.slow_query")
+
+DEBUG_HEADERS = ("X-DB-Query-Count", "X-DB-Time-Ms", "X-DB-Slowest-Ms", "X-DB-N-Plus-One")
+
+# 展开后的 IN (?, ?, ?) / IN (%s, %s) 归一为一个占位符，不同长度的IN列表视为同一形状
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    return _WHITESPACE.sub(" ", _IN_LIST.sub("(?)", statement)).strip()
+
+
+class QueryStats:
+    """单个请求的SQL统计"""
+
+    __slots__ = ("method", "path", "count", "total_seconds", "slowest_seconds", "slowest_statement", "shapes")
+
+    def __init__(self, method: str = "", path: str = ""):
+        self.method = method
+        self.path = path
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+        self.shapes[statement_shape(statement)] += 1
+
+    def n_plus_one(self) -> List[Tuple[str, int]]:
+        """重复执行次数达到阈值的语句形状"""
+        return [
+            (shape, count) for shape, count in self.shapes.most_common()
+            if count >= settings.SQL_N_PLUS_ONE_THRESHOLD
+        ]
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-DB-Query-Count": str(self.count),
+            "X-DB-Time-Ms": f"{self.total_seconds * 1000:.2f}",
+            "X-DB-Slowest-Ms": f"{self.slowest_seconds * 1000:.2f}",
+            "X-DB-N-Plus-One": str(len(self.n_plus_one())),
+        }
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """在（同步）引擎上注册执行计时事件"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, seconds)
+        if seconds * 1000 >= settings.SQL_SLOW_QUERY_MS:
+            slow_query_logger.warning(json.dumps({
+                "duration_ms": round(seconds * 1000, 2),
+                "statement": statement_shape(statement),
+                "executemany": executemany,
+                "method": stats.method if stats else None,
+                "path": stats.path if stats else None,
+            }, ensure_ascii=False))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # 执行出错时不会触发 after_cursor_execute，丢弃对应的开始时间
+        if context.connection is not None:
+            starts = context.connection.info.get("query_start")
+            if starts:
+                starts.pop()
+
+
+class QueryStatsMiddleware:
+    """为每个HTTP请求建立SQL统计（纯ASGI中间件，不影响流式响应）"""
+
+    def __init__(self, app, debug_headers: bool = settings.SQL_DEBUG_HEADERS):
+        self.app = app
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope["method"], scope["path"])
+        token = _current.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.debug_headers:
+                headers = list(message.get("headers", []))
+                headers.extend((name.encode(), value.encode()) for name, value in stats.headers().items())
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            for shape, count in stats.n_plus_one():
+                logger.warning("疑似N+1查询: %s %s 执行 %d 次: %s", stats.method, stats.path, count, shape)
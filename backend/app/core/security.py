@@ -1,13 +1,57 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional, TypeVar
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from backend.app.core.config import settings
 
+T = TypeVar("T")
+
 # 密码加密上下文
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+class CryptoBusy(Exception):
+    """等待执行的密码运算已达上限"""
+
+
+class CryptoExecutor:
+    """
+    密码哈希、校验与token签发专用的有界线程池
+    bcrypt 单次耗时数十毫秒，在事件循环中同步执行会阻塞该worker上的所有请求和WebSocket；
+    bcrypt 运算期间释放GIL，放到线程中执行即可与事件循环并行。
+    排队与执行中的任务数超过 queue_limit 时直接拒绝（CryptoBusy），登录风暴不会无限堆积。
+    max_workers 为0时在事件循环中同步执行（仅用于对比测试）。
+    """
+
+    def __init__(self, max_workers: int = settings.CRYPTO_WORKERS, queue_limit: int = settings.CRYPTO_QUEUE_LIMIT):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        if self.pending >= self.queue_limit:
+            self.rejected += 1
+            raise CryptoBusy()
+        if self.max_workers <= 0:
+            return func(*args)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crypto")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -38,3 +82,6 @@ def decode_access_token(token: str) -> Optional[dict]:
         return payload
     except JWTError:
         return None
+
+
+crypto_executor = CryptoExecutor()
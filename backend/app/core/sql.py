@@ -0,0 +1,47 @@
+"""
+跨数据库的SQL函数
+
+列表接口在SQL中直接计算JSON数组长度，只返回计数，不把整列JSON读回应用：
+    select(json_array_length(Agent.handoffs).label("handoff_count"))
+MySQL 使用 JSON_LENGTH，SQLite / PostgreSQL 使用 json_array_length；NULL 按0计。
+
+唯一性由数据库约束保证，写入前不再先查询是否重复，提交时识别唯一约束冲突：
+    except IntegrityError as e:
+        if is_unique_violation(e): ...
+"""
+from sqlalchemy import Integer
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import GenericFunction
+
+
+class json_array_length(GenericFunction):
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(json_array_length)
+def _compile_json_array_length(element, compiler, **kw):
+    return "COALESCE(JSON_LENGTH(%s), 0)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(json_array_length, "sqlite")
+@compiles(json_array_length, "postgresql")
+def _compile_json_array_length_standard(element, compiler, **kw):
+    return "COALESCE(json_array_length(%s), 0)" % compiler.process(element.clauses, **kw)
+
+
+# MySQL: 1062 Duplicate entry；PostgreSQL: SQLSTATE 23505
+_MYSQL_DUPLICATE_ENTRY = 1062
+_POSTGRES_UNIQUE_VIOLATION = "23505"
+
+
+def is_unique_violation(error: IntegrityError) -> bool:
+    """IntegrityError 是否由唯一约束冲突引起（外键、非空等其他约束返回False）"""
+    orig = error.orig
+    args = getattr(orig, "args", ())
+    if args and args[0] == _MYSQL_DUPLICATE_ENTRY:
+        return True
+    if _POSTGRES_UNIQUE_VIOLATION in (getattr(orig, "sqlstate", None), getattr(orig, "pgcode", None)):
+        return True
+    return "UNIQUE constraint failed" in str(orig)
@@ -1,8 +1,10 @@
 from backend.app.models.user import User
 from backend.app.models.agent import Agent
 from backend.app.models.team import Team
-from backend.app.models.conversation import Conversation, ConversationStatus
+from backend.app.models.conversation import Conversation, ConversationStatus, FINISHED_STATUSES
 from backend.app.models.event import Event, EventType
+from backend.app.models.event_archive import EventArchive
+from backend.app.models.replay_snapshot import ReplaySnapshot
 
 __all__ = [
     "User",
@@ -10,6 +12,9 @@ __all__ = [
     "Team",
     "Conversation",
     "ConversationStatus",
+    "FINISHED_STATUSES",
     "Event",
     "EventType",
+    "EventArchive",
+    "ReplaySnapshot",
 ]
@@ -1,20 +1,24 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
-from backend.app.core.database import Base
-import uuid
+from backend.app.core.database import Base, utcnow
+from backend.app.core.ids import generate_id
 
 
 class Agent(Base):
     __tablename__ = "agents"
+    __table_args__ = (
+        # 列表按 (created_at, id) 倒序做键集分页
+        Index("idx_agent_created", "created_at", "id"),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String(36), primary_key=True, default=generate_id)
     name = Column(String(100), nullable=False, unique=True, index=True)
     system_message = Column(Text, nullable=False)
     handoffs = Column(JSON, default=list)  # ["agent_name1", "agent_name2"]
     tools = Column(JSON, default=list)  # ["tool_name1", "tool_name2"]
     created_by = Column(String(36), ForeignKey("users.id"), nullable=True, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), onupdate=utcnow)
 
     def __repr__(self):
         return f"<Agent(id={self.id}, name={self.name})>"
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum, Integer, Index
 from sqlalchemy.sql import func
-from backend.app.core.database import Base
+from backend.app.core.database import Base, utcnow
+from backend.app.core.ids import generate_id
 import enum
-import uuid
 
 
 class ConversationStatus(str, enum.Enum):
@@ -13,17 +13,37 @@ class ConversationStatus(str, enum.Enum):
     CANCELLED = "cancelled"
 
 
+# 已结束的状态：对话不会再产生新事件
+FINISHED_STATUSES = (
+    ConversationStatus.COMPLETED,
+    ConversationStatus.FAILED,
+    ConversationStatus.CANCELLED,
+)
+
+
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        # 运行队列：按状态取出待运行对话并按优先级排序
+        Index("idx_run_queue", "status", "priority"),
+        # 用户的对话列表按 (created_at, id) 倒序做键集分页
+        Index("idx_user_created", "user_id", "created_at", "id"),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String(36), primary_key=True, default=generate_id)
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
     team_id = Column(String(36), ForeignKey("teams.id"), nullable=False, index=True)
     task = Column(Text, nullable=False)  # 用户输入的初始任务
     status = Column(Enum(ConversationStatus), default=ConversationStatus.PENDING, index=True)
+    priority = Column(Integer, nullable=False, default=0)  # 调度优先级，越大越先运行
+    attempts = Column(Integer, nullable=False, default=0)  # 已被worker领取运行的次数
+    lease_owner = Column(String(64), nullable=True)  # 持有运行租约的worker
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)  # 租约到期时间，过期未续约则重新入队
     started_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    compacted_at = Column(DateTime(timezone=True), nullable=True)  # 流式分片事件压缩完成时间
+    archived_at = Column(DateTime(timezone=True), nullable=True)  # 事件归档时间，归档后事件存于 event_archives
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
 
     def __repr__(self):
         return f"<Conversation(id={self.id}, status={self.status})>"
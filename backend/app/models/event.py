@@ -1,8 +1,8 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Integer, Enum
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Integer, Enum, Index
 from sqlalchemy.sql import func
 from backend.app.core.database import Base
+from backend.app.core.ids import generate_id
 import enum
-import uuid
 
 
 class EventType(str, enum.Enum):
@@ -16,9 +16,13 @@ class EventType(str, enum.Enum):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # 按对话内sequence做键集分页，同时覆盖按conversation_id的查询与外键
+        Index("idx_sequence", "conversation_id", "sequence"),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    conversation_id = Column(String(36), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(String(36), primary_key=True, default=generate_id)
+    conversation_id = Column(String(36), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     event_type = Column(Enum(EventType), nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     agent_name = Column(String(100), nullable=True)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, LargeBinary
+from sqlalchemy.sql import func
+from backend.app.core.database import Base, utcnow
+
+
+class EventArchive(Base):
+    __tablename__ = "event_archives"
+
+    conversation_id = Column(String(36), ForeignKey("conversations.id", ondelete="CASCADE"), primary_key=True)
+    content = Column(LargeBinary(length=2**32 - 1), nullable=False)  # gzip压缩的事件JSON数组（按sequence排序）
+    event_count = Column(Integer, nullable=False)
+    raw_bytes = Column(Integer, nullable=False)  # 压缩前的字节数
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+
+    def __repr__(self):
+        return f"<EventArchive(conversation_id={self.conversation_id}, events={self.event_count})>"
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, LargeBinary
+from sqlalchemy.sql import func
+from backend.app.core.database import Base
+
+
+class ReplaySnapshot(Base):
+    __tablename__ = "replay_snapshots"
+
+    conversation_id = Column(String(36), ForeignKey("conversations.id", ondelete="CASCADE"), primary_key=True)
+    etag = Column(String(64), nullable=False)
+    content = Column(LargeBinary(length=2**32 - 1), nullable=False)  # gzip压缩后的回放JSON
+    event_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ReplaySnapshot(conversation_id={self.conversation_id}, events={self.event_count})>"
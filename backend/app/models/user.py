@@ -1,18 +1,18 @@
 from sqlalchemy import Column, String, DateTime
 from sqlalchemy.sql import func
-from backend.app.core.database import Base
-import uuid
+from backend.app.core.database import Base, utcnow
+from backend.app.core.ids import generate_id
 
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String(36), primary_key=True, default=generate_id)
     name = Column(String(100), nullable=False, index=True)
     email = Column(String(255), nullable=False, unique=True, index=True)
     hashed_password = Column(String(255), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), onupdate=utcnow)
 
     def __repr__(self):
         return f"<User(id={self.id}, name={self.name}, email={self.email})>"
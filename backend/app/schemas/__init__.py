@@ -9,12 +9,14 @@ from backend.app.schemas.user import (
 from backend.app.schemas.agent import (
     AgentCreate,
     AgentUpdate,
+    AgentValidateRequest,
     AgentResponse,
     AgentListResponse,
 )
 from backend.app.schemas.team import (
     TeamCreate,
     TeamUpdate,
+    TeamValidateRequest,
     TeamResponse,
     TeamListResponse,
 )
@@ -22,6 +24,15 @@ from backend.app.schemas.conversation import (
     ConversationCreate,
     ConversationResponse,
     ConversationListResponse,
+    SchedulerStatsResponse,
+)
+from backend.app.schemas.event import EventResponse
+from backend.app.schemas.validation import ValidationResponse
+from backend.app.schemas.transfer import ConversationImportResponse, TeamImportResponse
+from backend.app.schemas.tool import (
+    ToolResponse,
+    ToolSchemaResponse,
+    MCPServerStatusResponse,
 )
 
 __all__ = [
@@ -33,13 +44,23 @@ __all__ = [
     "TokenData",
     "AgentCreate",
     "AgentUpdate",
+    "AgentValidateRequest",
     "AgentResponse",
     "AgentListResponse",
     "TeamCreate",
     "TeamUpdate",
+    "TeamValidateRequest",
     "TeamResponse",
     "TeamListResponse",
     "ConversationCreate",
     "ConversationResponse",
     "ConversationListResponse",
+    "SchedulerStatsResponse",
+    "EventResponse",
+    "ValidationResponse",
+    "ConversationImportResponse",
+    "TeamImportResponse",
+    "ToolResponse",
+    "ToolSchemaResponse",
+    "MCPServerStatusResponse",
 ]
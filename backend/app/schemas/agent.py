@@ -21,6 +21,12 @@ class AgentUpdate(BaseModel):
     tools: Optional[List[str]] = None
 
 
+class AgentValidateRequest(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    handoffs: List[str] = Field(default_factory=list)
+    agent_id: Optional[str] = None  # 校验对已有Agent的修改时传入
+
+
 class AgentResponse(AgentBase):
     id: str
     created_by: Optional[str] = None
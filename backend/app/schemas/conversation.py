@@ -10,6 +10,7 @@ class ConversationBase(BaseModel):
 
 class ConversationCreate(ConversationBase):
     team_id: str = Field(..., min_length=1)
+    priority: int = Field(0, ge=0, le=10)
 
 
 class ConversationResponse(ConversationBase):
@@ -17,8 +18,10 @@ class ConversationResponse(ConversationBase):
     user_id: str
     team_id: str
     status: ConversationStatus
+    priority: int = 0
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    compacted_at: Optional[datetime] = None
     created_at: datetime
 
     class Config:
@@ -36,3 +39,15 @@ class ConversationListResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class SchedulerStatsResponse(BaseModel):
+    queue_depth: int
+    running: int
+    max_concurrency: int
+    max_per_user: int
+    oldest_wait_seconds: float
+    avg_wait_seconds: float
+    p95_wait_seconds: float
+    user_queued: int
+    user_running: int
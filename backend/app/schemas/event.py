@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, Any, Dict
+from backend.app.models.event import EventType
+
+
+class EventResponse(BaseModel):
+    id: str
+    conversation_id: str
+    event_type: EventType
+    timestamp: Optional[datetime] = None
+    agent_name: Optional[str] = None
+    data: Dict[str, Any]
+    sequence: int
+
+    class Config:
+        from_attributes = True
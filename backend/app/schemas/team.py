@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 
 class TeamBase(BaseModel):
@@ -21,11 +21,17 @@ class TeamUpdate(BaseModel):
     entry_agent: Optional[str] = Field(None, min_length=1)
 
 
+class TeamValidateRequest(BaseModel):
+    agents: List[str] = Field(..., min_items=1)  # Agent IDs
+    entry_agent: str = Field(..., min_length=1)  # Agent ID
+
+
 class TeamResponse(TeamBase):
     id: str
     created_by: Optional[str] = None
     created_at: datetime
     updated_at: datetime
+    agent_names: Dict[str, str] = {}  # Agent ID -> 名称
 
     class Config:
         from_attributes = True
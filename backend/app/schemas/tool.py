@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+
+
+class ToolResponse(BaseModel):
+    name: str
+    server: str
+    description: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ToolSchemaResponse(ToolResponse):
+    input_schema: Dict[str, Any]
+
+
+class MCPServerStatusResponse(BaseModel):
+    name: str
+    url: str
+    description: Optional[str] = None
+    connected: bool
+    circuit: str
+    calls: int
+    errors: int
+    tool_count: int
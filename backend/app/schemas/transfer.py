@@ -0,0 +1,54 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from backend.app.models.conversation import ConversationStatus
+from backend.app.models.event import EventType
+
+
+# 导入文件中各类记录的data部分；导出的id在导入时重新生成，只用于关联记录
+class ConversationRecord(BaseModel):
+    id: str
+    team_id: str
+    task: str = Field(..., min_length=1)
+    status: ConversationStatus
+    priority: int = Field(0, ge=0, le=10)
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    compacted_at: Optional[datetime] = None
+
+
+class EventRecord(BaseModel):
+    event_type: EventType
+    timestamp: Optional[datetime] = None
+    agent_name: Optional[str] = Field(None, max_length=100)
+    data: Dict[str, Any]
+    sequence: int = Field(..., ge=1)
+
+
+class TeamRecord(BaseModel):
+    id: str
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = None
+    agents: List[str] = Field(..., min_items=1)  # 导出环境中的Agent ID
+    entry_agent: str = Field(..., min_length=1)
+
+
+class AgentRecord(BaseModel):
+    id: str
+    name: str = Field(..., min_length=1, max_length=100)
+    system_message: str = Field(..., min_length=1)
+    handoffs: List[str] = Field(default_factory=list)
+    tools: List[str] = Field(default_factory=list)
+
+
+class ConversationImportResponse(BaseModel):
+    id: str  # 导入后的对话ID
+    status: ConversationStatus
+    events: int
+
+
+class TeamImportResponse(BaseModel):
+    id: str  # 导入后的Team ID
+    name: str
+    agent_ids: Dict[str, str]  # 导出环境中的Agent ID -> 导入后的Agent ID
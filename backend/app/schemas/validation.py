@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Dict, List
+
+
+class ValidationResponse(BaseModel):
+    valid: bool  # 没有错误（警告不影响）
+    errors: List[str] = []
+    warnings: List[str] = []
+    cycles: List[List[str]] = []  # 每个handoff循环涉及的Agent名称
+    unreachable: List[str] = []  # 从入口Agent无法到达的Agent名称
+    dangling: Dict[str, List[str]] = {}  # Agent名称 -> 不存在的handoff目标
@@ -0,0 +1,109 @@
+"""
+认证用户缓存
+
+每个认证请求都要解码JWT并按 sub 查询 users 表。两部分结果都缓存在进程内：
+- token -> 用户ID：验签结果在token过期前不会变化，缓存到 exp 与TTL中较早者
+- 用户ID -> 用户列值快照：每次请求据此构造一个新的游离态 User，请求之间互不影响
+两者都是有上限的LRU。用户信息被修改后调用 invalidate，经事件总线通知所有worker丢弃该用户的快照；
+TTL（AUTH_CACHE_TTL）限制了未接入事件总线的进程可能读到旧数据的时长。
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from backend.app.core.config import settings
+from backend.app.core.security import decode_access_token
+from backend.app.models.user import User
+from backend.app.services.event_bus import event_bus
+
+AUTH_CACHE_CHANNEL = "auth_cache"
+
+_USER_COLUMNS = tuple(column.key for column in User.__table__.columns)
+
+
+class AuthCache:
+    """token与用户快照的TTL + LRU缓存"""
+
+    def __init__(self, ttl: float = settings.AUTH_CACHE_TTL, max_entries: int = settings.AUTH_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._tokens: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._users: "OrderedDict[str, tuple[Dict[str, Any], float]]" = OrderedDict()
+        # 每次失效递增，查询期间被失效的用户不会写回旧快照
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def user_id_for_token(self, token: str) -> Optional[str]:
+        """返回token对应的用户ID，token无效或已过期时返回None"""
+        now = time.time()
+        cached = self._tokens.get(token)
+        if cached is not None:
+            user_id, expires_at = cached
+            if expires_at > now:
+                self._tokens.move_to_end(token)
+                return user_id
+            del self._tokens[token]
+
+        payload = decode_access_token(token)
+        if payload is None or payload.get("sub") is None:
+            return None
+        user_id = payload["sub"]
+        expires_at = now + self.ttl
+        if payload.get("exp") is not None:
+            expires_at = min(expires_at, float(payload["exp"]))
+        self._put(self._tokens, token, (user_id, expires_at))
+        return user_id
+
+    async def get_user(self, user_id: str, load: Callable[[str], Awaitable[Optional[User]]]) -> Optional[User]:
+        """返回用户，未命中时调用 load 查询数据库"""
+        cached = self._users.get(user_id)
+        if cached is not None:
+            values, expires_at = cached
+            if expires_at > time.monotonic():
+                self._users.move_to_end(user_id)
+                self.hits += 1
+                return _detached_user(values)
+            del self._users[user_id]
+
+        self.misses += 1
+        generation = self._generations.get(user_id, 0)
+        user = await load(user_id)
+        if user is None:
+            return None
+        values = {key: getattr(user, key) for key in _USER_COLUMNS}
+        if self._generations.get(user_id, 0) == generation:
+            self._put(self._users, user_id, (values, time.monotonic() + self.ttl))
+        # 与命中时一样返回游离态对象，不与加载它的（只读）会话绑定
+        return _detached_user(values)
+
+    async def invalidate(self, user_id: str) -> None:
+        """通知所有进程丢弃该用户的快照（用户信息修改提交后调用）"""
+        await event_bus.publish(AUTH_CACHE_CHANNEL, user_id, {})
+
+    def handle_invalidation(self, key: str, message: Dict[str, Any]) -> None:
+        """事件总线处理函数"""
+        self._generations[key] = self._generations.get(key, 0) + 1
+        self._users.pop(key, None)
+
+    def clear(self) -> None:
+        self._tokens.clear()
+        self._users.clear()
+
+    def _put(self, entries: OrderedDict, key: str, value: Any) -> None:
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+
+def _detached_user(values: Dict[str, Any]) -> User:
+    """由快照构造游离态User，需要修改时先 db.add 挂回会话"""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+auth_cache = AuthCache()
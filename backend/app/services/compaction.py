@@ -0,0 +1,180 @@
+"""
+事件压缩服务
+
+对话完成后，把连续的 AgentMessageChunk 流式分片折叠为每轮一条事件：
+- 分片之后紧跟同一Agent的 TextMessage 时，TextMessage 已包含完整内容，直接删除分片
+- 否则把分片内容拼接写回该轮的第一条分片，删除其余分片
+保留下来的事件sequence不变，因此回放顺序不受影响。
+多个进程可能同时处理同一对话（各worker的启动补做、导入后的调度），压缩前以条件UPDATE写入压缩标记认领对话，
+只有认领成功的进程执行压缩；压缩失败时认领随事务一起回滚。
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, update, delete
+
+from backend.app.core.database import AsyncSessionLocal, utcnow
+from backend.app.models.conversation import Conversation, ConversationStatus
+from backend.app.models.event import Event, EventType
+from backend.app.services import replay_cache
+
+logger = logging.getLogger(__name__)
+
+# 每次读取的事件数与每条DELETE语句包含的ID数
+PAGE_SIZE = 1000
+DELETE_BATCH_SIZE = 1000
+
+
+class _ChunkRun:
+    """同一Agent的一段连续分片"""
+
+    __slots__ = ("agent_name", "ids", "contents")
+
+    def __init__(self, agent_name: Optional[str]):
+        self.agent_name = agent_name
+        self.ids: List[str] = []
+        self.contents: List[str] = []
+
+
+class CompactionService:
+    """后台压缩已完成对话的流式分片事件"""
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self._session_factory = session_factory
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self, scan: bool = True) -> None:
+        """启动后台任务；scan为True时补做启动前遗留的未压缩对话（只在Team运行worker中执行）"""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        if not scan:
+            return
+        try:
+            async with self._session_factory() as session:
+                result = await session.execute(
+                    select(Conversation.id).where(
+                        Conversation.status == ConversationStatus.COMPLETED,
+                        Conversation.compacted_at.is_(None),
+                    )
+                )
+                for conversation_id in result.scalars():
+                    self.schedule(conversation_id)
+        except Exception:
+            logger.exception("查询待压缩对话失败")
+
+    async def close(self) -> None:
+        """停止后台任务"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def schedule(self, conversation_id: str) -> None:
+        """将对话加入压缩队列（对话完成且事件已落库后调用）"""
+        self._queue.put_nowait(conversation_id)
+
+    async def compact(self, conversation_id: str) -> Dict[str, int]:
+        """
+        压缩单个对话，返回统计信息
+        全部修改与压缩标记在同一事务中提交
+        """
+        stats = {"chunks": 0, "deleted": 0, "merged": 0}
+
+        async with self._session_factory() as session:
+            # 认领：其他进程已压缩（或正在压缩，等待其提交后）时影响行数为0
+            result = await session.execute(
+                update(Conversation)
+                .where(
+                    Conversation.id == conversation_id,
+                    Conversation.status == ConversationStatus.COMPLETED,
+                    Conversation.compacted_at.is_(None),
+                )
+                .values(compacted_at=utcnow())
+            )
+            if result.rowcount == 0:
+                await session.rollback()
+                return stats
+
+            to_delete: List[str] = []
+            merged: Dict[str, Dict[str, Any]] = {}
+            run: Optional[_ChunkRun] = None
+
+            def close_run(next_type: Optional[EventType], next_agent: Optional[str]) -> None:
+                if run is None or not run.ids:
+                    return
+                stats["chunks"] += len(run.ids)
+                if next_type == EventType.TEXT_MESSAGE and next_agent == run.agent_name:
+                    to_delete.extend(run.ids)
+                else:
+                    merged[run.ids[0]] = {
+                        "content": "".join(run.contents),
+                        "compacted_chunks": len(run.ids),
+                    }
+                    to_delete.extend(run.ids[1:])
+
+            last_sequence = 0
+            while True:
+                result = await session.execute(
+                    select(Event.id, Event.event_type, Event.agent_name, Event.data, Event.sequence)
+                    .where(
+                        Event.conversation_id == conversation_id,
+                        Event.sequence > last_sequence,
+                    )
+                    .order_by(Event.sequence)
+                    .limit(PAGE_SIZE)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+
+                for row in rows:
+                    if row.event_type == EventType.AGENT_MESSAGE_CHUNK:
+                        if run is not None and run.agent_name != row.agent_name:
+                            close_run(None, None)
+                            run = None
+                        if run is None:
+                            run = _ChunkRun(row.agent_name)
+                        run.ids.append(row.id)
+                        run.contents.append(str((row.data or {}).get("content", "")))
+                    elif run is not None:
+                        close_run(row.event_type, row.agent_name)
+                        run = None
+                last_sequence = rows[-1].sequence
+
+            close_run(None, None)
+
+            for event_id, data in merged.items():
+                await session.execute(update(Event).where(Event.id == event_id).values(data=data))
+            for start in range(0, len(to_delete), DELETE_BATCH_SIZE):
+                await session.execute(
+                    delete(Event).where(Event.id.in_(to_delete[start:start + DELETE_BATCH_SIZE]))
+                )
+
+            # 事件已变化，回放快照随之失效
+            await replay_cache.invalidate(session, conversation_id)
+            await session.commit()
+
+        stats["deleted"] = len(to_delete)
+        stats["merged"] = len(merged)
+        return stats
+
+    async def _run(self) -> None:
+        """逐个处理压缩队列"""
+        while True:
+            conversation_id = await self._queue.get()
+            try:
+                stats = await self.compact(conversation_id)
+                if stats["chunks"]:
+                    logger.info("对话 %s 压缩完成: %s", conversation_id, stats)
+            except Exception:
+                logger.exception("压缩对话 %s 失败", conversation_id)
+            finally:
+                self._queue.task_done()
+
+
+compaction_service = CompactionService()
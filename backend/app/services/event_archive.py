@@ -0,0 +1,347 @@
+"""
+事件冷归档
+
+结束超过 EVENT_ARCHIVE_AFTER_DAYS 天的对话，其事件按sequence序列化为一个gzip压缩的JSON数组存入 event_archives，
+并从 events 表删除，热表及其索引只保留近期对话的事件。写入归档、删除事件与 conversations.archived_at 标记在同一事务中提交。
+事件接口、SSE补齐与回放读取已归档对话时透明地改从归档读取；最近解压的归档按解压后大小保存在进程内LRU中。
+超过缓存上限的归档不整体解压：分页读取时边解压边解析，取够一页即停止；导出对话时用 iter_events 逐条产出。
+"""
+import asyncio
+import codecs
+import json
+import logging
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import timedelta
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.config import settings
+from backend.app.core.database import AsyncSessionLocal, utcnow
+from backend.app.models.conversation import Conversation, ConversationStatus, FINISHED_STATUSES
+from backend.app.models.event import Event, EventType
+from backend.app.models.event_archive import EventArchive
+from backend.app.schemas.event import EventResponse
+
+logger = logging.getLogger(__name__)
+
+# 归档时每次读取的事件数
+ARCHIVE_BATCH_SIZE = 1000
+
+# 流式读取归档时每次解压的压缩数据字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _Archive:
+    """解压后的归档：事件按sequence排序，sequences用于二分定位"""
+
+    __slots__ = ("sequences", "events", "raw_bytes")
+
+    def __init__(self, events: List[Dict[str, Any]], raw_bytes: int):
+        self.events = events
+        self.sequences = [event["sequence"] for event in events]
+        self.raw_bytes = raw_bytes
+
+
+def _decode(content: bytes) -> _Archive:
+    raw = zlib.decompress(content, 31)
+    return _Archive(json.loads(raw), len(raw))
+
+
+def _scan(
+    content: bytes,
+    after_sequence: int,
+    before_sequence: Optional[int],
+    event_type: Optional[EventType],
+    agent_name: Optional[str],
+    limit: Optional[int],
+) -> List[Dict[str, Any]]:
+    """流式解析归档并按条件筛选，到达 before_sequence 或取满 limit 条后即停止解压"""
+    events = []
+    for event in _iter_decode(content):
+        if event["sequence"] <= after_sequence:
+            continue
+        if before_sequence is not None and event["sequence"] >= before_sequence:
+            break
+        if event_type is not None and event["event_type"] != event_type.value:
+            continue
+        if agent_name is not None and event["agent_name"] != agent_name:
+            continue
+        events.append(event)
+        if limit is not None and len(events) >= limit:
+            break
+    return events
+
+
+def _iter_decode(content: bytes) -> Iterator[Dict[str, Any]]:
+    """逐条解析gzip压缩的JSON数组，内存占用与单块解压数据相当，与归档大小无关"""
+    decoder = json.JSONDecoder()
+    decompressor = zlib.decompressobj(31)
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer, position = "", 0
+    for offset in range(0, len(content), STREAM_CHUNK_SIZE):
+        final = offset + STREAM_CHUNK_SIZE >= len(content)
+        chunk = decompressor.decompress(content[offset:offset + STREAM_CHUNK_SIZE])
+        if final:
+            chunk += decompressor.flush()
+        buffer = buffer[position:] + text.decode(chunk, final)
+        position = 0
+        while True:
+            # 跳过数组的括号与分隔符
+            while position < len(buffer) and buffer[position] in "[,] \t\r\n":
+                position += 1
+            if position >= len(buffer):
+                break
+            try:
+                event, position_after = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # 事件跨越了数据块边界，解压下一块后继续
+                if final:
+                    raise
+                break
+            yield event
+            position = position_after
+
+
+class EventArchiveService:
+    """归档已结束对话的事件，并为已归档对话提供事件读取"""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        after_days: int = settings.EVENT_ARCHIVE_AFTER_DAYS,
+        interval: float = settings.EVENT_ARCHIVE_INTERVAL,
+        batch_size: int = settings.EVENT_ARCHIVE_BATCH_SIZE,
+        cache_max_bytes: int = settings.EVENT_ARCHIVE_CACHE_MAX_BYTES,
+    ):
+        self._session_factory = session_factory
+        self.after_days = after_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.cache_max_bytes = cache_max_bytes
+        self._cache: "OrderedDict[str, _Archive]" = OrderedDict()
+        self._cache_bytes = 0
+        self._worker: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    async def start(self) -> None:
+        """启动定时归档任务（EVENT_ARCHIVE_AFTER_DAYS 为0时不启动）"""
+        if self.after_days > 0 and (self._worker is None or self._worker.done()):
+            self._worker = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """停止定时归档任务"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def archive_due(self, limit: Optional[int] = None, after_days: Optional[int] = None) -> List[Dict[str, Any]]:
+        """归档结束时间早于 after_days 天前的对话，返回每个已归档对话的统计"""
+        cutoff = utcnow() - timedelta(days=self.after_days if after_days is None else after_days)
+        async with self._session_factory() as session:
+            result = await session.execute(
+                select(Conversation.id)
+                .where(
+                    Conversation.status.in_(FINISHED_STATUSES),
+                    Conversation.archived_at.is_(None),
+                    Conversation.completed_at < cutoff,
+                    # 已完成的对话先等流式分片压缩完成
+                    or_(Conversation.status != ConversationStatus.COMPLETED, Conversation.compacted_at.isnot(None)),
+                )
+                .order_by(Conversation.completed_at)
+                .limit(limit or self.batch_size)
+            )
+            conversation_ids = list(result.scalars())
+
+        archived = []
+        for conversation_id in conversation_ids:
+            stats = await self.archive(conversation_id)
+            if stats is not None:
+                archived.append(stats)
+        return archived
+
+    async def archive(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        归档单个已结束的对话，返回统计信息；对话未结束或已归档时返回None
+        先以条件更新标记 archived_at，多个进程同时归档同一对话时只有一个会继续
+        """
+        async with self._session_factory() as session:
+            result = await session.execute(
+                update(Conversation)
+                .where(
+                    Conversation.id == conversation_id,
+                    Conversation.status.in_(FINISHED_STATUSES),
+                    Conversation.archived_at.is_(None),
+                )
+                .values(archived_at=utcnow())
+            )
+            if result.rowcount != 1:
+                await session.rollback()
+                return None
+
+            compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+            parts = [compressor.compress(b"[")]
+            raw_bytes = 2
+            event_count = 0
+            last_sequence = 0
+            while True:
+                result = await session.execute(
+                    select(Event)
+                    .where(Event.conversation_id == conversation_id, Event.sequence > last_sequence)
+                    .order_by(Event.sequence)
+                    .limit(ARCHIVE_BATCH_SIZE)
+                )
+                events = result.scalars().all()
+                for event in events:
+                    payload = EventResponse.model_validate(event).model_dump(mode="json")
+                    data = (("," if event_count else "") + json.dumps(payload, ensure_ascii=False)).encode()
+                    raw_bytes += len(data)
+                    parts.append(compressor.compress(data))
+                    event_count += 1
+                    session.expunge(event)
+                if len(events) < ARCHIVE_BATCH_SIZE:
+                    break
+                last_sequence = events[-1].sequence
+            parts.append(compressor.compress(b"]"))
+            parts.append(compressor.flush())
+            content = b"".join(parts)
+
+            session.add(EventArchive(
+                conversation_id=conversation_id,
+                content=content,
+                event_count=event_count,
+                raw_bytes=raw_bytes,
+            ))
+            await session.execute(delete(Event).where(Event.conversation_id == conversation_id))
+            await session.commit()
+
+        return {
+            "conversation_id": conversation_id,
+            "events": event_count,
+            "raw_bytes": raw_bytes,
+            "compressed_bytes": len(content),
+        }
+
+    async def read_events(
+        self,
+        conversation_id: str,
+        after_sequence: int = 0,
+        limit: Optional[int] = None,
+        event_type: Optional[EventType] = None,
+        agent_name: Optional[str] = None,
+        before_sequence: Optional[int] = None,
+        db: Optional[AsyncSession] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        读取已归档对话的事件（与 EventResponse 的JSON形式相同），语义与按sequence的键集分页一致
+        返回的字典与缓存共享，调用方不得修改
+        """
+        archive = self._cache.get(conversation_id)
+        if archive is not None:
+            self._cache.move_to_end(conversation_id)
+            self.hits += 1
+        else:
+            self.misses += 1
+            row = await self._fetch(conversation_id, db)
+            if row is None:
+                return []
+            content, raw_bytes = row
+            if raw_bytes > self.cache_max_bytes:
+                # 放不进缓存的大归档：每次都要重新解压，只解压到取够本页为止
+                return await asyncio.to_thread(
+                    _scan, content, after_sequence, before_sequence, event_type, agent_name, limit
+                )
+            archive = await self._decode_and_cache(conversation_id, content)
+
+        start = bisect_right(archive.sequences, after_sequence)
+        end = bisect_left(archive.sequences, before_sequence) if before_sequence is not None else len(archive.events)
+        events = (archive.events[i] for i in range(start, end))
+        if event_type is not None:
+            events = (event for event in events if event["event_type"] == event_type.value)
+        if agent_name is not None:
+            events = (event for event in events if event["agent_name"] == agent_name)
+        return list(islice(events, limit))
+
+    async def iter_events(
+        self, conversation_id: str, db: Optional[AsyncSession] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """按sequence顺序逐条产出已归档对话的全部事件；未缓存的归档边解压边解析，且不放入缓存"""
+        archive = self._cache.get(conversation_id)
+        if archive is not None:
+            for event in archive.events:
+                yield event
+            return
+
+        row = await self._fetch(conversation_id, db)
+        if row is None:
+            return
+        for event in _iter_decode(row.content):
+            yield event
+
+    def discard(self, conversation_id: str) -> None:
+        """对话删除后丢弃缓存的归档"""
+        archive = self._cache.pop(conversation_id, None)
+        if archive is not None:
+            self._cache_bytes -= archive.raw_bytes
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cached": len(self._cache),
+            "cache_bytes": self._cache_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    async def _decode_and_cache(self, conversation_id: str, content: bytes) -> _Archive:
+        # 解压与JSON解析在线程中执行，不阻塞事件循环
+        archive = await asyncio.to_thread(_decode, content)
+        if archive.raw_bytes <= self.cache_max_bytes:
+            self.discard(conversation_id)
+            self._cache[conversation_id] = archive
+            self._cache_bytes += archive.raw_bytes
+            while self._cache_bytes > self.cache_max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted.raw_bytes
+        return archive
+
+    async def _fetch(self, conversation_id: str, db: Optional[AsyncSession]):
+        """读取归档的压缩内容与解压后大小，不存在时返回None"""
+        query = select(EventArchive.content, EventArchive.raw_bytes).where(
+            EventArchive.conversation_id == conversation_id
+        )
+        if db is not None:
+            return (await db.execute(query)).one_or_none()
+        async with self._session_factory() as session:
+            return (await session.execute(query)).one_or_none()
+
+    async def _run(self) -> None:
+        """定时归档到期的对话"""
+        while True:
+            try:
+                archived = await self.archive_due()
+                if archived:
+                    logger.info(
+                        "已归档 %d 个对话的事件（%d 条，%d -> %d 字节）",
+                        len(archived),
+                        sum(stats["events"] for stats in archived),
+                        sum(stats["raw_bytes"] for stats in archived),
+                        sum(stats["compressed_bytes"] for stats in archived),
+                    )
+                    # 本轮已满时立即继续处理积压
+                    if len(archived) >= self.batch_size:
+                        continue
+            except Exception:
+                logger.exception("归档对话事件失败")
+            await asyncio.sleep(self.interval)
+
+
+event_archive = EventArchiveService()
@@ -0,0 +1,239 @@
+"""
+事件总线
+
+把“某个worker产生的消息”送达“所有worker中的本地订阅者”。消息按 channel 区分用途（如 events），
+key 用于标识对象（如对话ID），message 必须可JSON序列化。
+
+- InProcessEventBus：单进程部署，直接在本进程内投递
+- UnixSocketEventBus：多worker部署，通过本机Unix socket互通，无需外部服务。
+  各worker通过文件锁选举出一个broker监听socket，所有worker（含broker自身）作为客户端连接；
+  broker按接收顺序把每条消息转发给除发送者外的其他连接，同一生产者的消息顺序因此保持不变。
+  broker进程退出后，其他worker重新选举并重连，断开期间发布的消息暂存后按原顺序补发。
+"""
+import abc
+import asyncio
+import fcntl
+import json
+import logging
+import os
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+from backend.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str, Dict[str, Any]], None]
+
+# 单条消息上限与broker对单个连接的最大积压字节数
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+MAX_PEER_BACKLOG = 64 * 1024 * 1024
+# 与broker断开期间最多暂存的消息数
+MAX_PENDING_MESSAGES = 10000
+
+
+class EventBus(abc.ABC):
+    """事件总线基类：维护本地订阅者并负责本地投递，子类实现 publish"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """注册本进程内的消息处理函数 handler(key, message)，重复注册会被忽略"""
+        handlers = self._handlers.setdefault(channel, [])
+        if handler not in handlers:
+            handlers.append(handler)
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def publish(self, channel: str, key: str, message: Dict[str, Any]) -> None:
+        """把消息发布到所有进程中订阅了该频道的处理函数"""
+
+    def _deliver(self, channel: str, key: str, message: Dict[str, Any]) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(key, message)
+            except Exception:
+                logger.exception("事件总线处理函数出错: channel=%s", channel)
+
+
+class InProcessEventBus(EventBus):
+    """单进程事件总线"""
+
+    async def publish(self, channel: str, key: str, message: Dict[str, Any]) -> None:
+        self._deliver(channel, key, message)
+
+
+class UnixSocketEventBus(EventBus):
+    """基于本机Unix socket的跨进程事件总线"""
+
+    def __init__(self, path: str = settings.EVENT_BUS_SOCKET, reconnect_delay: float = 0.2):
+        super().__init__()
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.reconnect_delay = reconnect_delay
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Deque[bytes] = deque(maxlen=MAX_PENDING_MESSAGES)
+        self._dropped = 0  # 本次断开期间因暂存队列已满丢弃的消息数
+        self._connected = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._lock_fd: Optional[int] = None
+        self._peers: Set[asyncio.StreamWriter] = set()
+
+    @property
+    def is_broker(self) -> bool:
+        return self._server is not None
+
+    async def start(self, timeout: float = 5.0) -> None:
+        """连接总线（必要时成为broker），最多等待timeout秒"""
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._maintain_connection())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("连接事件总线 %s 超时，将在后台继续重试", self.path)
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._server is not None:
+            self._server.close()
+            for peer in list(self._peers):
+                peer.close()
+            self._server = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def publish(self, channel: str, key: str, message: Dict[str, Any]) -> None:
+        """本地立即投递，并经broker转发给其他worker"""
+        self._deliver(channel, key, message)
+        line = json.dumps({"ch": channel, "k": key, "m": message}, ensure_ascii=False).encode() + b"\n"
+        if self._writer is None:
+            self._queue_pending(line)
+            return
+        try:
+            self._writer.write(line)
+            await self._writer.drain()
+        except ConnectionError:
+            # broker已断开但读取循环尚未察觉：调用方通常刚提交写入，不能因此失败，暂存到重连后发送
+            self._queue_pending(line)
+
+    def _queue_pending(self, line: bytes) -> None:
+        """断开期间暂存消息，超过上限时丢弃最早的消息"""
+        if len(self._pending) == self._pending.maxlen:
+            self._dropped += 1
+            if self._dropped == 1:
+                logger.warning("事件总线断开期间暂存的消息已达上限 %d，开始丢弃最早的消息", self._pending.maxlen)
+        self._pending.append(line)
+
+    async def _maintain_connection(self) -> None:
+        """连接broker并读取转发消息，断开后重新选举并重连"""
+        while True:
+            await self._try_become_broker()
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=MAX_MESSAGE_SIZE)
+            except OSError:
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            if self._dropped:
+                logger.warning("与事件总线断开期间丢弃了 %d 条消息", self._dropped)
+                self._dropped = 0
+            while self._pending:
+                writer.write(self._pending.popleft())
+            self._writer = writer
+            self._connected.set()
+            try:
+                await self._read_messages(reader)
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                pass
+            finally:
+                self._writer = None
+                self._connected.clear()
+                writer.close()
+            logger.warning("与事件总线broker断开，准备重连")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _read_messages(self, reader: asyncio.StreamReader) -> None:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            frame = json.loads(line)
+            self._deliver(frame["ch"], frame["k"], frame["m"])
+
+    async def _try_become_broker(self) -> None:
+        """通过文件锁选举broker；持锁进程退出时锁自动释放"""
+        if self._server is not None:
+            return
+        fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return
+
+        # 持有锁后，遗留的socket文件必然来自已退出的broker
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self._lock_fd = fd
+        self._server = await asyncio.start_unix_server(self._handle_peer, self.path, limit=MAX_MESSAGE_SIZE)
+        logger.info("当前进程成为事件总线broker: %s", self.path)
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """broker端：把每条消息按接收顺序转发给其他所有连接"""
+        self._peers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for peer in list(self._peers):
+                    if peer is writer:
+                        continue
+                    if peer.transport.get_write_buffer_size() > MAX_PEER_BACKLOG:
+                        # 积压过多的连接直接断开，由其自行重连
+                        logger.warning("事件总线连接积压过多，已断开")
+                        self._peers.discard(peer)
+                        peer.close()
+                        continue
+                    peer.write(line)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # broker关闭时结束转发即可，不再向上传播
+            pass
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+
+def create_event_bus() -> EventBus:
+    """按配置创建事件总线"""
+    if settings.EVENT_BUS_BACKEND == "unix":
+        return UnixSocketEventBus(settings.EVENT_BUS_SOCKET)
+    return InProcessEventBus()
+
+
+event_bus = create_event_bus()
@@ -0,0 +1,145 @@
+"""
+事件服务
+
+Team运行产生的每个事件都经由 emit 统一处理：分配sequence并缓冲落库，
+同时经事件总线推送给所有worker上的实时订阅者。
+stream_events 为断线重连的客户端先补齐历史事件，再无缝衔接实时事件。
+"""
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import select
+
+from backend.app.core.config import settings
+from backend.app.core.database import AsyncSessionLocal
+from backend.app.models.event import Event, EventType
+from backend.app.schemas.event import EventResponse
+from backend.app.services.event_archive import event_archive
+from backend.app.services.event_bus import event_bus
+from backend.app.services.event_writer import event_writer
+from backend.app.websocket.manager import manager, SlowConsumerPolicy
+
+EVENTS_CHANNEL = "events"
+
+# 断线补齐时每次从数据库读取的事件数
+CATCH_UP_BATCH_SIZE = 500
+
+# 实时事件之前出现空洞时，等待写入方落库的退避重读：首次间隔与总等待上限（秒）。
+# 写入方按 EVENT_FLUSH_INTERVAL 定时刷新，上限留出几个刷新周期
+GAP_RETRY_DELAY = 0.05
+GAP_MAX_WAIT = settings.EVENT_FLUSH_INTERVAL * 4
+
+
+async def emit(
+    conversation_id: str,
+    event_type: EventType,
+    data: Dict[str, Any],
+    agent_name: Optional[str] = None,
+) -> Dict[str, Any]:
+    """记录并广播一个事件，返回包含sequence的事件行"""
+    row = event_writer.stage(conversation_id, event_type, data, agent_name)
+    # 先广播再等待落库，保证订阅者按sequence顺序收到事件
+    payload = _serialize(row)
+    await event_bus.publish(EVENTS_CHANNEL, conversation_id, payload)
+    await event_writer.flush_if_full(conversation_id)
+    return row
+
+
+async def stream_events(
+    conversation_id: str,
+    after_sequence: int = 0,
+    follow: bool = True,
+    heartbeat_interval: float = settings.WS_HEARTBEAT_INTERVAL,
+    archived: bool = False,
+) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    从after_sequence之后开始，按sequence顺序产出事件
+    先订阅实时频道，再按批次从数据库补齐历史事件，最后切换到实时事件，
+    以sequence去重，保证既不遗漏也不重复。follow为False时补齐后即结束。
+    空闲超过心跳间隔时产出None。已归档（必然已结束）的对话直接从归档读取。
+    订阅因消费过慢被断开、或实时事件之前的空洞在等待后仍未落库时正常结束，
+    不向调用方抛出异常，客户端重连后从最后的sequence继续。
+    """
+    if archived:
+        for payload in await event_archive.read_events(conversation_id, after_sequence):
+            yield payload
+        return
+
+    # 订阅者消费过慢时直接断开，由客户端带上最后的sequence重连补齐
+    subscription = manager.subscribe(conversation_id, SlowConsumerPolicy.DISCONNECT) if follow else None
+    try:
+        last = after_sequence
+        while True:
+            batch = await _read_events(conversation_id, last)
+            for payload in batch:
+                yield payload
+                last = payload["sequence"]
+            if len(batch) < CATCH_UP_BATCH_SIZE:
+                break
+
+        # 本进程缓冲区中尚未落库的事件
+        for row in event_writer.pending(conversation_id, last):
+            yield _serialize(row)
+            last = row["sequence"]
+
+        if subscription is None:
+            return
+
+        while True:
+            try:
+                message = await subscription.get(timeout=heartbeat_interval)
+            except ConnectionAbortedError:
+                # 消费过慢被断开：正常结束流，客户端带上 Last-Event-ID 重连后补齐
+                return
+            if message is None:
+                yield None
+                continue
+            sequence = message.payload["sequence"]
+            if sequence <= last:
+                continue
+            # 订阅建立前已发布、但当时尚未落库的事件，从数据库补齐；
+            # 尚未落库时退避重读，超时仍有空洞则结束流，由客户端带上 Last-Event-ID 重连，绝不跳过
+            delay = GAP_RETRY_DELAY
+            deadline = asyncio.get_running_loop().time() + GAP_MAX_WAIT
+            while sequence > last + 1:
+                batch = await _read_events(conversation_id, last, before_sequence=sequence)
+                filled = 0
+                for payload in batch:
+                    if payload["sequence"] != last + 1:
+                        break
+                    yield payload
+                    last = payload["sequence"]
+                    filled += 1
+                if sequence == last + 1 or filled == CATCH_UP_BATCH_SIZE:
+                    continue
+                if asyncio.get_running_loop().time() >= deadline:
+                    return
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, GAP_MAX_WAIT)
+            yield message.payload
+            last = sequence
+    finally:
+        if subscription is not None:
+            manager.unsubscribe(subscription)
+
+
+async def _read_events(
+    conversation_id: str,
+    after_sequence: int,
+    before_sequence: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """一次索引范围读取，使用短生命周期的会话，不在长连接期间占用数据库连接"""
+    query = select(Event).where(
+        Event.conversation_id == conversation_id,
+        Event.sequence > after_sequence,
+    )
+    if before_sequence is not None:
+        query = query.where(Event.sequence < before_sequence)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(query.order_by(Event.sequence).limit(CATCH_UP_BATCH_SIZE))
+        return [_serialize(event) for event in result.scalars().all()]
+
+
+def _serialize(event) -> Dict[str, Any]:
+    return EventResponse.model_validate(event).model_dump(mode="json")
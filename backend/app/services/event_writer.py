@@ -0,0 +1,184 @@
+"""
+事件批量写入服务
+
+Team运行时产生的事件（尤其是AgentMessageChunk流式分片）先按对话缓冲在内存中，
+达到数量阈值或时间阈值时以一条多行INSERT批量落库。
+sequence由内存中的每对话计数器分配，无需 SELECT MAX(sequence)。
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from backend.app.core.config import settings
+from backend.app.core.database import AsyncSessionLocal
+from backend.app.core.ids import generate_id
+from backend.app.models.event import Event, EventType
+
+logger = logging.getLogger(__name__)
+
+
+class _ConversationBuffer:
+    """单个对话的事件缓冲区"""
+
+    __slots__ = ("rows", "next_sequence", "lock")
+
+    def __init__(self, next_sequence: int):
+        self.rows: List[Dict[str, Any]] = []
+        self.next_sequence = next_sequence
+        self.lock = asyncio.Lock()
+
+
+class EventWriter:
+    """按对话缓冲事件并批量写入 events 表"""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        batch_size: int = settings.EVENT_BATCH_SIZE,
+        flush_interval: float = settings.EVENT_FLUSH_INTERVAL,
+    ):
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffers: Dict[str, _ConversationBuffer] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self.rows_written = 0
+
+    async def start(self) -> None:
+        """启动定时刷新任务"""
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def close(self) -> None:
+        """停止定时刷新并落盘所有缓冲事件（应用关闭时调用）"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush_all()
+
+    def open_conversation(self, conversation_id: str, last_sequence: int = 0) -> None:
+        """
+        登记对话的sequence起点
+        新对话从1开始；恢复已有对话时由调用方传入已知的最后一个sequence
+        """
+        if conversation_id not in self._buffers:
+            self._buffers[conversation_id] = _ConversationBuffer(last_sequence + 1)
+
+    async def append(
+        self,
+        conversation_id: str,
+        event_type: EventType,
+        data: Dict[str, Any],
+        agent_name: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        追加一个事件并分配sequence，返回待写入的行
+        缓冲达到batch_size时立即刷新，对生产者形成自然背压
+        """
+        row = self.stage(conversation_id, event_type, data, agent_name)
+        await self.flush_if_full(conversation_id)
+        return row
+
+    def stage(
+        self,
+        conversation_id: str,
+        event_type: EventType,
+        data: Dict[str, Any],
+        agent_name: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """同步地分配sequence并放入缓冲区，不触发写入"""
+        buffer = self._buffers.get(conversation_id)
+        if buffer is None:
+            self.open_conversation(conversation_id)
+            buffer = self._buffers[conversation_id]
+
+        row = {
+            "id": generate_id(),
+            "conversation_id": conversation_id,
+            "event_type": event_type,
+            "timestamp": datetime.now(timezone.utc),
+            "agent_name": agent_name,
+            "data": data,
+            "sequence": buffer.next_sequence,
+        }
+        buffer.next_sequence += 1
+        buffer.rows.append(row)
+        return row
+
+    async def flush_if_full(self, conversation_id: str) -> None:
+        """缓冲达到batch_size时立即刷新"""
+        buffer = self._buffers.get(conversation_id)
+        if buffer is not None and len(buffer.rows) >= self.batch_size:
+            await self.flush(conversation_id)
+
+    async def flush(self, conversation_id: str) -> int:
+        """将指定对话的缓冲事件写入数据库，返回写入行数"""
+        buffer = self._buffers.get(conversation_id)
+        if buffer is None:
+            return 0
+
+        async with buffer.lock:
+            rows, buffer.rows = buffer.rows, []
+            if not rows:
+                return 0
+            try:
+                await self._write(rows)
+            except Exception:
+                # 写入失败时放回缓冲区头部，保证sequence顺序不乱
+                buffer.rows[:0] = rows
+                raise
+            self.rows_written += len(rows)
+            return len(rows)
+
+    async def flush_all(self) -> int:
+        """刷新所有对话的缓冲事件"""
+        written = 0
+        for conversation_id in list(self._buffers):
+            try:
+                written += await self.flush(conversation_id)
+            except Exception:
+                logger.exception("刷新对话 %s 的事件失败", conversation_id)
+        return written
+
+    async def close_conversation(self, conversation_id: str) -> None:
+        """对话结束（完成、失败或取消）时调用：落盘剩余事件并释放计数器"""
+        await self.flush(conversation_id)
+        self._buffers.pop(conversation_id, None)
+
+    def discard(self, conversation_id: str) -> None:
+        """丢弃对话的缓冲事件（对话被删除时调用）"""
+        self._buffers.pop(conversation_id, None)
+
+    def pending(self, conversation_id: str, after_sequence: int = 0) -> List[Dict[str, Any]]:
+        """返回尚未落库、sequence大于after_sequence的缓冲事件"""
+        buffer = self._buffers.get(conversation_id)
+        if buffer is None:
+            return []
+        return [row for row in buffer.rows if row["sequence"] > after_sequence]
+
+    @property
+    def buffered_count(self) -> int:
+        """当前所有对话缓冲中的事件总数"""
+        return sum(len(buffer.rows) for buffer in self._buffers.values())
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> None:
+        """以单条多行INSERT写入一批事件"""
+        async with self._session_factory() as session:
+            await session.execute(insert(Event).values(rows))
+            await session.commit()
+
+    async def _flush_periodically(self) -> None:
+        """按时间阈值定期刷新"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_all()
+
+
+event_writer = EventWriter()
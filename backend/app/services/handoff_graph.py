@@ -0,0 +1,277 @@
+"""
+Handoff关系图索引
+
+Agent.handoffs 以Agent名称列表存储在JSON列中，校验Team或Agent配置时需要按名称查找其他Agent。
+启动时只读取一次 agents 表的 id / name / handoffs 三列建立索引，之后随Agent的创建、修改、删除增量更新，
+经事件总线同步到所有worker。校验只访问索引：
+- Team校验：入口Agent可达性、handoff循环、指向不存在或Team外Agent的handoff，耗时与Team规模成线性
+- Agent校验：handoff目标是否存在、是否指向自身、是否与其他Agent构成循环
+事件总线消息可能丢失（连接中断、未接入总线的进程），因此Team成员和直接handoff目标在每次校验时
+以一次 IN 查询与数据库核对并刷新索引，不会读全表；更深层的循环检测只使用索引。
+"""
+import logging
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import or_, select
+
+from backend.app.core.database import AsyncSessionLocal
+from backend.app.models.agent import Agent
+from backend.app.services.event_bus import event_bus
+
+logger = logging.getLogger(__name__)
+
+HANDOFF_GRAPH_CHANNEL = "handoff_graph"
+
+
+class _Node:
+    __slots__ = ("id", "name", "handoffs")
+
+    def __init__(self, id: str, name: str, handoffs: Optional[List[str]]):
+        self.id = id
+        self.name = name
+        self.handoffs: Tuple[str, ...] = tuple(handoffs or ())
+
+
+class HandoffGraph:
+    """Agent ID / 名称 -> handoff目标 的内存索引"""
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self._session_factory = session_factory
+        self._by_id: Dict[str, _Node] = {}
+        self._by_name: Dict[str, _Node] = {}
+
+    async def start(self) -> None:
+        """读取全部Agent建立索引（仅启动时执行一次）"""
+        async with self._session_factory() as session:
+            result = await session.execute(select(Agent.id, Agent.name, Agent.handoffs))
+            for id, name, handoffs in result:
+                self._apply(_Node(id, name, handoffs))
+        logger.info("Handoff关系图索引已加载 %d 个Agent", len(self._by_id))
+
+    async def agent_saved(self, agent: Agent) -> None:
+        """Agent创建或修改提交后调用，通知所有进程更新索引"""
+        await event_bus.publish(
+            HANDOFF_GRAPH_CHANNEL, agent.id, {"name": agent.name, "handoffs": list(agent.handoffs or [])}
+        )
+
+    async def agent_deleted(self, agent_id: str) -> None:
+        """Agent删除提交后调用"""
+        await event_bus.publish(HANDOFF_GRAPH_CHANNEL, agent_id, {"deleted": True})
+
+    def handle_message(self, key: str, message: Dict[str, Any]) -> None:
+        """事件总线处理函数"""
+        if message.get("deleted"):
+            self._remove(key)
+        else:
+            self._apply(_Node(key, message["name"], message.get("handoffs")))
+
+    async def validate_team(self, agent_ids: List[str], entry_agent: str) -> Dict[str, Any]:
+        """校验Team配置：Agent存在性、入口Agent、handoff是否在Team内、循环与可达性"""
+        report = _Report()
+        await self._refresh(ids=agent_ids)
+
+        nodes: List[_Node] = []
+        seen: Set[str] = set()
+        for agent_id in agent_ids:
+            if agent_id in seen:
+                report.warnings.append(f"Agent ID '{agent_id}' 重复")
+                continue
+            seen.add(agent_id)
+            node = self._by_id.get(agent_id)
+            if node is None:
+                report.errors.append(f"Agent ID '{agent_id}' 不存在")
+            else:
+                nodes.append(node)
+
+        if entry_agent not in seen:
+            report.errors.append("入口Agent必须在Team的Agent列表中")
+
+        members = {node.name: node for node in nodes}
+        outside = [name for node in nodes for name in node.handoffs if name not in members]
+        await self._refresh(names=outside)
+
+        # Team内的邻接表，指向Team外的handoff单独记录
+        edges: Dict[str, List[str]] = {}
+        for node in nodes:
+            targets = []
+            for name in node.handoffs:
+                if name in members:
+                    targets.append(name)
+                elif name in self._by_name:
+                    report.warnings.append(f"{node.name} → {name}：目标Agent不在Team内，运行时将被忽略")
+                else:
+                    report.dangling.setdefault(node.name, []).append(name)
+                    report.errors.append(f"{node.name} → {name}：目标Agent不存在")
+            edges[node.name] = targets
+
+        entry = self._by_id.get(entry_agent)
+        if entry is not None and entry.name in members:
+            reachable = _reachable(entry.name, edges)
+            report.unreachable = [node.name for node in nodes if node.name not in reachable]
+            for name in report.unreachable:
+                report.warnings.append(f"{name}：从入口Agent {entry.name} 出发无法到达")
+
+        report.cycles = _cycles([node.name for node in nodes], edges)
+        for cycle in report.cycles:
+            report.warnings.append(f"handoff循环: {' → '.join(cycle + cycle[:1])}")
+        return report.to_dict()
+
+    async def validate_agent(self, name: str, handoffs: List[str], agent_id: Optional[str] = None) -> Dict[str, Any]:
+        """校验单个Agent的handoffs：目标存在性、指向自身，以及与现有Agent构成的循环"""
+        report = _Report()
+        await self._refresh(names=handoffs)
+
+        targets: List[str] = []
+        for target in dict.fromkeys(handoffs):
+            if target == name:
+                report.warnings.append(f"{name} → {name}：handoff指向自身")
+                report.cycles.append([name])
+            elif target not in self._by_name or self._by_name[target].id == agent_id:
+                # 按旧名称指向自身（改名中）也视为不存在
+                report.dangling.setdefault(name, []).append(target)
+                report.errors.append(f"{name} → {target}：目标Agent不存在")
+            else:
+                targets.append(target)
+        if len(handoffs) != len(set(handoffs)):
+            report.warnings.append("handoffs中存在重复的Agent")
+
+        cycle = self._find_path_back(name, targets, agent_id)
+        if cycle is not None:
+            report.cycles.append(cycle)
+            report.warnings.append(f"handoff循环: {' → '.join(cycle + cycle[:1])}")
+        return report.to_dict()
+
+    def _find_path_back(self, name: str, targets: List[str], agent_id: Optional[str]) -> Optional[List[str]]:
+        """从targets出发沿索引中的handoff广度优先搜索，找到回到name的最短路径"""
+        parents: Dict[str, Optional[str]] = {target: None for target in targets}
+        frontier = list(targets)
+        while frontier:
+            next_frontier = []
+            for current in frontier:
+                node = self._by_name.get(current)
+                if node is None or node.id == agent_id:
+                    continue
+                for target in node.handoffs:
+                    if target == name:
+                        path = [current]
+                        while parents[path[-1]] is not None:
+                            path.append(parents[path[-1]])
+                        return [name] + path[::-1]
+                    if target not in parents:
+                        parents[target] = current
+                        next_frontier.append(target)
+            frontier = next_frontier
+        return None
+
+    async def _refresh(self, ids: Iterable[str] = (), names: Iterable[str] = ()) -> None:
+        """按ID或名称从数据库重新读取这些Agent并更新索引，数据库中已不存在的从索引移除"""
+        ids = set(ids)
+        names = set(names)
+        conditions = []
+        if ids:
+            conditions.append(Agent.id.in_(ids))
+        if names:
+            conditions.append(Agent.name.in_(names))
+        if not conditions:
+            return
+        async with self._session_factory() as session:
+            result = await session.execute(select(Agent.id, Agent.name, Agent.handoffs).where(or_(*conditions)))
+            rows = result.all()
+        for id, name, handoffs in rows:
+            self._apply(_Node(id, name, handoffs))
+        found_ids = {row.id for row in rows}
+        found_names = {row.name for row in rows}
+        for id in ids - found_ids:
+            self._remove(id)
+        for name in names - found_names:
+            node = self._by_name.get(name)
+            if node is not None:
+                self._remove(node.id)
+
+    def _apply(self, node: _Node) -> None:
+        self._remove(node.id)
+        self._by_id[node.id] = node
+        self._by_name[node.name] = node
+
+    def _remove(self, agent_id: str) -> None:
+        node = self._by_id.pop(agent_id, None)
+        if node is not None and self._by_name.get(node.name) is node:
+            del self._by_name[node.name]
+
+
+class _Report:
+    def __init__(self):
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+        self.cycles: List[List[str]] = []
+        self.unreachable: List[str] = []
+        self.dangling: Dict[str, List[str]] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "valid": not self.errors,
+            "errors": self.errors,
+            "warnings": self.warnings,
+            "cycles": self.cycles,
+            "unreachable": self.unreachable,
+            "dangling": self.dangling,
+        }
+
+
+def _reachable(start: str, edges: Dict[str, List[str]]) -> Set[str]:
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        for target in edges[queue.popleft()]:
+            if target not in seen:
+                seen.add(target)
+                queue.append(target)
+    return seen
+
+
+def _cycles(names: List[str], edges: Dict[str, List[str]]) -> List[List[str]]:
+    """Tarjan强连通分量（迭代实现），返回每个含循环的分量（多于一个Agent或存在自环）"""
+    index: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    cycles: List[List[str]] = []
+    order = {name: i for i, name in enumerate(names)}
+
+    for root in names:
+        if root in index:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, i = work.pop()
+            if i == 0:
+                index[node] = lowlink[node] = len(index)
+                stack.append(node)
+                on_stack.add(node)
+            targets = edges[node]
+            if i < len(targets):
+                work.append((node, i + 1))
+                target = targets[i]
+                if target not in index:
+                    work.append((target, 0))
+                elif target in on_stack:
+                    lowlink[node] = min(lowlink[node], index[target])
+                continue
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in targets:
+                    cycles.append(sorted(component, key=order.__getitem__))
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+    return cycles
+
+
+handoff_graph = HandoffGraph()
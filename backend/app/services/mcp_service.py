@@ -0,0 +1,429 @@
+"""
+MCP 客户端管理
+
+按 mcps.json 为每个MCP服务器维护一个长连接会话（StreamableHttp：JSON-RPC over HTTP POST）：
+- 每个服务器一个 httpx 连接池，keep-alive 复用TCP/TLS连接，会话只在启动或过期时握手一次
+- 每个服务器一个信号量限制并发调用数，连接池大小与之相同
+- 连接失败时按指数退避重连并重新握手
+- 连续失败达到阈值后熔断，熔断期间直接拒绝调用，到期后放行一次试探调用
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from backend.app.core.config import settings
+from backend.app.services.tool_cache import tool_result_cache
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = "2025-03-26"
+SESSION_HEADER = "Mcp-Session-Id"
+CLIENT_INFO = {"name": "agentput", "version": "0.1.0"}
+
+_ENV_PATTERN = re.compile(r"\$\{(\w+)\}")
+
+
+class MCPError(Exception):
+    """MCP调用失败"""
+
+
+class MCPServerUnavailable(MCPError):
+    """MCP服务器不可用（未配置、连接失败或已熔断）"""
+
+
+class MCPToolError(MCPError):
+    """MCP服务器返回了JSON-RPC错误"""
+
+    def __init__(self, message: str, code: Optional[int] = None, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class MCPServerConfig:
+    """mcps.json 中的单个服务器配置"""
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.name: str = raw["name"]
+        self.url: str = raw["url"]
+        self.description: Optional[str] = raw.get("description")
+        self.max_concurrency: int = raw.get("maxConcurrency", settings.MCP_MAX_CONCURRENCY)
+        # 可缓存结果的只读工具及其TTL（秒），未列出的工具不缓存
+        self.cache_ttl: Dict[str, float] = dict(raw.get("cacheTtl") or {})
+        headers = {key: _expand_env(value) for key, value in (raw.get("headers") or {}).items()}
+        if raw.get("apiKey"):
+            headers.setdefault("Authorization", f"Bearer {_expand_env(raw['apiKey'])}")
+        self.headers: Dict[str, str] = headers
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MCPServerConfig) and vars(self) == vars(other)
+
+
+def _expand_env(value: str) -> str:
+    """展开配置中的 ${ENV_NAME} 引用"""
+    return _ENV_PATTERN.sub(lambda match: os.environ.get(match.group(1), ""), str(value))
+
+
+def load_server_configs(path: str = settings.MCP_CONFIG_PATH) -> List[MCPServerConfig]:
+    """读取 mcps.json，文件不存在时返回空列表"""
+    config_path = Path(path)
+    if not config_path.exists():
+        logger.warning("MCP配置文件 %s 不存在，未加载任何MCP服务器", path)
+        return []
+    with open(config_path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return [MCPServerConfig(server) for server in raw.get("mcpServers", [])]
+
+
+class CircuitBreaker:
+    """连续失败计数熔断器"""
+
+    def __init__(
+        self,
+        failure_threshold: int = settings.MCP_CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.MCP_CIRCUIT_RESET_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    @property
+    def probing(self) -> bool:
+        """是否有试探调用正在进行"""
+        return self._probing
+
+    def allow(self) -> bool:
+        """是否放行本次调用；半开状态下只放行一次试探调用"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def end_probe(self) -> None:
+        """试探调用未得出结论就结束（如被取消）时调用，熔断器保持半开，下次调用重新试探"""
+        self._probing = False
+
+
+class MCPSession:
+    """单个MCP服务器的长连接会话"""
+
+    def __init__(
+        self,
+        config: MCPServerConfig,
+        timeout: float = settings.MCP_TIMEOUT,
+        max_retries: int = settings.MCP_RECONNECT_MAX_RETRIES,
+        backoff: float = settings.MCP_RECONNECT_BACKOFF,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.config = config
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker()
+        self.session_id: Optional[str] = None
+        self.server_info: Dict[str, Any] = {}
+        self.calls = 0
+        self.errors = 0
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(config.max_concurrency)
+        self._ids = itertools.count(1)
+        self._client = httpx.AsyncClient(
+            headers={"Accept": "application/json, text/event-stream", **config.headers},
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            limits=httpx.Limits(
+                max_connections=config.max_concurrency,
+                max_keepalive_connections=config.max_concurrency,
+            ),
+            transport=transport,
+        )
+
+    @property
+    def name(self) -> str:
+        return self.config.name
+
+    @property
+    def connected(self) -> bool:
+        return self._initialized
+
+    async def close(self) -> None:
+        """结束会话并关闭连接池"""
+        if self.session_id is not None:
+            try:
+                await self._client.delete(self.config.url, headers={SESSION_HEADER: self.session_id})
+            except httpx.HTTPError:
+                pass
+        await self._client.aclose()
+
+    async def drain(self) -> None:
+        """等待进行中的调用全部结束后关闭（配置变更时用于替换旧会话）"""
+        for _ in range(self.config.max_concurrency):
+            await self._semaphore.acquire()
+        await self.close()
+
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        """获取服务器提供的全部工具（自动翻页）"""
+        tools: List[Dict[str, Any]] = []
+        cursor = None
+        while True:
+            result = await self.request("tools/list", {"cursor": cursor} if cursor else {})
+            tools.extend(result.get("tools", []))
+            cursor = result.get("nextCursor")
+            if not cursor:
+                return tools
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """调用工具，返回MCP的 CallToolResult"""
+        return await self.request("tools/call", {"name": tool_name, "arguments": arguments})
+
+    async def request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """发送JSON-RPC请求；连接失败时退避重连，超过重试次数后计入熔断"""
+        if not self.breaker.allow():
+            raise MCPServerUnavailable(f"MCP服务器 {self.name} 已熔断，暂不可用")
+
+        # 半开状态下放行的试探调用：无论以何种方式结束都要结束试探
+        probe = self.breaker.probing
+        try:
+            async with self._semaphore:
+                self.calls += 1
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        await self._ensure_initialized()
+                        result = await self._send(method, params)
+                    except (httpx.TransportError, _SessionExpired) as e:
+                        self._initialized = False
+                        if attempt == self.max_retries:
+                            self.errors += 1
+                            self.breaker.record_failure()
+                            raise MCPServerUnavailable(f"无法连接MCP服务器 {self.name}: {e}") from e
+                        if isinstance(e, _SessionExpired):
+                            # 会话过期只需立即重新握手
+                            continue
+                        delay = self.backoff * (2 ** attempt)
+                        logger.warning("MCP服务器 %s 连接失败，%.1f秒后重连: %s", self.name, delay, e)
+                        await asyncio.sleep(delay)
+                    except httpx.HTTPStatusError as e:
+                        self.errors += 1
+                        if e.response.status_code >= 500:
+                            self.breaker.record_failure()
+                        else:
+                            self.breaker.record_success()
+                        raise MCPError(f"MCP服务器 {self.name} 返回 {e.response.status_code}") from e
+                    except ValueError as e:
+                        # 响应体不是有效的JSON（json.JSONDecodeError），按服务器故障处理
+                        self.errors += 1
+                        self.breaker.record_failure()
+                        raise MCPError(f"MCP服务器 {self.name} 返回了无法解析的响应") from e
+                    except MCPToolError:
+                        # 工具自身的错误说明服务器是健康的
+                        self.errors += 1
+                        self.breaker.record_success()
+                        raise
+                    else:
+                        self.breaker.record_success()
+                        return result
+        except (MCPError, asyncio.CancelledError):
+            raise
+        except Exception:
+            # 未预期的异常同样计入失败
+            self.errors += 1
+            self.breaker.record_failure()
+            raise
+        finally:
+            # 调用方超时或被取消时既不计成功也不计失败，但必须结束试探，否则熔断器再也不会放行调用
+            if probe:
+                self.breaker.end_probe()
+
+    async def _ensure_initialized(self) -> None:
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            self.session_id = None
+            result = await self._send("initialize", {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": CLIENT_INFO,
+            })
+            self.server_info = result.get("serverInfo", {})
+            await self._notify("notifications/initialized")
+            self._initialized = True
+            logger.info("已连接MCP服务器 %s", self.name)
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"MCP-Protocol-Version": PROTOCOL_VERSION}
+        if self.session_id is not None:
+            headers[SESSION_HEADER] = self.session_id
+        return headers
+
+    async def _notify(self, method: str) -> None:
+        response = await self._client.post(
+            self.config.url,
+            json={"jsonrpc": "2.0", "method": method},
+            headers=self._headers(),
+        )
+        response.raise_for_status()
+
+    async def _send(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        request_id = next(self._ids)
+        payload = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        async with self._client.stream("POST", self.config.url, json=payload, headers=self._headers()) as response:
+            if response.status_code == 404 and self.session_id is not None:
+                # 服务器端会话已过期，需要重新握手
+                raise _SessionExpired(f"会话 {self.session_id} 已过期")
+            response.raise_for_status()
+            if SESSION_HEADER in response.headers:
+                self.session_id = response.headers[SESSION_HEADER]
+
+            if response.headers.get("content-type", "").startswith("text/event-stream"):
+                message = await _read_sse_response(response, request_id)
+            else:
+                message = json.loads(await response.aread())
+
+        if "error" in message:
+            error = message["error"]
+            raise MCPToolError(error.get("message", "MCP调用失败"), error.get("code"), error.get("data"))
+        return message.get("result", {})
+
+
+class _SessionExpired(Exception):
+    pass
+
+
+async def _read_sse_response(response: httpx.Response, request_id: int) -> Dict[str, Any]:
+    """从SSE响应流中取出与请求id对应的JSON-RPC响应（忽略服务器推送的通知）"""
+    data_lines: List[str] = []
+    async for line in response.aiter_lines():
+        if line.startswith("data:"):
+            data_lines.append(line[5:].lstrip())
+        elif not line and data_lines:
+            message = json.loads("\n".join(data_lines))
+            data_lines = []
+            if message.get("id") == request_id:
+                return message
+    raise httpx.RemoteProtocolError("SSE响应流在返回结果前结束")
+
+
+class MCPClientManager:
+    """管理所有MCP服务器的会话"""
+
+    def __init__(self, config_path: str = settings.MCP_CONFIG_PATH):
+        self.config_path = config_path
+        self._sessions: Dict[str, MCPSession] = {}
+
+    async def start(self) -> None:
+        """读取配置并并发连接所有服务器；连接失败的服务器在首次调用时重试"""
+        for config in load_server_configs(self.config_path):
+            self._sessions[config.name] = MCPSession(config)
+        await asyncio.gather(*(self._connect(session) for session in self._sessions.values()))
+
+    async def close(self) -> None:
+        sessions = list(self._sessions.values())
+        self._sessions = {}
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+
+    async def reload(self) -> Tuple[Set[str], Set[str]]:
+        """
+        重新读取配置，只替换有变化的服务器，返回 (新增或变更的服务器, 已移除的服务器)
+        旧会话从字典中移除后不再接收新调用，进行中的调用结束后再在后台关闭
+        """
+        configs = {config.name: config for config in load_server_configs(self.config_path)}
+        changed = {
+            name for name, config in configs.items()
+            if name not in self._sessions or self._sessions[name].config != config
+        }
+        removed = set(self._sessions) - set(configs)
+
+        for name in changed | removed:
+            tool_result_cache.invalidate_server(name)
+            old = self._sessions.pop(name, None)
+            if old is not None:
+                asyncio.create_task(old.drain())
+        for name in changed:
+            self._sessions[name] = MCPSession(configs[name])
+        await asyncio.gather(*(self._connect(self._sessions[name]) for name in changed))
+
+        if changed or removed:
+            logger.info("MCP服务器配置已重新加载：新增或变更 %s，移除 %s", sorted(changed), sorted(removed))
+        return changed, removed
+
+    def get_session(self, server_name: str) -> MCPSession:
+        session = self._sessions.get(server_name)
+        if session is None:
+            raise MCPServerUnavailable(f"未配置MCP服务器 {server_name}")
+        return session
+
+    @property
+    def sessions(self) -> List[MCPSession]:
+        return list(self._sessions.values())
+
+    async def list_tools(self, server_name: str) -> List[Dict[str, Any]]:
+        return await self.get_session(server_name).list_tools()
+
+    async def call_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """调用工具；配置了 cacheTtl 的工具经过结果缓存"""
+        session = self.get_session(server_name)
+        ttl = session.config.cache_ttl.get(tool_name)
+        if not ttl:
+            return await session.call_tool(tool_name, arguments)
+        return await tool_result_cache.get_or_call(
+            server_name, tool_name, arguments, ttl,
+            lambda: session.call_tool(tool_name, arguments)
+        )
+
+    def servers_status(self) -> List[Dict[str, Any]]:
+        """各服务器的连接与熔断状态"""
+        return [
+            {
+                "name": session.name,
+                "url": session.config.url,
+                "description": session.config.description,
+                "connected": session.connected,
+                "circuit": session.breaker.state,
+                "calls": session.calls,
+                "errors": session.errors,
+            }
+            for session in self._sessions.values()
+        ]
+
+    async def _connect(self, session: MCPSession) -> None:
+        """启动时只尝试一次握手，不重试，避免拖慢启动"""
+        try:
+            await session._ensure_initialized()
+        except (httpx.HTTPError, MCPError, _SessionExpired, ValueError) as e:
+            logger.warning("连接MCP服务器 %s 失败: %s", session.name, e)
+
+
+mcp_manager = MCPClientManager()
@@ -0,0 +1,121 @@
+"""
+对话回放快照
+
+已结束（completed / failed / cancelled）的对话不会再产生事件，其回放内容只需构建一次：
+完整的回放JSON在构建时直接以gzip压缩存入 replay_snapshots 表，并记录强ETag。
+之后的回放请求直接返回压缩后的字节，不再查询 events 表，也不再经过Pydantic序列化。
+快照仅在对话被删除或事件被压缩时失效；已归档对话的快照从事件归档构建。
+"""
+import hashlib
+import json
+import zlib
+from typing import Optional, Tuple
+
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models.conversation import Conversation, FINISHED_STATUSES
+from backend.app.models.event import Event
+from backend.app.models.replay_snapshot import ReplaySnapshot
+from backend.app.schemas.conversation import ConversationResponse
+from backend.app.schemas.event import EventResponse
+from backend.app.services.event_archive import event_archive
+
+# 构建快照时每次读取的事件数
+REPLAY_BATCH_SIZE = 1000
+
+
+async def get_etag(db: AsyncSession, conversation_id: str) -> Optional[str]:
+    """只读取快照的ETag，用于条件请求"""
+    result = await db.execute(
+        select(ReplaySnapshot.etag).where(ReplaySnapshot.conversation_id == conversation_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_or_build(db: AsyncSession, conversation: Conversation) -> Tuple[str, bytes]:
+    """
+    返回 (ETag, gzip压缩的回放JSON)
+    已结束的对话优先读取快照，没有快照时构建并保存；进行中的对话每次实时构建
+    """
+    finished = conversation.status in FINISHED_STATUSES
+
+    if finished:
+        result = await db.execute(
+            select(ReplaySnapshot.etag, ReplaySnapshot.content)
+            .where(ReplaySnapshot.conversation_id == conversation.id)
+        )
+        row = result.first()
+        if row is not None:
+            return row.etag, row.content
+
+    etag, content, event_count = await build(db, conversation)
+
+    if finished:
+        db.add(ReplaySnapshot(
+            conversation_id=conversation.id,
+            etag=etag,
+            content=content,
+            event_count=event_count
+        ))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # 并发请求已写入同一快照
+            await db.rollback()
+
+    return etag, content
+
+
+async def build(db: AsyncSession, conversation: Conversation) -> Tuple[str, bytes, int]:
+    """按sequence分批读取事件（已归档的对话读取归档），边序列化边压缩，返回 (ETag, 压缩内容, 事件数)"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    digest = hashlib.sha256()
+    parts = []
+
+    def feed(text: str) -> None:
+        data = text.encode()
+        digest.update(data)
+        parts.append(compressor.compress(data))
+
+    header = ConversationResponse.model_validate(conversation).model_dump(mode="json")
+    feed('{"conversation":' + json.dumps(header, ensure_ascii=False) + ',"events":[')
+
+    event_count = 0
+    if conversation.archived_at is not None:
+        for payload in await event_archive.read_events(conversation.id, db=db):
+            feed(("," if event_count else "") + json.dumps(payload, ensure_ascii=False))
+            event_count += 1
+    else:
+        last_sequence = 0
+        while True:
+            result = await db.execute(
+                select(Event)
+                .where(
+                    Event.conversation_id == conversation.id,
+                    Event.sequence > last_sequence
+                )
+                .order_by(Event.sequence)
+                .limit(REPLAY_BATCH_SIZE)
+            )
+            events = result.scalars().all()
+            for event in events:
+                payload = EventResponse.model_validate(event).model_dump(mode="json")
+                feed(("," if event_count else "") + json.dumps(payload, ensure_ascii=False))
+                event_count += 1
+            # 释放已序列化的ORM对象
+            for event in events:
+                db.expunge(event)
+            if len(events) < REPLAY_BATCH_SIZE:
+                break
+            last_sequence = events[-1].sequence
+
+    feed("]}")
+    parts.append(compressor.flush())
+    return f'"{digest.hexdigest()[:32]}"', b"".join(parts), event_count
+
+
+async def invalidate(db: AsyncSession, conversation_id: str) -> None:
+    """删除对话的回放快照（在调用方的事务中执行）"""
+    await db.execute(delete(ReplaySnapshot).where(ReplaySnapshot.conversation_id == conversation_id))
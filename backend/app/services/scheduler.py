@@ -0,0 +1,364 @@
+"""
+Team运行调度
+
+pending 状态的 Conversation 行即是持久化的运行队列，Team运行由独立的worker进程执行
+（python -m backend.worker），API进程只负责入队、取消与查询队列状态。
+
+- worker以限时租约领取对话：条件UPDATE把 pending（或租约已过期的 running）对话改为 running
+  并写入 lease_owner / lease_expires_at，多个worker之间无需额外的锁
+- 运行期间worker按心跳间隔续约；worker崩溃或失联后租约过期，对话被其他worker重新领取
+- 每个worker有自己的并发上限，每个用户的并发上限按所有worker合计
+  （多个worker同时领取时可能短暂超出一个名额）
+- 同优先级先到先得（主键为时间有序ID），priority越大越先执行
+- 队列长度上限形成背压，超过时拒绝新的运行请求
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.config import settings
+from backend.app.core.database import AsyncSessionLocal
+from backend.app.models.conversation import Conversation, ConversationStatus
+from backend.app.models.event import Event
+from backend.app.services.compaction import compaction_service
+from backend.app.services.event_writer import event_writer
+
+logger = logging.getLogger(__name__)
+
+Runner = Callable[[str], Awaitable[None]]
+
+# 统计排队等待时间时参考的最近开始运行的对话数
+WAIT_TIME_SAMPLE_SIZE = 200
+
+
+class SchedulerFull(Exception):
+    """运行队列已满"""
+
+
+async def check_capacity(db: AsyncSession, user_id: str) -> None:
+    """队列已满时抛出 SchedulerFull"""
+    result = await db.execute(
+        select(func.count()).where(Conversation.status == ConversationStatus.PENDING)
+    )
+    if result.scalar_one() >= settings.RUN_QUEUE_LIMIT:
+        raise SchedulerFull("运行队列已满，请稍后再试")
+
+    result = await db.execute(
+        select(func.count()).where(
+            Conversation.user_id == user_id,
+            Conversation.status == ConversationStatus.PENDING
+        )
+    )
+    if result.scalar_one() >= settings.RUN_QUEUE_LIMIT_PER_USER:
+        raise SchedulerFull("排队中的对话过多，请等待已有对话运行后再试")
+
+
+async def get_stats(db: AsyncSession, user_id: str) -> dict:
+    """队列深度、运行数与排队等待时间"""
+    active = [ConversationStatus.PENDING, ConversationStatus.RUNNING]
+
+    result = await db.execute(
+        select(Conversation.status, func.count(), func.min(Conversation.created_at))
+        .where(Conversation.status.in_(active))
+        .group_by(Conversation.status)
+    )
+    counts = {}
+    oldest_pending = None
+    for row_status, count, oldest in result.all():
+        counts[row_status] = count
+        if row_status == ConversationStatus.PENDING:
+            oldest_pending = oldest
+
+    result = await db.execute(
+        select(Conversation.status, func.count())
+        .where(Conversation.user_id == user_id, Conversation.status.in_(active))
+        .group_by(Conversation.status)
+    )
+    user_counts = dict(result.all())
+
+    result = await db.execute(
+        select(Conversation.created_at, Conversation.started_at)
+        .where(Conversation.started_at.is_not(None))
+        .order_by(Conversation.id.desc())
+        .limit(WAIT_TIME_SAMPLE_SIZE)
+    )
+    waits = sorted(
+        max((_as_utc(started) - _as_utc(created)).total_seconds(), 0.0)
+        for created, started in result.all()
+    )
+
+    now = datetime.now(timezone.utc)
+    return {
+        "queue_depth": counts.get(ConversationStatus.PENDING, 0),
+        "running": counts.get(ConversationStatus.RUNNING, 0),
+        "max_concurrency": settings.RUN_MAX_CONCURRENCY,
+        "max_per_user": settings.RUN_MAX_PER_USER,
+        "oldest_wait_seconds": round((now - _as_utc(oldest_pending)).total_seconds(), 3) if oldest_pending else 0.0,
+        "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+        "p95_wait_seconds": round(waits[max(int(len(waits) * 0.95) - 1, 0)], 3) if waits else 0.0,
+        "user_queued": user_counts.get(ConversationStatus.PENDING, 0),
+        "user_running": user_counts.get(ConversationStatus.RUNNING, 0),
+    }
+
+
+def _as_utc(value: datetime) -> datetime:
+    """数据库返回的时间可能不带时区，统一按UTC处理"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class RunScheduler:
+    """worker进程内的调度器：领取对话、续约租约并执行Team运行"""
+
+    def __init__(
+        self,
+        runner: Runner,
+        max_concurrency: int = settings.RUN_MAX_CONCURRENCY,
+        max_per_user: int = settings.RUN_MAX_PER_USER,
+        lease_seconds: float = settings.RUN_LEASE_SECONDS,
+        heartbeat_interval: float = settings.RUN_HEARTBEAT_INTERVAL,
+        poll_interval: float = settings.RUN_POLL_INTERVAL,
+        max_attempts: int = settings.RUN_MAX_ATTEMPTS,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.runner = runner
+        self.max_concurrency = max_concurrency
+        self.max_per_user = max_per_user
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"[:64]
+        self._session_factory = session_factory
+        self._running: Dict[str, asyncio.Task] = {}
+        # 租约已失效（对话被删除或被其他worker接手）的运行，其事件不再落库
+        self._lost: Set[str] = set()
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running_count(self) -> int:
+        return len(self._running)
+
+    async def start(self) -> None:
+        """启动领取循环与心跳循环"""
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._claim_loop()),
+            asyncio.create_task(self._heartbeat_loop()),
+        ]
+        logger.info("运行worker已启动: %s", self.worker_id)
+
+    async def close(self) -> None:
+        """停止领取新对话，并把运行中的对话释放回队列"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        running = list(self._running.values())
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    async def claim(self) -> Optional[str]:
+        """领取一个可运行的对话，返回其ID；没有可领取的对话时返回None"""
+        now = datetime.now(timezone.utc)
+        busy_users = (
+            select(Conversation.user_id)
+            .where(
+                Conversation.status == ConversationStatus.RUNNING,
+                Conversation.lease_expires_at > now
+            )
+            .group_by(Conversation.user_id)
+            .having(func.count() >= self.max_per_user)
+        )
+        claimable = or_(
+            Conversation.status == ConversationStatus.PENDING,
+            and_(
+                Conversation.status == ConversationStatus.RUNNING,
+                Conversation.lease_expires_at < now
+            ),
+        )
+
+        async with self._session_factory() as session:
+            result = await session.execute(
+                select(Conversation.id, Conversation.attempts)
+                .where(claimable, Conversation.user_id.not_in(busy_users))
+                .order_by(Conversation.priority.desc(), Conversation.id)
+                .limit(10)
+            )
+            candidates = result.all()
+
+            for conversation_id, attempts in candidates:
+                if attempts >= self.max_attempts:
+                    # 多次领取后仍未完成（通常是运行中worker反复崩溃），不再重试
+                    await session.execute(
+                        update(Conversation)
+                        .where(Conversation.id == conversation_id, claimable)
+                        .values(
+                            status=ConversationStatus.FAILED,
+                            completed_at=now,
+                            lease_owner=None,
+                            lease_expires_at=None
+                        )
+                    )
+                    await session.commit()
+                    logger.warning("对话 %s 已被领取 %d 次仍未完成，标记为失败", conversation_id, attempts)
+                    continue
+
+                result = await session.execute(
+                    update(Conversation)
+                    .where(Conversation.id == conversation_id, claimable)
+                    .values(
+                        status=ConversationStatus.RUNNING,
+                        started_at=func.coalesce(Conversation.started_at, now),
+                        attempts=Conversation.attempts + 1,
+                        lease_owner=self.worker_id,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds)
+                    )
+                )
+                await session.commit()
+                if result.rowcount == 1:
+                    return conversation_id
+        return None
+
+    async def renew_leases(self) -> None:
+        """为运行中的对话续约；对话被取消、删除或被其他worker接手时停止本地运行"""
+        ids = list(self._running)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
+        async with self._session_factory() as session:
+            await session.execute(
+                update(Conversation)
+                .where(
+                    Conversation.id.in_(ids),
+                    Conversation.lease_owner == self.worker_id,
+                    Conversation.status == ConversationStatus.RUNNING
+                )
+                .values(lease_expires_at=expires_at)
+            )
+            await session.commit()
+            result = await session.execute(
+                select(Conversation.id, Conversation.status, Conversation.lease_owner)
+                .where(Conversation.id.in_(ids))
+            )
+            rows = {row.id: row for row in result.all()}
+
+        for conversation_id in ids:
+            row = rows.get(conversation_id)
+            if row is not None and row.lease_owner == self.worker_id and row.status == ConversationStatus.RUNNING:
+                continue
+            task = self._running.get(conversation_id)
+            if task is None:
+                continue
+            if row is None or row.lease_owner != self.worker_id:
+                logger.warning("对话 %s 的运行租约已失效，停止本地运行", conversation_id)
+                self._lost.add(conversation_id)
+            task.cancel()
+
+    async def _claim_loop(self) -> None:
+        while True:
+            claimed = None
+            if len(self._running) < self.max_concurrency:
+                try:
+                    claimed = await self.claim()
+                except Exception:
+                    logger.exception("领取对话失败")
+            if claimed is not None:
+                await self._launch(claimed)
+                continue
+
+            # 没有可领取的对话或并发已满：等到轮询间隔结束或有运行结束
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self._running:
+                continue
+            try:
+                await self.renew_leases()
+            except Exception:
+                logger.exception("续约运行租约失败")
+
+    async def _launch(self, conversation_id: str) -> None:
+        # 重新领取的对话可能已有上一次运行的事件，sequence从已落库的最大值继续
+        async with self._session_factory() as session:
+            result = await session.execute(
+                select(func.max(Event.sequence)).where(Event.conversation_id == conversation_id)
+            )
+            last_sequence = result.scalar_one() or 0
+        event_writer.open_conversation(conversation_id, last_sequence)
+        self._running[conversation_id] = asyncio.create_task(self._execute(conversation_id))
+
+    async def _execute(self, conversation_id: str) -> None:
+        status = ConversationStatus.COMPLETED
+        try:
+            await self.runner(conversation_id)
+        except asyncio.CancelledError:
+            status = None if self._stopping else ConversationStatus.CANCELLED
+        except Exception:
+            logger.exception("对话 %s 运行失败", conversation_id)
+            status = ConversationStatus.FAILED
+
+        try:
+            if conversation_id in self._lost:
+                event_writer.discard(conversation_id)
+            else:
+                await event_writer.close_conversation(conversation_id)
+                await self._release(conversation_id, status)
+        except Exception:
+            logger.exception("结束对话 %s 失败", conversation_id)
+        finally:
+            self._lost.discard(conversation_id)
+            self._running.pop(conversation_id, None)
+            self._wakeup.set()
+
+        if status == ConversationStatus.COMPLETED:
+            compaction_service.schedule(conversation_id)
+
+    async def _release(self, conversation_id: str, status: Optional[ConversationStatus]) -> None:
+        """
+        释放租约并记录运行结果
+        status为None表示worker正在关闭，对话退回队列由其他worker继续运行；
+        对话已被取消时只清除租约
+        """
+        values = {"lease_owner": None, "lease_expires_at": None}
+        if status is None:
+            # 主动退回队列不计入领取次数
+            values["status"] = ConversationStatus.PENDING
+            values["attempts"] = Conversation.attempts - 1
+        else:
+            values["status"] = status
+            values["completed_at"] = datetime.now(timezone.utc)
+
+        async with self._session_factory() as session:
+            await session.execute(
+                update(Conversation)
+                .where(
+                    Conversation.id == conversation_id,
+                    Conversation.lease_owner == self.worker_id,
+                    Conversation.status == ConversationStatus.RUNNING
+                )
+                .values(**values)
+            )
+            await session.execute(
+                update(Conversation)
+                .where(Conversation.id == conversation_id, Conversation.lease_owner == self.worker_id)
+                .values(lease_owner=None, lease_expires_at=None)
+            )
+            await session.commit()
@@ -0,0 +1,209 @@
+"""
+Team运行时缓存
+
+启动一次运行需要读取 Team、逐个读取其 Agent、把 handoffs 解析为Team内的Agent名。
+这些结果只在Team或其Agent被修改时才会变化，因此按Team缓存编译结果：
+- 命中时不访问数据库、不重新解析；同一Team的并发未命中只加载一次
+- agents.py / teams.py 在修改、删除后通过事件总线通知所有进程失效相关Team（Agent按反向索引找到所在Team）
+- 加载期间收到的失效通知会使本次加载结果不写入缓存，避免修改前读到的结果在TTL内一直生效
+- 缓存项同时带有TTL，作为未接入事件总线的进程的兜底
+
+Swarm 和 AssistantAgent 持有单次运行的对话状态，不能在运行之间共享，
+因此缓存的是编译后的只读描述，每次运行由 build_swarm 以其为输入创建新的实例（不再访问数据库）。
+工具只缓存名称，由 build_swarm 在每次运行时从工具目录解析，MCP配置重新加载后的运行即使用新的工具条目。
+
+worker通过 RUN_RUNNER 配置的外部运行函数执行对话，运行函数应以对话的 team_id 调用
+team_runtime_cache.get 取得编译结果，再调用 build_swarm 创建本次运行的 Swarm。
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Set
+
+from sqlalchemy import select
+
+from backend.app.core.config import settings
+from backend.app.core.database import AsyncSessionLocal
+from backend.app.models.agent import Agent
+from backend.app.models.team import Team
+from backend.app.services.event_bus import event_bus
+from backend.app.services.tool_catalog import ToolEntry, tool_catalog
+
+logger = logging.getLogger(__name__)
+
+TEAM_RUNTIME_CHANNEL = "team_runtime"
+
+
+class TeamRuntimeError(Exception):
+    """Team配置无法编译为运行时（Team或Agent已不存在）"""
+
+
+class CompiledAgent:
+    """编译后的Agent：handoffs只保留Team内的Agent名，tools为工具名（运行时再从工具目录解析）"""
+
+    __slots__ = ("id", "name", "system_message", "handoffs", "tools")
+
+    def __init__(self, agent: Agent, team_agent_names: Set[str]):
+        self.id: str = agent.id
+        self.name: str = agent.name
+        self.system_message: str = agent.system_message
+        self.handoffs: List[str] = [name for name in (agent.handoffs or []) if name in team_agent_names]
+        self.tools: List[str] = list(agent.tools or [])
+
+    def resolve_tools(self) -> List[ToolEntry]:
+        """从当前的工具目录解析工具，不在目录中的工具跳过"""
+        tools = []
+        for tool_name in self.tools:
+            tool = tool_catalog.get(tool_name)
+            if tool is None:
+                logger.warning("Agent %s 的工具 %s 不在工具目录中，本次运行不可用", self.name, tool_name)
+            else:
+                tools.append(tool)
+        return tools
+
+
+class CompiledTeam:
+    """编译后的Team，agents中入口Agent排在第一位（Swarm由第一个参与者接收任务）"""
+
+    __slots__ = ("team_id", "name", "agents")
+
+    def __init__(self, team: Team, agents: List[CompiledAgent]):
+        self.team_id: str = team.id
+        self.name: str = team.name
+        self.agents = agents
+
+    @property
+    def agent_ids(self) -> Set[str]:
+        return {agent.id for agent in self.agents}
+
+
+class _CachedTeam:
+    __slots__ = ("compiled", "expires_at")
+
+    def __init__(self, compiled: CompiledTeam, expires_at: float):
+        self.compiled = compiled
+        self.expires_at = expires_at
+
+
+class TeamRuntimeCache:
+    """按Team缓存编译后的运行时描述"""
+
+    def __init__(self, ttl: float = settings.TEAM_RUNTIME_CACHE_TTL, session_factory=AsyncSessionLocal):
+        self.ttl = ttl
+        self._session_factory = session_factory
+        self._teams: Dict[str, _CachedTeam] = {}
+        self._teams_by_agent: Dict[str, Set[str]] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        # 每次失效递增；加载开始后收到过失效通知的结果不写入缓存
+        # （Agent失效时无法得知正在加载的Team是否包含该Agent，因此使用全局计数）
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, team_id: str) -> CompiledTeam:
+        """获取编译后的Team，未命中时从数据库加载"""
+        cached = self._teams.get(team_id)
+        if cached is not None and cached.expires_at > time.monotonic():
+            self.hits += 1
+            return cached.compiled
+
+        task = self._loading.get(team_id)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(team_id))
+            self._loading[team_id] = task
+            task.add_done_callback(lambda done: self._loading_done(team_id, done))
+        return await asyncio.shield(task)
+
+    async def invalidate_team(self, team_id: str) -> None:
+        """通知所有进程失效该Team（Team被修改或删除后调用）"""
+        await event_bus.publish(TEAM_RUNTIME_CHANNEL, team_id, {"kind": "team"})
+
+    async def invalidate_agent(self, agent_id: str) -> None:
+        """通知所有进程失效包含该Agent的Team（Agent被修改或删除后调用）"""
+        await event_bus.publish(TEAM_RUNTIME_CHANNEL, agent_id, {"kind": "agent"})
+
+    def handle_invalidation(self, key: str, message: Dict[str, Any]) -> None:
+        """事件总线处理函数"""
+        self._generation += 1
+        # 进行中的加载可能已读到修改前的数据，之后的调用重新加载
+        self._loading.clear()
+        if message.get("kind") == "agent":
+            for team_id in list(self._teams_by_agent.get(key, ())):
+                self._evict(team_id)
+        else:
+            self._evict(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {"teams": len(self._teams), "hits": self.hits, "misses": self.misses}
+
+    async def _load(self, team_id: str) -> CompiledTeam:
+        generation = self._generation
+        async with self._session_factory() as session:
+            result = await session.execute(select(Team).where(Team.id == team_id))
+            team = result.scalar_one_or_none()
+            if team is None:
+                raise TeamRuntimeError(f"Team {team_id} 不存在")
+
+            result = await session.execute(select(Agent).where(Agent.id.in_(team.agents or [])))
+            agents = {agent.id: agent for agent in result.scalars()}
+
+        missing = [agent_id for agent_id in team.agents if agent_id not in agents]
+        if missing or team.entry_agent not in agents:
+            raise TeamRuntimeError(f"Team {team.name} 引用了不存在的Agent: {', '.join(missing or [team.entry_agent])}")
+
+        ordered = [team.entry_agent] + [agent_id for agent_id in team.agents if agent_id != team.entry_agent]
+        names = {agent.name for agent in agents.values()}
+        compiled_agents = [CompiledAgent(agents[agent_id], names) for agent_id in ordered]
+        compiled = CompiledTeam(team, compiled_agents)
+        if self._generation != generation:
+            return compiled
+
+        self._evict(team_id)
+        self._teams[team_id] = _CachedTeam(compiled, time.monotonic() + self.ttl)
+        for agent_id in compiled.agent_ids:
+            self._teams_by_agent.setdefault(agent_id, set()).add(team_id)
+        return compiled
+
+    def _loading_done(self, team_id: str, task: asyncio.Task) -> None:
+        # 失效后可能已有新的加载任务，只移除自己
+        if self._loading.get(team_id) is task:
+            del self._loading[team_id]
+
+    def _evict(self, team_id: str) -> None:
+        cached = self._teams.pop(team_id, None)
+        if cached is None:
+            return
+        for agent_id in cached.compiled.agent_ids:
+            team_ids = self._teams_by_agent.get(agent_id)
+            if team_ids is not None:
+                team_ids.discard(team_id)
+                if not team_ids:
+                    del self._teams_by_agent[agent_id]
+
+
+def build_swarm(compiled: CompiledTeam, model_client: Any, make_tool: Callable[[ToolEntry], Any]):
+    """
+    以编译后的Team创建一次运行所需的 autogen Swarm（每次运行创建新实例）
+    工具按名称从当前的工具目录解析，make_tool 负责把工具目录条目包装为 autogen 工具
+    """
+    try:
+        from autogen_agentchat.agents import AssistantAgent
+        from autogen_agentchat.teams import Swarm
+    except ImportError as e:
+        raise TeamRuntimeError("运行Team需要安装 autogen-agentchat") from e
+
+    participants = [
+        AssistantAgent(
+            name=agent.name,
+            model_client=model_client,
+            system_message=agent.system_message,
+            handoffs=agent.handoffs,
+            tools=[make_tool(tool) for tool in agent.resolve_tools()],
+        )
+        for agent in compiled.agents
+    ]
+    return Swarm(participants)
+
+
+team_runtime_cache = TeamRuntimeCache()
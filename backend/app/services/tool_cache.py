@@ -0,0 +1,173 @@
+"""
+MCP 工具结果缓存
+
+只缓存在 mcps.json 中显式声明为可缓存的只读工具（服务器配置的 cacheTtl：{"工具名": 秒数}）：
+- 缓存键为 (服务器, 工具名, 规范化后的参数JSON)，参数中键的顺序不影响命中
+- 每个工具独立的TTL；总内存超过上限时按LRU淘汰
+- 相同参数的并发调用只向MCP服务器发出一次请求，其余调用等待同一结果
+- 返回 isError 的结果和调用异常不会被缓存
+- 按工具统计命中、未命中次数以及命中节省的调用时间
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from backend.app.core.config import settings
+
+CacheKey = Tuple[str, str, str]
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value: Dict[str, Any], size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class _ToolStats:
+    __slots__ = ("hits", "misses", "shared", "call_seconds")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # 等待同一进行中调用的次数
+        self.call_seconds = 0.0  # 未命中时实际调用的累计耗时
+
+    @property
+    def avg_call_seconds(self) -> float:
+        return self.call_seconds / self.misses if self.misses else 0.0
+
+
+class ToolResultCache:
+    """带TTL、内存上限和单飞去重的工具结果缓存"""
+
+    def __init__(self, max_bytes: int = settings.TOOL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 4
+        self.total_bytes = 0
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+        self._stats: Dict[Tuple[str, str], _ToolStats] = {}
+        # 服务器 -> 失效代数：配置变更前发出、变更后才返回的调用结果不写入缓存
+        self._generations: Dict[str, int] = {}
+
+    @staticmethod
+    def make_key(server: str, tool_name: str, arguments: Dict[str, Any]) -> CacheKey:
+        normalized = json.dumps(arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return server, tool_name, normalized
+
+    async def get_or_call(
+        self,
+        server: str,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        ttl: float,
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """命中则直接返回缓存结果，否则调用call并缓存"""
+        key = self.make_key(server, tool_name, arguments)
+        stats = self._stats.setdefault((server, tool_name), _ToolStats())
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                stats.hits += 1
+                return entry.value
+            self._evict(key)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            stats.shared += 1
+            return await asyncio.shield(task)
+
+        # 调用放在独立任务中执行，发起方被取消时其他等待者仍能拿到结果
+        stats.misses += 1
+        generation = self._generations.get(server, 0)
+        task = asyncio.ensure_future(self._call_and_store(key, stats, ttl, call, generation))
+        task.add_done_callback(_retrieve_exception)
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    def invalidate_server(self, server: str) -> None:
+        """清除某个服务器的全部缓存（服务器配置变更时调用），进行中的调用不再被新调用共享，结果也不写入缓存"""
+        self._generations[server] = self._generations.get(server, 0) + 1
+        for key in [key for key in self._entries if key[0] == server]:
+            self._evict(key)
+        for key in [key for key in self._inflight if key[0] == server]:
+            del self._inflight[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存总体占用与按工具的命中统计"""
+        tools = []
+        for (server, tool_name), stats in sorted(self._stats.items()):
+            requests = stats.hits + stats.misses + stats.shared
+            tools.append({
+                "server": server,
+                "tool": tool_name,
+                "hits": stats.hits,
+                "misses": stats.misses,
+                "shared": stats.shared,
+                "hit_rate": round((stats.hits + stats.shared) / requests, 4) if requests else 0.0,
+                "avg_call_seconds": round(stats.avg_call_seconds, 4),
+                "saved_seconds": round((stats.hits + stats.shared) * stats.avg_call_seconds, 3),
+            })
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "tools": tools,
+        }
+
+    async def _call_and_store(
+        self,
+        key: CacheKey,
+        stats: _ToolStats,
+        ttl: float,
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+        generation: int,
+    ) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            value = await call()
+        finally:
+            # 服务器失效后同一键可能已有新的调用，只移除自己
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+        stats.call_seconds += time.perf_counter() - start
+        if not value.get("isError") and self._generations.get(key[0], 0) == generation:
+            self._store(key, value, ttl)
+        return value
+
+    def _store(self, key: CacheKey, value: Dict[str, Any], ttl: float) -> None:
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode())
+        if size > self.max_entry_bytes:
+            return
+        if key in self._entries:
+            self._evict(key)
+        self._entries[key] = _Entry(value, size, time.monotonic() + ttl)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    """没有等待者时避免 "exception was never retrieved" 警告"""
+    if not task.cancelled():
+        task.exception()
+
+
+tool_result_cache = ToolResultCache()
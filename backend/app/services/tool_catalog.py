@@ -0,0 +1,196 @@
+"""
+MCP 工具目录
+
+启动时向所有MCP服务器发现一次工具，结果缓存在内存中，参数JSON Schema只编译一次：
+- 查询工具、校验 Agent.tools 都是字典查找，不访问MCP服务器
+- 后台定时检查 mcps.json 的修改时间，变化时只重新发现新增或变更的服务器
+- 某个服务器发现失败时保留其上一次的工具，不影响其他服务器；从未发现成功的服务器在每次检查时重试
+- 同名工具出现在多个服务器上时，以 "服务器名.工具名" 区分，最先提供该工具的服务器保留不带前缀的名称
+- 有已配置的服务器尚未发现成功（或未配置任何服务器）时，目录不完整，不据此拒绝Agent的工具
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from jsonschema import Draft202012Validator
+from jsonschema.exceptions import SchemaError
+
+from backend.app.core.config import settings
+from backend.app.services.mcp_service import MCPClientManager, MCPError, mcp_manager
+
+logger = logging.getLogger(__name__)
+
+
+class ToolEntry:
+    """目录中的单个工具"""
+
+    __slots__ = ("name", "server", "tool_name", "description", "input_schema", "validator")
+
+    def __init__(self, server: str, raw: Dict[str, Any]):
+        self.server = server
+        self.tool_name: str = raw["name"]
+        self.name = self.tool_name
+        self.description: Optional[str] = raw.get("description")
+        self.input_schema: Dict[str, Any] = raw.get("inputSchema") or {"type": "object"}
+        try:
+            self.validator: Optional[Draft202012Validator] = Draft202012Validator(self.input_schema)
+        except SchemaError:
+            logger.warning("工具 %s/%s 的参数schema无效，调用时不校验参数", server, self.tool_name)
+            self.validator = None
+
+    def renamed(self, name: str) -> "ToolEntry":
+        """返回使用另一个对外名称的副本（共享已编译的schema），已发布的条目不做修改"""
+        entry = ToolEntry.__new__(ToolEntry)
+        for slot in self.__slots__:
+            setattr(entry, slot, getattr(self, slot))
+        entry.name = name
+        return entry
+
+    def validate_arguments(self, arguments: Dict[str, Any]) -> List[str]:
+        """按编译好的schema校验参数，返回错误信息列表"""
+        if self.validator is None:
+            return []
+        return [error.message for error in self.validator.iter_errors(arguments)]
+
+
+class ToolCatalog:
+    """按服务器缓存工具，并维护对外暴露的工具名索引"""
+
+    def __init__(
+        self,
+        manager: MCPClientManager = mcp_manager,
+        poll_interval: float = settings.MCP_CONFIG_POLL_INTERVAL,
+    ):
+        self.manager = manager
+        self.poll_interval = poll_interval
+        self._by_server: Dict[str, List[ToolEntry]] = {}
+        self._by_name: Dict[str, ToolEntry] = {}
+        self._config_mtime: Optional[float] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self._reload_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        """发现所有服务器的工具并开始监视配置文件"""
+        self._config_mtime = self._read_mtime()
+        await self.refresh(session.name for session in self.manager.sessions)
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch_config())
+
+    async def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    async def reload(self) -> None:
+        """重新读取配置并重新发现所有服务器的工具（POST /api/tools/servers/reload）"""
+        async with self._reload_lock:
+            self._config_mtime = self._read_mtime()
+            _, removed = await self.manager.reload()
+            self._remove_servers(removed)
+            await self.refresh(session.name for session in self.manager.sessions)
+
+    async def refresh(self, server_names: Iterable[str]) -> None:
+        """重新发现指定服务器的工具"""
+        names = list(server_names)
+        results = await asyncio.gather(
+            *(self.manager.list_tools(name) for name in names),
+            return_exceptions=True
+        )
+        for name, result in zip(names, results):
+            if isinstance(result, MCPError):
+                logger.warning("发现MCP服务器 %s 的工具失败，保留已有工具: %s", name, result)
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            self._by_server[name] = [ToolEntry(name, raw) for raw in result]
+        self._rebuild_index()
+
+    def list_tools(self) -> List[ToolEntry]:
+        # 索引中带前缀的别名与不带前缀的名称指向同一条目
+        entries = {id(entry): entry for entry in self._by_name.values()}
+        return sorted(entries.values(), key=lambda entry: entry.name)
+
+    def get(self, name: str) -> Optional[ToolEntry]:
+        return self._by_name.get(name)
+
+    @property
+    def complete(self) -> bool:
+        """已配置服务器且每个服务器都至少发现成功过一次；否则无法断定某个工具名不存在"""
+        sessions = self.manager.sessions
+        return bool(sessions) and all(session.name in self._by_server for session in sessions)
+
+    def unknown_tools(self, names: Iterable[str]) -> List[str]:
+        """返回目录中不存在的工具名；目录不完整时不拒绝任何工具"""
+        if not self.complete:
+            return []
+        return [name for name in names if name not in self._by_name]
+
+    def tool_count(self, server_name: str) -> int:
+        return len(self._by_server.get(server_name, ()))
+
+    def _remove_servers(self, server_names: Iterable[str]) -> None:
+        for name in server_names:
+            self._by_server.pop(name, None)
+        self._rebuild_index()
+
+    def _rebuild_index(self) -> None:
+        """
+        重建工具名索引，重名工具用 "服务器名.工具名" 区分
+        最先提供该工具的服务器（按发现顺序）保留不带前缀的名称并增加带前缀的别名，
+        后加入的服务器上线同名工具时，已保存不带前缀名称的Agent不受影响
+        """
+        owners: Dict[str, str] = {}
+        counts: Dict[str, int] = {}
+        for server, entries in self._by_server.items():
+            for entry in entries:
+                owners.setdefault(entry.tool_name, server)
+                counts[entry.tool_name] = counts.get(entry.tool_name, 0) + 1
+
+        index: Dict[str, ToolEntry] = {}
+        for server, entries in self._by_server.items():
+            for entry in entries:
+                if counts[entry.tool_name] == 1:
+                    index[entry.tool_name] = entry
+                    continue
+                qualified = f"{server}.{entry.tool_name}"
+                if owners[entry.tool_name] == server:
+                    index[entry.tool_name] = entry
+                    index[qualified] = entry
+                else:
+                    index[qualified] = entry.renamed(qualified)
+        # 整体替换，读取方不会看到构建到一半的索引
+        self._by_name = index
+
+    def _read_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.manager.config_path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    async def _watch_config(self) -> None:
+        """配置文件变化时，只重新发现新增或变更的服务器；从未发现成功的服务器每次检查都重试"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                async with self._reload_lock:
+                    mtime = self._read_mtime()
+                    if mtime != self._config_mtime:
+                        self._config_mtime = mtime
+                        changed, removed = await self.manager.reload()
+                        self._remove_servers(removed)
+                        await self.refresh(changed)
+                    pending = [
+                        session.name for session in self.manager.sessions if session.name not in self._by_server
+                    ]
+                    if pending:
+                        await self.refresh(pending)
+            except Exception:
+                logger.exception("重新加载MCP配置失败")
+
+
+tool_catalog = ToolCatalog()
@@ -0,0 +1,363 @@
+"""
+对话与Team的导入导出（NDJSON）
+
+导出文件每行一条记录 {"type": ..., "data": ...}：首行为 header，随后是一条 conversation 及其全部 event，
+或一条 team 及其全部 agent。导出时事件经服务端游标按批取回、逐批写出，
+已归档的对话边解压边写出；导入时逐行解析请求体，事件按批批量INSERT。
+两个方向的内存占用都只与单批记录相当，与对话的事件数无关。
+
+导入时重新生成所有ID并改写记录间的引用（事件的conversation_id、Team的agents与entry_agent），
+可以导入到另一个环境，也可以在同一环境中导入副本。
+"""
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type, TypeVar
+
+import orjson
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.config import settings
+from backend.app.core.database import utcnow
+from backend.app.core.ids import generate_id
+from backend.app.core.sql import is_unique_violation
+from backend.app.models.agent import Agent
+from backend.app.models.conversation import Conversation, ConversationStatus, FINISHED_STATUSES
+from backend.app.models.event import Event
+from backend.app.models.team import Team
+from backend.app.schemas.transfer import (
+    AgentRecord,
+    ConversationImportResponse,
+    ConversationRecord,
+    EventRecord,
+    TeamImportResponse,
+    TeamRecord,
+)
+from backend.app.services.compaction import compaction_service
+from backend.app.services.event_archive import event_archive
+from backend.app.services.handoff_graph import handoff_graph
+from backend.app.services.tool_catalog import tool_catalog
+
+MEDIA_TYPE = "application/x-ndjson"
+FORMAT_VERSION = 1
+
+CONVERSATION_COLUMNS = (
+    Conversation.id,
+    Conversation.team_id,
+    Conversation.task,
+    Conversation.status,
+    Conversation.priority,
+    Conversation.created_at,
+    Conversation.started_at,
+    Conversation.completed_at,
+    Conversation.compacted_at,
+    Conversation.archived_at,
+)
+
+# 与 EventResponse 以及归档中的事件字段相同
+EVENT_COLUMNS = (
+    Event.id,
+    Event.conversation_id,
+    Event.event_type,
+    Event.timestamp,
+    Event.agent_name,
+    Event.data,
+    Event.sequence,
+)
+
+TEAM_COLUMNS = (Team.id, Team.name, Team.description, Team.agents, Team.entry_agent)
+
+AGENT_COLUMNS = (Agent.id, Agent.name, Agent.system_message, Agent.handoffs, Agent.tools)
+
+RecordModel = TypeVar("RecordModel", bound=BaseModel)
+
+
+class InvalidImport(ValueError):
+    """导入文件格式错误或与目标环境冲突"""
+
+
+def _line(record_type: str, data: Dict[str, Any]) -> bytes:
+    return orjson.dumps({"type": record_type, "data": data}) + b"\n"
+
+
+def _header(kind: str) -> bytes:
+    return orjson.dumps({"type": "header", "kind": kind, "version": FORMAT_VERSION, "exported_at": utcnow()}) + b"\n"
+
+
+async def export_conversation(session_factory, conversation_id: str) -> AsyncIterator[bytes]:
+    """
+    逐批产出对话的NDJSON导出内容
+    对话与事件在同一个会话（同一事务快照）中读取，导出过程中对话被归档也不会读到不一致的数据
+    """
+    async with session_factory() as session:
+        result = await session.execute(select(*CONVERSATION_COLUMNS).where(Conversation.id == conversation_id))
+        conversation = result.first()
+        if conversation is None:
+            return
+        data = conversation._asdict()
+        archived = data.pop("archived_at") is not None
+        yield _header("conversation") + _line("conversation", data)
+
+        if archived:
+            batch = []
+            async for event in event_archive.iter_events(conversation_id, db=session):
+                batch.append(_line("event", event))
+                if len(batch) >= settings.TRANSFER_BATCH_SIZE:
+                    yield b"".join(batch)
+                    batch = []
+            if batch:
+                yield b"".join(batch)
+            return
+
+        # 服务端游标：每次只从数据库取回一批行
+        result = await session.stream(
+            select(*EVENT_COLUMNS)
+            .where(Event.conversation_id == conversation_id)
+            .order_by(Event.sequence)
+            .execution_options(yield_per=settings.TRANSFER_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield b"".join(_line("event", row._asdict()) for row in rows)
+
+
+async def export_team(session_factory, team_id: str) -> AsyncIterator[bytes]:
+    """产出Team及其Agent的NDJSON导出内容，Agent按Team中的顺序排列（已删除的Agent不导出）"""
+    async with session_factory() as session:
+        result = await session.execute(select(*TEAM_COLUMNS).where(Team.id == team_id))
+        team = result.first()
+        if team is None:
+            return
+        agent_ids = list(team.agents or [])
+        result = await session.execute(select(*AGENT_COLUMNS).where(Agent.id.in_(agent_ids)))
+        agents = {row.id: row for row in result.all()}
+
+    yield _header("team") + _line("team", team._asdict()) + b"".join(
+        _line("agent", agents[agent_id]._asdict()) for agent_id in agent_ids if agent_id in agents
+    )
+
+
+async def iter_records(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int = settings.TRANSFER_MAX_LINE_BYTES,
+) -> AsyncIterator[Tuple[int, str, Dict[str, Any]]]:
+    """逐行解析NDJSON请求体，产出 (行号, 记录类型, data)；缓冲区最多保存一行未结束的记录"""
+    buffer = bytearray()
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                break
+            line_number += 1
+            record = _parse_line(buffer[start:end], line_number)
+            if record is not None:
+                yield record
+            start = end + 1
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            raise InvalidImport(f"第{line_number + 1}行超过 {max_line_bytes} 字节")
+
+    record = _parse_line(buffer, line_number + 1)
+    if record is not None:
+        yield record
+
+
+def _parse_line(line: bytes, line_number: int) -> Optional[Tuple[int, str, Dict[str, Any]]]:
+    if not line.strip():
+        return None
+    try:
+        record = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        raise InvalidImport(f"第{line_number}行不是有效的JSON")
+    if not isinstance(record, dict) or not isinstance(record.get("type"), str):
+        raise InvalidImport(f"第{line_number}行缺少记录类型")
+    if record["type"] == "header":
+        return line_number, "header", record
+    if not isinstance(record.get("data"), dict):
+        raise InvalidImport(f"第{line_number}行缺少data")
+    return line_number, record["type"], record["data"]
+
+
+def _validate(model: Type[RecordModel], data: Dict[str, Any], line_number: int) -> RecordModel:
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        error = e.errors()[0]
+        field = ".".join(str(part) for part in error["loc"])
+        raise InvalidImport(f"第{line_number}行 {field}: {error['msg']}")
+
+
+async def _read_header(records: AsyncIterator[Tuple[int, str, Dict[str, Any]]], kind: str) -> None:
+    line_number, record_type, header = await _next(records, "header")
+    if record_type != "header" or header.get("kind") != kind:
+        raise InvalidImport(f"第{line_number}行应为{kind}导出文件的header")
+    version = header.get("version")
+    if not isinstance(version, int) or version > FORMAT_VERSION:
+        raise InvalidImport(f"不支持的导出格式版本: {version}")
+
+
+async def _next(records: AsyncIterator[Tuple[int, str, Dict[str, Any]]], expected: str) -> Tuple[int, str, Dict[str, Any]]:
+    try:
+        return await records.__anext__()
+    except StopAsyncIteration:
+        raise InvalidImport(f"导入文件缺少{expected}记录")
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """带时区的时间转为UTC，与 utcnow 写入的时间一致"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+async def import_conversation(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    user_id: str,
+    team_id: Optional[str] = None,
+    batch_size: int = settings.TRANSFER_BATCH_SIZE,
+) -> ConversationImportResponse:
+    """
+    导入对话及其事件并提交，对话归属于当前用户、关联到 team_id（默认为导出时的Team）
+    未结束的对话导入为已取消，不会进入运行队列；事件保留原sequence，每 batch_size 条执行一次批量INSERT
+    """
+    records = iter_records(chunks)
+    await _read_header(records, "conversation")
+    line_number, record_type, data = await _next(records, "conversation")
+    if record_type != "conversation":
+        raise InvalidImport(f"第{line_number}行应为conversation记录")
+    record = _validate(ConversationRecord, data, line_number)
+
+    team_id = team_id or record.team_id
+    result = await db.execute(select(Team.id).where(Team.id == team_id))
+    if result.first() is None:
+        raise InvalidImport(f"Team '{team_id}' 不存在，请通过team_id参数指定导入后所属的Team")
+
+    status, completed_at = record.status, _naive_utc(record.completed_at)
+    if status not in FINISHED_STATUSES:
+        status, completed_at = ConversationStatus.CANCELLED, completed_at or utcnow()
+
+    conversation = Conversation(
+        user_id=user_id,
+        team_id=team_id,
+        task=record.task,
+        status=status,
+        priority=record.priority,
+        started_at=_naive_utc(record.started_at),
+        completed_at=completed_at,
+        compacted_at=_naive_utc(record.compacted_at),
+        created_at=_naive_utc(record.created_at) or utcnow(),
+    )
+    db.add(conversation)
+    await db.flush()
+
+    now = utcnow()
+    batch: List[Dict[str, Any]] = []
+    count = 0
+    last_sequence = 0
+    async for line_number, record_type, data in records:
+        if record_type != "event":
+            raise InvalidImport(f"第{line_number}行：对话导出文件中不应出现{record_type}记录")
+        event = _validate(EventRecord, data, line_number)
+        if event.sequence <= last_sequence:
+            raise InvalidImport(f"第{line_number}行：事件sequence必须递增")
+        last_sequence = event.sequence
+        batch.append({
+            "id": generate_id(),
+            "conversation_id": conversation.id,
+            "event_type": event.event_type,
+            "timestamp": _naive_utc(event.timestamp) or now,
+            "agent_name": event.agent_name,
+            "data": event.data,
+            "sequence": event.sequence,
+        })
+        if len(batch) >= batch_size:
+            await db.execute(insert(Event), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        await db.execute(insert(Event), batch)
+        count += len(batch)
+
+    await db.commit()
+    if status == ConversationStatus.COMPLETED and conversation.compacted_at is None:
+        compaction_service.schedule(conversation.id)
+
+    return ConversationImportResponse(id=conversation.id, status=status, events=count)
+
+
+async def import_team(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    user_id: str,
+    name_suffix: str = "",
+) -> TeamImportResponse:
+    """
+    导入Team及其Agent并提交，Agent名称加上 name_suffix（在同一环境中导入副本时用于避免重名）
+    Agent之间的handoff按名称引用，随名称一起改写
+    """
+    records = iter_records(chunks)
+    await _read_header(records, "team")
+    line_number, record_type, data = await _next(records, "team")
+    if record_type != "team":
+        raise InvalidImport(f"第{line_number}行应为team记录")
+    team = _validate(TeamRecord, data, line_number)
+
+    agents: List[AgentRecord] = []
+    async for line_number, record_type, data in records:
+        if record_type != "agent":
+            raise InvalidImport(f"第{line_number}行：Team导出文件中不应出现{record_type}记录")
+        agents.append(_validate(AgentRecord, data, line_number))
+
+    id_map = {agent.id: generate_id() for agent in agents}
+    if len(id_map) != len(agents):
+        raise InvalidImport("导入文件中存在重复的Agent ID")
+    if team.entry_agent not in id_map:
+        raise InvalidImport("入口Agent不在导入文件中")
+
+    names = {agent.name: agent.name + name_suffix for agent in agents}
+    too_long = [name for name in names.values() if len(name) > 100]
+    if too_long:
+        raise InvalidImport(f"Agent名称超过100个字符: {', '.join(too_long)}")
+    result = await db.execute(select(Agent.name).where(Agent.name.in_(list(names.values()))))
+    existing = list(result.scalars())
+    if existing:
+        raise InvalidImport(f"Agent名称已存在: {', '.join(existing)}，可通过name_suffix参数为导入的Agent名称加后缀")
+    unknown = tool_catalog.unknown_tools({tool for agent in agents for tool in agent.tools})
+    if unknown:
+        raise InvalidImport(f"未知的工具: {', '.join(sorted(unknown))}")
+
+    db_agents = [
+        Agent(
+            id=id_map[agent.id],
+            name=names[agent.name],
+            system_message=agent.system_message,
+            handoffs=[names.get(name, name) for name in agent.handoffs],
+            tools=agent.tools,
+            created_by=user_id,
+        )
+        for agent in agents
+    ]
+    db_team = Team(
+        name=team.name,
+        description=team.description,
+        # 导出时已删除的Agent不在文件中，导入后也不再引用
+        agents=[id_map[agent_id] for agent_id in team.agents if agent_id in id_map],
+        entry_agent=id_map[team.entry_agent],
+        created_by=user_id,
+    )
+    db.add_all(db_agents)
+    db.add(db_team)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        if not is_unique_violation(e):
+            raise
+        raise InvalidImport("Agent名称已存在")
+
+    for agent in db_agents:
+        await handoff_graph.agent_saved(agent)
+    return TeamImportResponse(id=db_team.id, name=db_team.name, agent_ids=id_map)
@@ -0,0 +1,86 @@
+"""
+worker进程的指标
+
+事件写入、工具结果缓存与MCP调用都发生在运行Team的worker进程中，这些计数器只能在worker内采集，
+由 backend.worker 的 --metrics-port 监听对外提供：
+- /metrics：Prometheus 文本格式
+- /tools/cache/stats：工具结果缓存的占用与各工具命中率（JSON）
+"""
+import json
+from typing import List, Tuple
+
+from backend.app.core.database import engine
+from backend.app.core.metrics import CONTENT_TYPE, Routes, pool_metrics, render_metric
+from backend.app.services.event_writer import event_writer
+from backend.app.services.mcp_service import mcp_manager
+from backend.app.services.scheduler import RunScheduler
+from backend.app.services.tool_cache import tool_result_cache
+
+CIRCUIT_STATES = ("closed", "open", "half_open")
+
+
+def routes(scheduler: RunScheduler) -> Routes:
+    def metrics() -> Tuple[str, bytes]:
+        return CONTENT_TYPE, ("\n".join(render(scheduler)) + "\n").encode()
+
+    def cache_stats() -> Tuple[str, bytes]:
+        return "application/json", json.dumps(tool_result_cache.stats(), ensure_ascii=False).encode()
+
+    return {"/metrics": metrics, "/tools/cache/stats": cache_stats}
+
+
+def render(scheduler: RunScheduler) -> List[str]:
+    lines = pool_metrics(engine.sync_engine.pool)
+    lines += render_metric(
+        "agentput_worker_running_conversations", "gauge", "本worker正在运行的对话数",
+        [({}, scheduler.running_count)],
+    )
+    lines += render_metric(
+        "agentput_events_written_total", "counter", "事件写入器已写入数据库的事件数",
+        [({}, event_writer.rows_written)],
+    )
+    lines += render_metric(
+        "agentput_event_buffer_events", "gauge", "事件写入器缓冲中尚未落盘的事件数",
+        [({}, event_writer.buffered_count)],
+    )
+    lines += _tool_metrics()
+    return lines
+
+
+def _tool_metrics() -> List[str]:
+    """工具结果缓存与MCP服务器状态"""
+    cache = tool_result_cache.stats()
+    lines = render_metric(
+        "agentput_tool_cache_bytes", "gauge", "工具结果缓存占用字节数", [({}, cache["bytes"])]
+    )
+    for name, key, documentation in (
+        ("agentput_tool_cache_hits_total", "hits", "工具结果缓存命中次数"),
+        ("agentput_tool_cache_misses_total", "misses", "工具结果缓存未命中次数"),
+        ("agentput_tool_cache_shared_total", "shared", "等待同一进行中调用的次数"),
+    ):
+        lines += render_metric(
+            name, "counter", documentation,
+            [({"server": tool["server"], "tool": tool["tool"]}, tool[key]) for tool in cache["tools"]],
+        )
+
+    servers = mcp_manager.servers_status()
+    lines += render_metric(
+        "agentput_mcp_server_connected", "gauge", "MCP服务器会话是否已建立",
+        [({"server": server["name"]}, int(server["connected"])) for server in servers],
+    )
+    lines += render_metric(
+        "agentput_mcp_circuit_state", "gauge", "MCP服务器熔断器状态（当前状态为1）",
+        [
+            ({"server": server["name"], "state": state}, int(server["circuit"] == state))
+            for server in servers for state in CIRCUIT_STATES
+        ],
+    )
+    lines += render_metric(
+        "agentput_mcp_calls_total", "counter", "MCP调用次数",
+        [({"server": server["name"]}, server["calls"]) for server in servers],
+    )
+    lines += render_metric(
+        "agentput_mcp_errors_total", "counter", "MCP调用失败次数",
+        [({"server": server["name"]}, server["errors"]) for server in servers],
+    )
+    return lines
@@ -0,0 +1,76 @@
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, status
+from sqlalchemy import select
+from typing import Optional
+from backend.app.core.config import settings
+from backend.app.core.database import AsyncSessionLocal
+from backend.app.core.security import decode_access_token
+from backend.app.models.conversation import Conversation
+from backend.app.websocket.manager import manager, SlowConsumerPolicy
+
+router = APIRouter()
+
+HEARTBEAT_MESSAGE = '{"type":"heartbeat"}'
+
+
+async def _authorize(token: str, conversation_id: str) -> bool:
+    """校验token并确认对话属于当前用户（仅在建立连接时查询一次数据库）"""
+    payload = decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        return False
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Conversation.id).where(
+                Conversation.id == conversation_id,
+                Conversation.user_id == payload["sub"]
+            )
+        )
+        return result.scalar_one_or_none() is not None
+
+
+@router.websocket("/conversations/{conversation_id}")
+async def conversation_events(
+    websocket: WebSocket,
+    conversation_id: str,
+    token: str = Query(...),
+    policy: Optional[SlowConsumerPolicy] = Query(None)
+):
+    """
+    对话实时事件流
+    事件由 ConnectionManager 推送，空闲时按固定间隔发送心跳
+    """
+    if not await _authorize(token, conversation_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = manager.subscribe(conversation_id, policy)
+
+    async def receive_until_disconnect():
+        # 客户端消息仅用于探测断开，断开后关闭订阅以唤醒发送循环
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            subscription.close()
+
+    receiver = asyncio.create_task(receive_until_disconnect())
+    try:
+        while True:
+            message = await subscription.get(timeout=settings.WS_HEARTBEAT_INTERVAL)
+            if message is None:
+                await websocket.send_text(HEARTBEAT_MESSAGE)
+            else:
+                await websocket.send_text(message.text)
+    except ConnectionAbortedError:
+        if not receiver.done():
+            # 消费过慢被断开
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        manager.unsubscribe(subscription)
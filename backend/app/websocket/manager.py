@@ -0,0 +1,192 @@
+"""
+WebSocket 连接管理
+
+每个对话一个发布/订阅频道：事件生产者只发布一次，由 ConnectionManager 分发给该对话的所有订阅者。
+每个订阅者拥有独立的有界队列，队列写满时按慢消费者策略处理，
+发布操作从不等待任何订阅者，因此一个卡顿的浏览器标签页不会拖慢Team运行或其他观看者。
+"""
+import asyncio
+import enum
+import json
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+
+from backend.app.core.config import settings
+from backend.app.models.event import EventType
+
+logger = logging.getLogger(__name__)
+
+
+class SlowConsumerPolicy(str, enum.Enum):
+    DROP_CHUNKS = "drop_chunks"  # 丢弃流式分片，为其他事件腾出空间
+    COALESCE = "coalesce"  # 合并同一Agent的相邻流式分片
+    DISCONNECT = "disconnect"  # 直接断开慢消费者
+
+
+class HubMessage:
+    """待发送的事件，JSON文本只序列化一次后由所有订阅者共享"""
+
+    __slots__ = ("payload", "_text")
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.payload = payload
+        self._text: Optional[str] = None
+
+    @property
+    def is_chunk(self) -> bool:
+        return self.payload.get("event_type") == EventType.AGENT_MESSAGE_CHUNK.value
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self.payload, ensure_ascii=False)
+        return self._text
+
+
+class Subscription:
+    """单个观看者的有界消息队列"""
+
+    def __init__(self, conversation_id: str, max_size: int, policy: SlowConsumerPolicy):
+        self.conversation_id = conversation_id
+        self.max_size = max_size
+        self.policy = policy
+        self.closed = False
+        self.dropped = 0
+        self._queue: Deque[HubMessage] = deque()
+        self._ready = asyncio.Event()
+
+    def offer(self, message: HubMessage) -> None:
+        """非阻塞投递；队列已满时按策略处理"""
+        if self.closed:
+            return
+        if len(self._queue) >= self.max_size and not self._make_room(message):
+            return
+        self._queue.append(message)
+        self._ready.set()
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[HubMessage]:
+        """取出下一条消息；超时返回None，订阅关闭时抛出 ConnectionAbortedError"""
+        while not self._queue or self.closed:
+            if self.closed:
+                raise ConnectionAbortedError("订阅已关闭")
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._queue.popleft()
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def _make_room(self, message: HubMessage) -> bool:
+        """队列满时执行慢消费者策略，返回是否仍需入队该消息"""
+        if self.policy == SlowConsumerPolicy.COALESCE:
+            tail = self._queue[-1]
+            if (
+                message.is_chunk
+                and tail.is_chunk
+                and tail.payload.get("agent_name") == message.payload.get("agent_name")
+            ):
+                self._queue[-1] = _merge_chunks(tail, message)
+                return False
+            if self._coalesce_queued():
+                return True
+        elif self.policy == SlowConsumerPolicy.DROP_CHUNKS:
+            if message.is_chunk:
+                self.dropped += 1
+                return False
+            for index, queued in enumerate(self._queue):
+                if queued.is_chunk:
+                    del self._queue[index]
+                    self.dropped += 1
+                    return True
+
+        # 无法腾出空间，断开该订阅者
+        logger.warning("对话 %s 的订阅者消费过慢，已断开", self.conversation_id)
+        self.close()
+        return False
+
+    def _coalesce_queued(self) -> bool:
+        """合并队列中同一Agent的相邻分片，返回是否腾出了空间"""
+        before = len(self._queue)
+        merged: Deque[HubMessage] = deque()
+        for queued in self._queue:
+            if (
+                merged
+                and queued.is_chunk
+                and merged[-1].is_chunk
+                and merged[-1].payload.get("agent_name") == queued.payload.get("agent_name")
+            ):
+                merged[-1] = _merge_chunks(merged[-1], queued)
+            else:
+                merged.append(queued)
+        self._queue = merged
+        return len(merged) < before
+
+
+def _merge_chunks(first: HubMessage, second: HubMessage) -> HubMessage:
+    """把两条流式分片合并为一条，sequence取后者"""
+    first_data = first.payload.get("data") or {}
+    second_data = second.payload.get("data") or {}
+    data = dict(second_data)
+    data["content"] = str(first_data.get("content", "")) + str(second_data.get("content", ""))
+    data["coalesced_chunks"] = first_data.get("coalesced_chunks", 1) + second_data.get("coalesced_chunks", 1)
+    payload = dict(second.payload)
+    payload["data"] = data
+    return HubMessage(payload)
+
+
+class ConnectionManager:
+    """按对话维护订阅者并分发事件"""
+
+    def __init__(
+        self,
+        queue_size: int = settings.WS_QUEUE_SIZE,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy(settings.WS_SLOW_CONSUMER_POLICY),
+    ):
+        self.queue_size = queue_size
+        self.policy = policy
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, conversation_id: str, policy: Optional[SlowConsumerPolicy] = None) -> Subscription:
+        """订阅对话的实时事件"""
+        subscription = Subscription(conversation_id, self.queue_size, policy or self.policy)
+        self._subscriptions.setdefault(conversation_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """取消订阅"""
+        subscription.close()
+        subscribers = self._subscriptions.get(subscription.conversation_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[subscription.conversation_id]
+
+    def publish(self, conversation_id: str, payload: Dict[str, Any]) -> None:
+        """向对话的所有订阅者广播已序列化为JSON结构的事件（不等待任何订阅者）"""
+        subscribers = self._subscriptions.get(conversation_id)
+        if not subscribers:
+            return
+        message = HubMessage(payload)
+        for subscription in list(subscribers):
+            subscription.offer(message)
+            if subscription.closed:
+                subscribers.discard(subscription)
+        if not subscribers:
+            self._subscriptions.pop(conversation_id, None)
+
+    def subscriber_count(self, conversation_id: Optional[str] = None) -> int:
+        """订阅者数量；不指定对话时返回总数"""
+        if conversation_id is not None:
+            return len(self._subscriptions.get(conversation_id, ()))
+        return sum(len(subscribers) for subscribers in self._subscriptions.values())
+
+
+manager = ConnectionManager()
@@ -1,16 +1,57 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from pathlib import Path
 from backend.app.core.config import settings
-from backend.app.api.endpoints import users, agents, teams, conversations
+from backend.app.core.metrics import MetricsMiddleware
+from backend.app.core.query_stats import DEBUG_HEADERS, QueryStatsMiddleware
+from backend.app.core.security import crypto_executor
+from backend.app.api.endpoints import users, agents, teams, conversations, tools, metrics
+from backend.app.websocket import endpoints as ws
+from backend.app.services.event_writer import event_writer
+from backend.app.services.compaction import compaction_service
+from backend.app.services.auth_cache import AUTH_CACHE_CHANNEL, auth_cache
+from backend.app.services.event_bus import event_bus
+from backend.app.services.event_service import EVENTS_CHANNEL
+from backend.app.services.handoff_graph import HANDOFF_GRAPH_CHANNEL, handoff_graph
+from backend.app.services.mcp_service import mcp_manager
+from backend.app.services.team_runtime import TEAM_RUNTIME_CHANNEL, team_runtime_cache
+from backend.app.services.tool_catalog import tool_catalog
+from backend.app.websocket.manager import manager
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动后台服务，关闭时落盘缓冲中的事件"""
+    event_bus.subscribe(EVENTS_CHANNEL, manager.publish)
+    event_bus.subscribe(TEAM_RUNTIME_CHANNEL, team_runtime_cache.handle_invalidation)
+    event_bus.subscribe(AUTH_CACHE_CHANNEL, auth_cache.handle_invalidation)
+    event_bus.subscribe(HANDOFF_GRAPH_CHANNEL, handoff_graph.handle_message)
+    await event_bus.start()
+    await event_writer.start()
+    # 遗留对话的补做压缩由Team运行worker负责，API进程只处理导入后调度的压缩
+    await compaction_service.start(scan=False)
+    await mcp_manager.start()
+    await tool_catalog.start()
+    await handoff_graph.start()
+    yield
+    await tool_catalog.close()
+    await mcp_manager.close()
+    await compaction_service.close()
+    await event_writer.close()
+    await event_bus.close()
+    crypto_executor.shutdown()
+
 
 # 创建FastAPI应用
 app = FastAPI(
     title="AgentPut API",
     description="多智能体系统（MAS）平台 API",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # 配置CORS
@@ -20,13 +61,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", *DEBUG_HEADERS],
 )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # 注册API路由
 app.include_router(users.router, prefix=f"{settings.API_PREFIX}/users", tags=["users"])
 app.include_router(agents.router, prefix=f"{settings.API_PREFIX}/agents", tags=["agents"])
 app.include_router(teams.router, prefix=f"{settings.API_PREFIX}/teams", tags=["teams"])
 app.include_router(conversations.router, prefix=f"{settings.API_PREFIX}/conversations", tags=["conversations"])
+app.include_router(tools.router, prefix=f"{settings.API_PREFIX}/tools", tags=["tools"])
+app.include_router(ws.router, prefix="/ws", tags=["websocket"])
+app.include_router(metrics.router, tags=["metrics"])
 
 
 @app.get("/health")
@@ -0,0 +1,99 @@
+"""
+Team运行worker进程
+
+从 conversations 表领取待运行的对话并执行，与API进程相互独立，可启动任意多个：
+    uv run python -m backend.worker --concurrency 8 --metrics-port 9101
+worker与API通过unix socket事件总线转发事件和缓存失效消息，因此必须与API部署在同一台机器上，
+且 EVENT_BUS_BACKEND 必须为 unix，否则启动时直接退出。
+收到 SIGTERM / SIGINT 时停止领取，并把运行中的对话退回队列。
+"""
+import argparse
+import asyncio
+import importlib
+import logging
+import signal
+
+from backend.app.core import metrics
+from backend.app.core.config import settings
+from backend.app.services import worker_metrics
+from backend.app.services.compaction import compaction_service
+from backend.app.services.event_archive import event_archive
+from backend.app.services.event_bus import event_bus
+from backend.app.services.event_writer import event_writer
+from backend.app.services.mcp_service import mcp_manager
+from backend.app.services.scheduler import RunScheduler, Runner
+from backend.app.services.team_runtime import TEAM_RUNTIME_CHANNEL, team_runtime_cache
+from backend.app.services.tool_catalog import tool_catalog
+
+logger = logging.getLogger("backend.worker")
+
+
+def load_runner(path: str) -> Runner:
+    """
+    按 module:function 格式导入Team运行函数
+    运行函数以对话ID调用，应通过 team_runtime_cache.get(team_id) 取得编译后的Team，再用 build_swarm 创建本次运行的实例
+    """
+    module_name, _, attr = path.partition(":")
+    if not module_name or not attr:
+        raise SystemExit("未配置Team运行函数，请设置 RUN_RUNNER 或 --runner（格式 module:function）")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+async def run_worker(runner: Runner, concurrency: int, metrics_port: int = 0) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    scheduler = RunScheduler(runner, max_concurrency=concurrency)
+    event_bus.subscribe(TEAM_RUNTIME_CHANNEL, team_runtime_cache.handle_invalidation)
+    await event_bus.start()
+    await event_writer.start()
+    await compaction_service.start()
+    await event_archive.start()
+    await mcp_manager.start()
+    await tool_catalog.start()
+    await scheduler.start()
+    metrics_server = None
+    if metrics_port:
+        metrics_server = await metrics.start_server(
+            worker_metrics.routes(scheduler), settings.WORKER_METRICS_HOST, metrics_port
+        )
+        logger.info("worker指标监听于 %s:%d/metrics", settings.WORKER_METRICS_HOST, metrics_port)
+    try:
+        await stop.wait()
+    finally:
+        logger.info("worker正在退出，运行中的对话将退回队列")
+        if metrics_server is not None:
+            metrics_server.close()
+        await scheduler.close()
+        await tool_catalog.close()
+        await mcp_manager.close()
+        await event_archive.close()
+        await compaction_service.close()
+        await event_writer.close()
+        await event_bus.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AgentPut Team运行worker")
+    parser.add_argument("--runner", default=settings.RUN_RUNNER, help="Team运行函数，格式 module:function")
+    parser.add_argument("--concurrency", type=int, default=settings.RUN_MAX_CONCURRENCY)
+    parser.add_argument(
+        "--metrics-port", type=int, default=settings.WORKER_METRICS_PORT,
+        help="Prometheus指标监听端口（/metrics、/tools/cache/stats），0表示不监听",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if settings.EVENT_BUS_BACKEND != "unix":
+        # memory 总线只在本进程内可见：运行事件到不了SSE订阅者，API的缓存失效也到不了worker
+        raise SystemExit(
+            f"EVENT_BUS_BACKEND={settings.EVENT_BUS_BACKEND}，worker无法与API进程通信；"
+            "请设置 EVENT_BUS_BACKEND=unix，并与API部署在同一台机器上"
+        )
+    asyncio.run(run_worker(load_runner(args.runner), args.concurrency, args.metrics_port))
+
+
+if __name__ == "__main__":
+    main()
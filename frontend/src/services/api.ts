@@ -13,6 +13,10 @@ import type {
   TeamCreate,
   TeamUpdate,
   Conversation,
+  Tool,
+  ToolSchema,
+  MCPServerStatus,
+  ValidationResult,
 } from '@/types'
 
 const api = axios.create({
@@ -56,23 +60,27 @@ export const userAPI = {
 
 // Agent 相关 API
 export const agentAPI = {
-  list: (params?: { skip?: number; limit?: number }) =>
+  list: (params?: { cursor?: string; limit?: number }) =>
     api.get<any, AgentListItem[]>('/agents', { params }),
   get: (id: string) => api.get<any, Agent>(`/agents/${id}`),
   create: (data: AgentCreate) => api.post<any, Agent>('/agents', data),
   update: (id: string, data: AgentUpdate) => api.put<any, Agent>(`/agents/${id}`, data),
   delete: (id: string) => api.delete(`/agents/${id}`),
   getAvailable: () => api.get<any, AgentListItem[]>('/agents/available/list'),
+  validate: (data: { name: string; handoffs: string[]; agent_id?: string }) =>
+    api.post<any, ValidationResult>('/agents/validate', data),
 }
 
 // Team 相关 API
 export const teamAPI = {
-  list: (params?: { skip?: number; limit?: number }) =>
+  list: (params?: { cursor?: string; limit?: number }) =>
     api.get<any, TeamListItem[]>('/teams', { params }),
   get: (id: string) => api.get<any, Team>(`/teams/${id}`),
   create: (data: TeamCreate) => api.post<any, Team>('/teams', data),
   update: (id: string, data: TeamUpdate) => api.put<any, Team>(`/teams/${id}`, data),
   delete: (id: string) => api.delete(`/teams/${id}`),
+  validate: (data: { agents: string[]; entry_agent: string }) =>
+    api.post<any, ValidationResult>('/teams/validate', data),
 }
 
 // Conversation 相关 API
@@ -85,4 +93,12 @@ export const conversationAPI = {
   delete: (id: string) => api.delete(`/conversations/${id}`),
 }
 
+// MCP 工具相关 API
+export const toolAPI = {
+  list: () => api.get<any, Tool[]>('/tools'),
+  getSchema: (name: string) => api.get<any, ToolSchema>(`/tools/${encodeURIComponent(name)}/schema`),
+  servers: () => api.get<any, MCPServerStatus[]>('/tools/servers'),
+  reloadServers: () => api.post<any, MCPServerStatus[]>('/tools/servers/reload'),
+}
+
 export default api
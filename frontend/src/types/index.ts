@@ -68,6 +68,7 @@ export interface Team {
   created_by: string
   created_at: string
   updated_at: string
+  agent_names?: Record<string, string>
 }
 
 export interface TeamListItem {
@@ -93,6 +94,16 @@ export interface TeamUpdate {
   entry_agent?: string
 }
 
+// 配置验证结果（/agents/validate、/teams/validate）
+export interface ValidationResult {
+  valid: boolean
+  errors: string[]
+  warnings: string[]
+  cycles: string[][]
+  unreachable: string[]
+  dangling: Record<string, string[]>
+}
+
 // Conversation 相关类型
 export interface Conversation {
   id: string
@@ -100,7 +111,30 @@ export interface Conversation {
   team_id: string
   task: string
   status: 'pending' | 'running' | 'completed' | 'failed' | 'cancelled'
+  priority?: number
   started_at?: string
   completed_at?: string
   created_at: string
 }
+
+// MCP 工具相关类型
+export interface Tool {
+  name: string
+  server: string
+  description?: string
+}
+
+export interface ToolSchema extends Tool {
+  input_schema: Record<string, any>
+}
+
+export interface MCPServerStatus {
+  name: string
+  url: string
+  description?: string
+  connected: boolean
+  circuit: 'closed' | 'open' | 'half_open'
+  calls: number
+  errors: number
+  tool_count: number
+}
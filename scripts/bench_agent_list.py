@@ -0,0 +1,126 @@
+"""
+Agent列表基准测试
+在包含大量Agent（每个带较长 system_message）的库上，对比 /api/agents/available/list 的两种实现：
+- 旧实现：读取完整Agent行，逐行构造 AgentListResponse，再经响应模型校验后用标准库json序列化
+- 新实现：只查询列表需要的列并在SQL中计算handoffs/tools数量，结果行直接用orjson序列化
+输出每种实现的平均耗时、峰值内存（tracemalloc）和响应体大小。
+
+用法：
+    uv run python scripts/bench_agent_list.py --agents 10000 --system-message-size 4000
+
+注意：脚本会在目标数据库中重建所有表，请勿指向生产库
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from backend.app.core.database import Base
+from backend.app.core.ids import generate_id
+from backend.app.models import Agent
+from backend.app.schemas.agent import AgentListResponse
+from backend.app.api.endpoints.agents import get_available_agents
+
+LIST_ADAPTER = TypeAdapter(List[AgentListResponse])
+
+
+async def prepare(session_factory, count: int, message_size: int) -> None:
+    """批量写入count个Agent"""
+    async with session_factory() as session:
+        batch = []
+        for i in range(count):
+            batch.append({
+                "id": generate_id(),
+                "name": f"agent_{i:06d}",
+                "system_message": "x" * message_size,
+                "handoffs": [f"agent_{(i + 1) % count:06d}", f"agent_{(i + 2) % count:06d}"],
+                "tools": ["search"],
+            })
+            if len(batch) == 1000:
+                await session.execute(insert(Agent).values(batch))
+                batch = []
+        if batch:
+            await session.execute(insert(Agent).values(batch))
+        await session.commit()
+
+
+async def old_implementation(session: AsyncSession) -> bytes:
+    result = await session.execute(select(Agent).order_by(Agent.name))
+    agents = result.scalars().all()
+    response = [
+        AgentListResponse(
+            id=agent.id,
+            name=agent.name,
+            created_by=agent.created_by,
+            created_at=agent.created_at,
+            handoff_count=len(agent.handoffs) if agent.handoffs else 0,
+            tool_count=len(agent.tools) if agent.tools else 0
+        )
+        for agent in agents
+    ]
+    # FastAPI 对 response_model 的二次校验与序列化
+    validated = LIST_ADAPTER.validate_python(response, from_attributes=True)
+    return json.dumps(LIST_ADAPTER.dump_python(validated, mode="json"), ensure_ascii=False).encode()
+
+
+async def new_implementation(session: AsyncSession) -> bytes:
+    response = await get_available_agents(current_user=None, db=session)
+    return response.body
+
+
+async def measure(session_factory, implementation, repeat: int) -> tuple:
+    """返回(平均耗时ms, 峰值内存MB, 响应字节数)"""
+    elapsed = 0.0
+    for _ in range(repeat):
+        async with session_factory() as session:
+            start = time.perf_counter()
+            body = await implementation(session)
+            elapsed += time.perf_counter() - start
+
+    async with session_factory() as session:
+        tracemalloc.start()
+        await implementation(session)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed / repeat * 1000, peak / 1024 / 1024, len(body)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Agent列表基准测试")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///./bench_agent_list.db")
+    parser.add_argument("--agents", type=int, default=10000)
+    parser.add_argument("--system-message-size", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.database_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await prepare(session_factory, args.agents, args.system_message_size)
+
+    print(f"Agent数: {args.agents}  system_message: {args.system_message_size} 字节  重复: {args.repeat}")
+    print(f"{'实现':<8} {'耗时(ms)':>10} {'峰值内存(MB)':>14} {'响应(KB)':>10}")
+    for label, implementation in (("旧实现", old_implementation), ("新实现", new_implementation)):
+        ms, peak_mb, size = await measure(session_factory, implementation, args.repeat)
+        print(f"{label:<8} {ms:>10.1f} {peak_mb:>14.1f} {size / 1024:>10.1f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
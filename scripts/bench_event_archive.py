@@ -0,0 +1,218 @@
+"""
+事件冷归档基准测试
+写入一批已结束的对话（每个对话若干条文本、工具调用与handoff事件），归档其中一半，输出：
+- 归档前后 events 表（含索引）与 event_archives 表占用的存储
+- 热对话与已归档对话（缓存未命中 / 命中）构建完整回放的耗时
+- 热对话与已归档对话读取一页事件（/events 接口的查询）的耗时
+
+用法：
+    uv run python scripts/bench_event_archive.py --conversations 200 --events 300
+
+存储统计支持 SQLite（dbstat）与 MySQL（information_schema）。
+注意：脚本会在目标数据库中重建所有表，请勿指向生产库
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from backend.app.core.database import Base, utcnow
+from backend.app.core.ids import generate_id
+from backend.app.models import Conversation, ConversationStatus, Event, EventType, Team, User
+from backend.app.services import replay_cache
+from backend.app.services.event_archive import EventArchiveService
+
+WORDS = (
+    "agent team task result search query answer report data analysis summary plan step tool call "
+    "retrieve document review draft code test deploy metric latency user request context handoff "
+    "分析 结果 任务 检索 文档 总结 计划 工具 调用 用户 请求 数据 报告 代码 测试"
+).split()
+
+
+def make_event(rng: random.Random, conversation_id: str, sequence: int, timestamp) -> Dict:
+    kind = rng.random()
+    if kind < 0.7:
+        event_type, data = EventType.TEXT_MESSAGE, {"content": " ".join(rng.choices(WORDS, k=rng.randint(20, 120)))}
+    elif kind < 0.85:
+        event_type = EventType.TOOL_CALL_REQUEST
+        data = {"content": [{"id": generate_id(), "name": "search", "arguments": '{"query": "%s"}' % rng.choice(WORDS)}]}
+    elif kind < 0.97:
+        event_type = EventType.TOOL_CALL_EXECUTION
+        data = {"content": [{"call_id": generate_id(), "content": " ".join(rng.choices(WORDS, k=60)), "is_error": False}]}
+    else:
+        event_type, data = EventType.HANDOFF_MESSAGE, {"content": "transfer", "target": rng.choice(["writer", "reviewer"])}
+    return {
+        "id": generate_id(),
+        "conversation_id": conversation_id,
+        "event_type": event_type,
+        "timestamp": timestamp,
+        "agent_name": rng.choice(["planner", "writer", "reviewer"]),
+        "data": data,
+        "sequence": sequence,
+    }
+
+
+async def prepare(session_factory, conversations: int, events: int) -> List[str]:
+    """写入对话与事件：前一半结束于60天前（待归档），后一半结束于1天前"""
+    rng = random.Random(42)
+    now = utcnow()
+    async with session_factory() as session:
+        user_id, team_id = generate_id(), generate_id()
+        session.add(User(id=user_id, name="bench", email="bench@example.com", hashed_password="x"))
+        session.add(Team(id=team_id, name="bench", agents=[], entry_agent="planner"))
+        await session.flush()
+
+        conversation_ids = []
+        for i in range(conversations):
+            finished_at = now - timedelta(days=60 if i < conversations // 2 else 1)
+            conversation_id = generate_id()
+            conversation_ids.append(conversation_id)
+            session.add(Conversation(
+                id=conversation_id,
+                user_id=user_id,
+                team_id=team_id,
+                task="bench",
+                status=ConversationStatus.COMPLETED,
+                completed_at=finished_at,
+                compacted_at=finished_at,
+            ))
+            await session.flush()
+            rows = [make_event(rng, conversation_id, sequence, finished_at) for sequence in range(1, events + 1)]
+            for start in range(0, len(rows), 500):
+                await session.execute(insert(Event).values(rows[start:start + 500]))
+        await session.commit()
+    return conversation_ids
+
+
+async def table_bytes(session: AsyncSession, table: str) -> int:
+    """表与其索引占用的字节数"""
+    if session.bind.dialect.name == "sqlite":
+        result = await session.execute(
+            text("SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = :table OR name IN "
+                 "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table)"),
+            {"table": table},
+        )
+    else:
+        result = await session.execute(
+            text("SELECT data_length + index_length FROM information_schema.tables "
+                 "WHERE table_schema = DATABASE() AND table_name = :table"),
+            {"table": table},
+        )
+    return int(result.scalar() or 0)
+
+
+async def storage(engine, session_factory) -> Dict[str, int]:
+    async with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            await conn.execute(text("VACUUM"))
+        else:
+            await conn.execute(text("ANALYZE TABLE events, event_archives"))
+    async with session_factory() as session:
+        return {table: await table_bytes(session, table) for table in ("events", "event_archives")}
+
+
+async def timed(func, rounds: int) -> float:
+    """返回中位数耗时（毫秒）"""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def megabytes(value: int) -> str:
+    return f"{value / 1024 / 1024:.2f} MB"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="事件冷归档基准测试")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///./bench_event_archive.db")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.database_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    conversation_ids = await prepare(session_factory, args.conversations, args.events)
+    before = await storage(engine, session_factory)
+
+    service = EventArchiveService(session_factory=session_factory, after_days=30)
+    start = time.perf_counter()
+    archived = await service.archive_due(limit=args.conversations)
+    archive_seconds = time.perf_counter() - start
+    after = await storage(engine, session_factory)
+
+    raw = sum(stats["raw_bytes"] for stats in archived)
+    compressed = sum(stats["compressed_bytes"] for stats in archived)
+    freed = before["events"] - after["events"]
+    print(f"对话: {args.conversations}（归档 {len(archived)} 个）  每个对话事件数: {args.events}")
+    print(f"归档耗时: {archive_seconds:.2f}s（{archive_seconds / max(len(archived), 1) * 1000:.1f} ms/对话）")
+    print(f"events 表（含索引）: {megabytes(before['events'])} -> {megabytes(after['events'])}（释放 {megabytes(freed)}）")
+    print(f"event_archives 表: {megabytes(after['event_archives'])}（事件JSON {megabytes(raw)}，gzip后 {megabytes(compressed)}，压缩比 {raw / max(compressed, 1):.1f}x）")
+    print(f"已归档对话的存储: {megabytes(freed)} -> {megabytes(after['event_archives'])}"
+          f"（减少 {(1 - after['event_archives'] / max(freed, 1)) * 100:.1f}%）")
+
+    hot_id, archived_id = conversation_ids[-1], conversation_ids[0]
+    async with session_factory() as session:
+        hot = (await session.execute(select(Conversation).where(Conversation.id == hot_id))).scalar_one()
+        cold = (await session.execute(select(Conversation).where(Conversation.id == archived_id))).scalar_one()
+
+        async def replay_hot():
+            await replay_cache.build(session, hot)
+
+        async def replay_cold():
+            service.discard(archived_id)
+            await replay_cache.build(session, cold)
+
+        async def replay_warm():
+            await replay_cache.build(session, cold)
+
+        async def page_hot():
+            result = await session.execute(
+                select(Event).where(Event.conversation_id == hot_id, Event.sequence > 100)
+                .order_by(Event.sequence).limit(100)
+            )
+            result.scalars().all()
+            session.expunge_all()
+
+        async def page_cold():
+            service.discard(archived_id)
+            await service.read_events(archived_id, 100, 100, db=session)
+
+        async def page_warm():
+            await service.read_events(archived_id, 100, 100, db=session)
+
+        # 回放构建时读取的是本脚本的归档服务实例
+        replay_cache.event_archive = service
+        print(f"完整回放构建（中位数，{args.rounds} 次）:")
+        print(f"  热对话            {await timed(replay_hot, args.rounds):.2f} ms")
+        print(f"  已归档（缓存未命中）{await timed(replay_cold, args.rounds):.2f} ms")
+        print(f"  已归档（缓存命中）  {await timed(replay_warm, args.rounds):.2f} ms")
+        print(f"读取一页100条事件（中位数，{args.rounds} 次）:")
+        print(f"  热对话            {await timed(page_hot, args.rounds):.2f} ms")
+        print(f"  已归档（缓存未命中）{await timed(page_cold, args.rounds):.2f} ms")
+        print(f"  已归档（缓存命中）  {await timed(page_warm, args.rounds):.2f} ms")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""
+事件总线基准测试
+启动 1、4、8 个worker进程，通过 UnixSocketEventBus 互联，由其中一个worker发布事件，
+测量所有worker收到全部事件的吞吐量与端到端延迟，并校验每个worker收到的sequence严格递增
+
+用法：
+    uv run python scripts/bench_event_bus.py --events 20000 --workers 1 4 8
+    uv run python scripts/bench_event_bus.py --events 20000 --rate 5000   # 限速发布，测量稳态延迟
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.services.event_bus import UnixSocketEventBus
+
+CONVERSATION_ID = "bench-conversation"
+
+
+async def run_worker(index: int, socket_path: str, events: int, rate: int, barrier, results) -> None:
+    bus = UnixSocketEventBus(socket_path)
+    latencies = []
+    state = {"last": 0, "ordered": True}
+    done = asyncio.Event()
+
+    def on_event(key: str, message: dict) -> None:
+        latencies.append(time.monotonic() - message["sent_at"])
+        if message["sequence"] != state["last"] + 1:
+            state["ordered"] = False
+        state["last"] = message["sequence"]
+        if message["sequence"] == events:
+            done.set()
+
+    bus.subscribe("events", on_event)
+    await bus.start()
+    # 等待所有worker连接完成
+    await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+
+    start = time.monotonic()
+    if index == 0:
+        for sequence in range(1, events + 1):
+            await bus.publish("events", CONVERSATION_ID, {
+                "sequence": sequence,
+                "event_type": "AgentMessageChunk",
+                "data": {"content": "token "},
+                "sent_at": time.monotonic(),
+            })
+            if rate and sequence % 100 == 0:
+                # 按指定速率分批发布
+                await asyncio.sleep(100 / rate)
+    await asyncio.wait_for(done.wait(), 120)
+    end = time.monotonic()
+
+    results.put({
+        "index": index,
+        "start": start,
+        "end": end,
+        "received": len(latencies),
+        "ordered": state["ordered"],
+        "latencies": latencies if index != 0 else [],
+    })
+    # 等待其他worker收完再断开，避免broker提前退出
+    await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+    await bus.close()
+
+
+def worker_main(index, socket_path, events, rate, barrier, results):
+    asyncio.run(run_worker(index, socket_path, events, rate, barrier, results))
+
+
+def bench(workers: int, events: int, rate: int) -> None:
+    socket_path = os.path.join(tempfile.mkdtemp(), "bus.sock")
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker_main, args=(i, socket_path, events, rate, barrier, results))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get(timeout=180) for _ in range(workers)]
+    for process in processes:
+        process.join()
+
+    elapsed = max(r["end"] for r in reports) - min(r["start"] for r in reports)
+    delivered = sum(r["received"] for r in reports)
+    remote = sorted(t * 1000 for r in reports for t in r["latencies"])
+    ordered = all(r["ordered"] for r in reports) and all(r["received"] == events for r in reports)
+
+    line = f"{workers:>6} {elapsed:>9.2f} {events / elapsed:>12,.0f} {delivered / elapsed:>12,.0f}"
+    if remote:
+        p99 = remote[int(len(remote) * 0.99) - 1]
+        line += f" {statistics.median(remote):>10.2f} {p99:>10.2f}"
+    else:
+        line += f" {'-':>10} {'-':>10}"
+    line += f" {'是' if ordered else '否':>6}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="事件总线基准测试")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--rate", type=int, default=0, help="每秒发布事件数，0表示不限速")
+    args = parser.parse_args()
+
+    print(f"事件数: {args.events}  发布速率: {args.rate or '不限'}")
+    print(f"{'worker':>6} {'耗时(s)':>9} {'发布/秒':>12} {'投递/秒':>12} {'延迟中位ms':>10} {'延迟p99ms':>10} {'有序':>6}")
+    for workers in args.workers:
+        bench(workers, args.events, args.rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+事件分页基准测试
+在一个包含大量事件的对话上，对比 OFFSET 分页与基于 (conversation_id, sequence) 的键集分页在不同页码的耗时
+
+用法：
+    uv run python scripts/bench_event_pagination.py --events 100000 --page-size 100
+
+注意：脚本会在目标数据库中重建所有表，请勿指向生产库
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from backend.app.core.database import Base
+from backend.app.core.ids import generate_id
+from backend.app.models import User, Team, Conversation, Event, EventType
+
+
+async def prepare(session_factory, count: int) -> str:
+    """创建一个对话并批量写入count条事件"""
+    async with session_factory() as session:
+        user = User(name="bench", email="bench@example.com", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        team = Team(name="bench", agents=["a"], entry_agent="a", created_by=user.id)
+        session.add(team)
+        await session.flush()
+        conversation = Conversation(user_id=user.id, team_id=team.id, task="bench")
+        session.add(conversation)
+        await session.commit()
+
+        batch = []
+        for sequence in range(1, count + 1):
+            batch.append({
+                "id": generate_id(),
+                "conversation_id": conversation.id,
+                "event_type": EventType.AGENT_MESSAGE_CHUNK,
+                "agent_name": "writer",
+                "data": {"content": "token "},
+                "sequence": sequence,
+            })
+            if len(batch) == 1000:
+                await session.execute(insert(Event).values(batch))
+                batch = []
+        if batch:
+            await session.execute(insert(Event).values(batch))
+        await session.commit()
+        return conversation.id
+
+
+async def timed(session_factory, query, repeat: int) -> float:
+    """多次执行查询，返回平均耗时（毫秒）"""
+    async with session_factory() as session:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            (await session.execute(query)).scalars().all()
+        return (time.perf_counter() - start) / repeat * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="事件分页基准测试")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///./bench_event_pagination.db")
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.database_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    conversation_id = await prepare(session_factory, args.events)
+    last_page = args.events // args.page_size
+    pages = sorted({1, 10, 100, last_page // 2, last_page})
+
+    print(f"事件数: {args.events}  每页: {args.page_size}")
+    print(f"{'页码':>8} {'OFFSET(ms)':>12} {'键集(ms)':>12}")
+    for page in pages:
+        skip = (page - 1) * args.page_size
+        offset_query = (
+            select(Event)
+            .where(Event.conversation_id == conversation_id)
+            .order_by(Event.sequence)
+            .offset(skip)
+            .limit(args.page_size)
+        )
+        keyset_query = (
+            select(Event)
+            .where(Event.conversation_id == conversation_id, Event.sequence > skip)
+            .order_by(Event.sequence)
+            .limit(args.page_size)
+        )
+        offset_ms = await timed(session_factory, offset_query, args.repeat)
+        keyset_ms = await timed(session_factory, keyset_query, args.repeat)
+        print(f"{page:>8} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
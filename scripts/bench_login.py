@@ -0,0 +1,131 @@
+"""
+登录基准测试
+在本进程的独立线程中启动API服务，并发登录的同时持续请求 /health，对比两种密码运算方式：
+- 在事件循环中同步执行 bcrypt（CRYPTO_WORKERS=0）
+- 在有界线程池中执行（CRYPTO_WORKERS / CRYPTO_QUEUE_LIMIT）
+输出登录吞吐、登录被拒绝（503）次数，以及同一worker上无关请求 /health 的延迟分布。
+
+用法：
+    uv run python scripts/bench_login.py --logins 200 --concurrency 32
+
+注意：脚本会在目标数据库中创建表和一个测试用户，请勿指向生产库
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+import uvicorn
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend.app.core.config import settings
+from backend.app.core.database import Base
+from backend.app.core.security import crypto_executor
+from backend.main import app
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "bench-password"
+
+
+async def create_tables() -> None:
+    engine = create_async_engine(settings.DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+
+def start_server() -> str:
+    """在独立线程中启动API服务，避免与压测客户端争用同一事件循环"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def percentile(ms: list, q: float) -> float:
+    return ms[max(int(len(ms) * q) - 1, 0)]
+
+
+async def run_round(client: httpx.AsyncClient, logins: int, concurrency: int) -> dict:
+    """以固定并发完成logins次登录，期间持续探测 /health"""
+    counter = iter(range(logins))
+    statuses = {}
+    done = asyncio.Event()
+    probe_ms = []
+
+    async def login_worker():
+        for _ in counter:
+            response = await client.post(
+                f"{settings.API_PREFIX}/users/login", json={"email": EMAIL, "password": PASSWORD}
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/health")
+            probe_ms.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.005)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    probe_ms.sort()
+    return {"elapsed": elapsed, "statuses": statuses, "probe_ms": probe_ms}
+
+
+def report(label: str, logins: int, result: dict) -> None:
+    ok = result["statuses"].get(200, 0)
+    rejected = result["statuses"].get(503, 0)
+    ms = result["probe_ms"]
+    print(
+        f"{label}: 登录 {ok / result['elapsed']:7.1f} 次/秒 (成功 {ok}/{logins}, 503 {rejected})  "
+        f"/health ms: 中位 {statistics.median(ms):7.2f}  p99 {percentile(ms, 0.99):7.2f}  最大 {ms[-1]:7.2f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="登录基准测试")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=settings.CRYPTO_WORKERS, help="密码运算线程数")
+    parser.add_argument("--queue-limit", type=int, default=settings.CRYPTO_QUEUE_LIMIT, help="排队上限")
+    args = parser.parse_args()
+
+    await create_tables()
+    base_url = start_server()
+    print(f"登录次数: {args.logins}  并发: {args.concurrency}  线程数: {args.workers}  排队上限: {args.queue_limit}")
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        response = await client.post(
+            f"{settings.API_PREFIX}/users/register", json={"name": "bench", "email": EMAIL, "password": PASSWORD}
+        )
+        if response.status_code not in (201, 400):
+            raise SystemExit(f"创建测试用户失败: {response.status_code} {response.text}")
+
+        crypto_executor.max_workers = 0
+        report("事件循环内同步执行", args.logins, await run_round(client, args.logins, args.concurrency))
+
+        crypto_executor.max_workers = args.workers
+        crypto_executor.queue_limit = args.queue_limit
+        report("有界线程池        ", args.logins, await run_round(client, args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,156 @@
+"""
+MCP 工具调用基准测试
+在本地启动一个最简的 StreamableHttp MCP 服务器，对比两种调用方式的工具调用延迟：
+- 每次调用新建会话（新连接 + initialize 握手 + 调用 + 结束会话）
+- MCPSession 长连接会话（连接池复用，只握手一次）
+
+用法：
+    uv run python scripts/bench_mcp_client.py --calls 2000 --concurrency 16
+    uv run python scripts/bench_mcp_client.py --sse --server-latency 5
+"""
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+from backend.app.services.mcp_service import MCPServerConfig, MCPSession, SESSION_HEADER
+
+ECHO_TOOL = {
+    "name": "echo",
+    "description": "原样返回参数",
+    "inputSchema": {"type": "object", "properties": {"text": {"type": "string"}}},
+}
+
+
+def create_stub_server(server_latency: float, use_sse: bool) -> FastAPI:
+    """最简的MCP服务器：支持 initialize / ping / tools/list / tools/call"""
+    app = FastAPI()
+    sessions = set()
+
+    @app.post("/mcp")
+    async def handle(request: Request):
+        message = await request.json()
+        if "id" not in message:
+            return Response(status_code=202)
+
+        method = message["method"]
+        headers = {}
+        if method == "initialize":
+            session_id = uuid.uuid4().hex
+            sessions.add(session_id)
+            headers[SESSION_HEADER] = session_id
+            result = {
+                "protocolVersion": message["params"]["protocolVersion"],
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "stub", "version": "0.1.0"},
+            }
+        elif request.headers.get(SESSION_HEADER) not in sessions:
+            return Response(status_code=404)
+        elif method == "tools/list":
+            result = {"tools": [ECHO_TOOL]}
+        elif method == "tools/call":
+            if server_latency:
+                await asyncio.sleep(server_latency / 1000)
+            text = json.dumps(message["params"]["arguments"], ensure_ascii=False)
+            result = {"content": [{"type": "text", "text": text}], "isError": False}
+        else:
+            result = {}
+
+        body = json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result})
+        if use_sse:
+            return Response(f"event: message\ndata: {body}\n\n", media_type="text/event-stream", headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    @app.delete("/mcp")
+    async def end_session(request: Request):
+        sessions.discard(request.headers.get(SESSION_HEADER))
+        return Response(status_code=200)
+
+    return app
+
+
+def start_stub_server(app: FastAPI) -> str:
+    """在独立线程中启动服务器，避免与客户端争用同一事件循环"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/mcp"
+
+
+async def run_calls(call, total: int, concurrency: int) -> tuple:
+    """以固定并发执行total次调用，返回(总耗时, 每次调用耗时列表)"""
+    latencies = []
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+def report(label: str, elapsed: float, latencies: list) -> None:
+    ms = sorted(t * 1000 for t in latencies)
+    p99 = ms[int(len(ms) * 0.99) - 1]
+    print(
+        f"{label}: {len(ms) / elapsed:8,.0f} 次/秒  "
+        f"延迟 ms: 中位 {statistics.median(ms):6.2f}  p99 {p99:6.2f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="MCP 工具调用基准测试")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--server-latency", type=float, default=0, help="服务器端每次工具调用的模拟耗时（毫秒）")
+    parser.add_argument("--sse", action="store_true", help="服务器以SSE流返回结果")
+    args = parser.parse_args()
+
+    url = start_stub_server(create_stub_server(args.server_latency, args.sse))
+    config = MCPServerConfig({"name": "stub", "url": url, "maxConcurrency": args.concurrency})
+    print(f"调用次数: {args.calls}  并发: {args.concurrency}  服务器耗时: {args.server_latency}ms  SSE: {args.sse}")
+
+    async def fresh_session_call(i: int) -> None:
+        session = MCPSession(config)
+        try:
+            await session.call_tool("echo", {"text": f"hello {i}"})
+        finally:
+            await session.close()
+
+    elapsed, latencies = await run_calls(fresh_session_call, args.calls, args.concurrency)
+    report("每次新建会话", elapsed, latencies)
+
+    pooled = MCPSession(config)
+    await pooled.list_tools()
+
+    async def pooled_call(i: int) -> None:
+        await pooled.call_tool("echo", {"text": f"hello {i}"})
+
+    elapsed, latencies = await run_calls(pooled_call, args.calls, args.concurrency)
+    report("长连接会话  ", elapsed, latencies)
+    await pooled.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""
+指标采集开销基准测试
+- 单次直方图记录（observe）的耗时
+- 在一个只返回常量的最简接口上，对比有无 MetricsMiddleware / QueryStatsMiddleware 时每个请求的耗时
+- 在大量路由与状态码组合下渲染一次 /metrics 文本的耗时
+
+用法：
+    uv run python scripts/bench_metrics_overhead.py --requests 20000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+from fastapi import FastAPI
+
+from backend.app.core.metrics import LATENCY_BUCKETS, Histogram, MetricsMiddleware
+from backend.app.core.query_stats import QueryStatsMiddleware
+
+
+def create_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    if instrumented:
+        app.add_middleware(QueryStatsMiddleware)
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def run_requests(app: FastAPI, total: int) -> float:
+    """顺序发送total个请求，返回平均每个请求的耗时（微秒）"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(200):
+            await client.get(f"/items/{i}")
+        start = time.perf_counter()
+        for i in range(total):
+            await client.get(f"/items/{i}")
+        return (time.perf_counter() - start) / total * 1_000_000
+
+
+def bench_observe(count: int) -> float:
+    """返回单次observe的耗时（纳秒）"""
+    histogram = Histogram("bench_seconds", "bench", ("method", "route", "status"), LATENCY_BUCKETS)
+    labels = ("GET", "/api/agents/{agent_id}", "200")
+    start = time.perf_counter()
+    for i in range(count):
+        histogram.observe(labels, (i % 1000) / 1000)
+    return (time.perf_counter() - start) / count * 1_000_000_000
+
+
+def bench_render(routes: int, statuses: int) -> tuple:
+    """返回(渲染耗时ms, 输出行数)"""
+    histogram = Histogram("bench_seconds", "bench", ("method", "route", "status"), LATENCY_BUCKETS)
+    for route in range(routes):
+        for status in range(statuses):
+            histogram.observe(("GET", f"/api/route_{route}/{{id}}", str(200 + status)), 0.01)
+    start = time.perf_counter()
+    lines = histogram.render()
+    return (time.perf_counter() - start) * 1000, len(lines)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="指标采集开销基准测试")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--observations", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=5, help="交替测量的轮数，取各自最小值以降低噪声")
+    args = parser.parse_args()
+
+    print(f"直方图 observe: {bench_observe(args.observations):.0f} ns/次")
+
+    plain_app, instrumented_app = create_app(instrumented=False), create_app(instrumented=True)
+    baseline = instrumented = float("inf")
+    for _ in range(args.rounds):
+        baseline = min(baseline, await run_requests(plain_app, args.requests))
+        instrumented = min(instrumented, await run_requests(instrumented_app, args.requests))
+    print(f"请求耗时: 无指标 {baseline:.1f} µs  有指标 {instrumented:.1f} µs  "
+          f"开销 {instrumented - baseline:.1f} µs/请求 ({(instrumented / baseline - 1) * 100:.1f}%)")
+
+    render_ms, lines = bench_render(routes=50, statuses=5)
+    print(f"/metrics 渲染（50个路由 x 5种状态码）: {render_ms:.2f} ms, {lines} 行")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,243 @@
+"""
+对话导入导出基准测试
+为每种事件数写入一个对话，分别在新的子进程中通过应用的ASGI接口导出到文件、再把文件导入回来，
+输出每次的耗时与进程峰值RSS（ru_maxrss）。流式导出/导入的峰值RSS应与事件数无关；
+作为对照，naive 一次读出全部事件并序列化为单个JSON数组，峰值随事件数线性增长。
+
+用法：
+    uv run python scripts/bench_transfer.py --sizes 10000,50000,200000
+
+注意：脚本会在目标数据库中重建所有表，请勿指向生产库
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+WORDS = (
+    "agent team task result search query answer report data analysis summary plan step tool call "
+    "分析 结果 任务 检索 文档 总结 计划 工具 调用 用户 请求 数据 报告"
+).split()
+
+# 导入时请求体每次送入的字节数
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def peak_rss_mb() -> float:
+    """进程启动以来的峰值RSS（Linux下 ru_maxrss 的单位为KB）"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def prepare(events: int) -> dict:
+    """重建表，写入用户、Team和一个包含 events 个事件的已完成对话"""
+    from sqlalchemy import insert
+
+    from backend.app.core.database import AsyncSessionLocal, Base, engine, utcnow
+    from backend.app.core.ids import generate_id
+    from backend.app.core.security import create_access_token
+    from backend.app.models import Conversation, ConversationStatus, Event, EventType, Team, User
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    rng = random.Random(42)
+    now = utcnow()
+    user_id, team_id, conversation_id = generate_id(), generate_id(), generate_id()
+    async with AsyncSessionLocal() as session:
+        session.add(User(id=user_id, name="bench", email="bench-transfer@example.com", hashed_password="x"))
+        session.add(Team(id=team_id, name="bench", agents=[], entry_agent="planner"))
+        session.add(Conversation(
+            id=conversation_id,
+            user_id=user_id,
+            team_id=team_id,
+            task="bench",
+            status=ConversationStatus.COMPLETED,
+            completed_at=now,
+            compacted_at=now,
+        ))
+        await session.flush()
+        for start in range(0, events, 1000):
+            await session.execute(insert(Event), [
+                {
+                    "id": generate_id(),
+                    "conversation_id": conversation_id,
+                    "event_type": EventType.TEXT_MESSAGE,
+                    "timestamp": now,
+                    "agent_name": "planner",
+                    "data": {"content": " ".join(rng.choices(WORDS, k=rng.randint(20, 80)))},
+                    "sequence": sequence,
+                }
+                for sequence in range(start + 1, min(start + 1000, events) + 1)
+            ])
+        await session.commit()
+    await engine.dispose()
+    return {"conversation_id": conversation_id, "token": create_access_token({"sub": user_id})}
+
+
+async def call_app(method: str, path: str, token: str, body_chunks=(), sink=None) -> int:
+    """直接调用ASGI应用：请求体逐块送入，响应体逐块交给sink，测试客户端本身不缓冲任何内容"""
+    from backend.main import app
+
+    chunks = iter(body_chunks)
+    finished = False
+    status_code = 0
+
+    async def receive():
+        nonlocal finished
+        if finished:
+            # 请求体已送完，之后只等待断开（不会发生）
+            await asyncio.Event().wait()
+        chunk = next(chunks, None)
+        if chunk is None:
+            finished = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return {"type": "http.request", "body": chunk, "more_body": True}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif message["type"] == "http.response.body" and sink is not None:
+            sink(message.get("body", b""))
+
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    await app(scope, receive, send)
+    return status_code
+
+
+def read_chunks(path: str):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def run_export(conversation_id: str, token: str, output: str) -> dict:
+    from backend.app.core.config import settings
+
+    with open(output, "wb") as f:
+        status_code = await call_app("GET", f"{settings.API_PREFIX}/conversations/{conversation_id}/export", token, sink=f.write)
+    return {"status": status_code, "bytes": os.path.getsize(output)}
+
+
+async def run_import(token: str, source: str) -> dict:
+    from backend.app.core.config import settings
+
+    body = bytearray()
+    status_code = await call_app("POST", f"{settings.API_PREFIX}/conversations/import", token, read_chunks(source), body.extend)
+    return {"status": status_code, "events": json.loads(body).get("events")}
+
+
+async def run_naive(conversation_id: str) -> dict:
+    """对照组：一次读出全部事件，构造完整的JSON数组后再写出"""
+    from sqlalchemy import select
+
+    from backend.app.core.database import AsyncSessionLocal
+    from backend.app.models import Event
+    from backend.app.schemas.event import EventResponse
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Event).where(Event.conversation_id == conversation_id).order_by(Event.sequence)
+        )
+        events = [EventResponse.model_validate(event).model_dump(mode="json") for event in result.scalars()]
+    body = json.dumps(events, ensure_ascii=False).encode()
+    return {"bytes": len(body)}
+
+
+def child(args) -> None:
+    """子进程：执行单个阶段，以一行JSON输出结果、耗时与峰值RSS"""
+    import logging
+    logging.disable(logging.WARNING)
+    if args.stage == "prepare":
+        result = asyncio.run(prepare(args.events))
+        print(json.dumps(result))
+        return
+
+    # 先导入应用，基线RSS不计入各阶段本身的内存
+    import backend.main  # noqa: F401
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if args.stage == "export":
+        result = asyncio.run(run_export(args.conversation_id, args.token, args.file))
+    elif args.stage == "import":
+        result = asyncio.run(run_import(args.token, args.file))
+    else:
+        result = asyncio.run(run_naive(args.conversation_id))
+    result.update(seconds=time.perf_counter() - start, baseline_mb=baseline, peak_mb=peak_rss_mb())
+    print(json.dumps(result))
+
+
+def run_child(database_url: str, *argv: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url, EVENT_BUS_BACKEND="memory", SQL_ECHO="false")
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", *argv], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对话导入导出基准测试")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///./bench_transfer.db")
+    parser.add_argument("--sizes", default="10000,50000,200000", help="每个对话的事件数，逗号分隔")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--stage", help=argparse.SUPPRESS)
+    parser.add_argument("--events", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--conversation-id", help=argparse.SUPPRESS)
+    parser.add_argument("--token", help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    workdir = Path(tempfile.mkdtemp(prefix="agentput-transfer-"))
+    print(f"{'事件数':>8} {'阶段':<8} {'耗时(s)':>9} {'基线RSS(MB)':>12} {'峰值RSS(MB)':>12} {'增量(MB)':>9} {'大小(MB)':>9}")
+    for events in (int(size) for size in args.sizes.split(",")):
+        prepared = run_child(args.database_url, "--stage", "prepare", "--events", str(events))
+        export_file = str(workdir / f"conversation-{events}.ndjson")
+        common = ["--conversation-id", prepared["conversation_id"], "--token", prepared["token"], "--file", export_file]
+        for stage in ("export", "import", "naive"):
+            result = run_child(args.database_url, "--stage", stage, *common)
+            if stage == "export":
+                assert result["status"] == 200, result
+            if stage == "import":
+                assert result["status"] == 201 and result["events"] == events, result
+            size = result.get("bytes", os.path.getsize(export_file))
+            print(
+                f"{events:>8} {stage:<8} {result['seconds']:>9.2f} {result['baseline_mb']:>12.1f} "
+                f"{result['peak_mb']:>12.1f} {result['peak_mb'] - result['baseline_mb']:>9.1f} {size / 1024 / 1024:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+WebSocket 分发压测
+在同一对话上挂载大量订阅者（其中一部分从不读取），测量单次发布耗时与正常订阅者的端到端延迟，
+并验证慢消费者策略生效、不拖慢发布方和其他订阅者
+
+用法：
+    uv run python scripts/bench_ws_fanout.py --subscribers 1000 --events 2000 --slow 10 --policy coalesce
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.models import EventType
+from backend.app.websocket.manager import ConnectionManager, SlowConsumerPolicy
+
+CONVERSATION_ID = "bench-conversation"
+
+
+def make_event(sequence: int) -> dict:
+    """构造一个事件行，每20条中有1条完整消息，其余为流式分片"""
+    event_type = EventType.TEXT_MESSAGE if sequence % 20 == 0 else EventType.AGENT_MESSAGE_CHUNK
+    return {
+        "id": f"event-{sequence}",
+        "conversation_id": CONVERSATION_ID,
+        "event_type": event_type,
+        "timestamp": datetime.now(timezone.utc),
+        "agent_name": "writer",
+        "data": {"content": "token ", "sent_at": time.perf_counter()},
+        "sequence": sequence,
+    }
+
+
+async def consume(subscription, total: int, latencies: list) -> None:
+    """正常订阅者：读取全部事件并记录端到端延迟"""
+    received = 0
+    while received < total:
+        message = await subscription.get()
+        latencies.append(time.perf_counter() - message.payload["data"]["sent_at"])
+        received = message.payload["sequence"]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="WebSocket 分发压测")
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--slow", type=int, default=10, help="从不读取的订阅者数量")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--queue-size", type=int, default=256)
+    parser.add_argument("--policy", choices=[p.value for p in SlowConsumerPolicy], default="coalesce")
+    args = parser.parse_args()
+
+    manager = ConnectionManager(queue_size=args.queue_size, policy=SlowConsumerPolicy(args.policy))
+    fast = [manager.subscribe(CONVERSATION_ID) for _ in range(args.subscribers - args.slow)]
+    slow = [manager.subscribe(CONVERSATION_ID) for _ in range(args.slow)]
+
+    latencies: list = []
+    consumers = [asyncio.create_task(consume(s, args.events, latencies)) for s in fast]
+
+    publish_times = []
+    start = time.perf_counter()
+    for sequence in range(1, args.events + 1):
+        t0 = time.perf_counter()
+        manager.publish(CONVERSATION_ID, make_event(sequence))
+        publish_times.append(time.perf_counter() - t0)
+        if sequence % 50 == 0:
+            # 模拟生产者在分片之间让出事件循环
+            await asyncio.sleep(0)
+    await asyncio.gather(*consumers)
+    elapsed = time.perf_counter() - start
+
+    publish_ms = sorted(t * 1000 for t in publish_times)
+    latency_ms = sorted(t * 1000 for t in latencies)
+    p99 = lambda values: values[int(len(values) * 0.99) - 1]
+
+    print(f"订阅者: {args.subscribers}（慢消费者 {args.slow}）  事件: {args.events}  策略: {args.policy}")
+    print(f"总耗时: {elapsed:.2f}s  投递消息: {len(latencies):,}  {len(latencies) / elapsed:,.0f} 条/秒")
+    print(f"单次发布耗时 ms: 平均 {statistics.mean(publish_ms):.3f}  p99 {p99(publish_ms):.3f}  最大 {publish_ms[-1]:.3f}")
+    print(f"正常订阅者延迟 ms: 中位 {statistics.median(latency_ms):.2f}  p99 {p99(latency_ms):.2f}")
+    print(
+        f"慢消费者: 已断开 {sum(s.closed for s in slow)}  "
+        f"队列长度上限 {max((len(s) for s in slow), default=0)}  "
+        f"丢弃分片 {sum(s.dropped for s in slow)}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
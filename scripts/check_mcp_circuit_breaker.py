@@ -0,0 +1,130 @@
+"""
+MCP熔断器检查
+用 httpx.MockTransport 模拟MCP服务器，先让熔断器打开，再在半开状态下验证各种试探调用结束方式：
+- 试探调用被调用方超时取消后，下一次调用仍会被放行
+- 试探调用在等待并发信号量时被取消后，下一次调用仍会被放行
+- 服务器返回200但响应体不是JSON时计为失败（熔断器重新打开），而不是卡在试探中
+- 试探调用成功后熔断器关闭
+
+用法：
+    uv run python scripts/check_mcp_circuit_breaker.py
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+
+from backend.app.services.mcp_service import MCPError, MCPServerConfig, MCPServerUnavailable, MCPSession
+
+RESET_SECONDS = 0.05
+
+
+class StubServer:
+    """按 mode 返回正常结果、连接失败、非JSON响应或长时间不响应"""
+
+    def __init__(self):
+        self.mode = "ok"
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        message = json.loads(request.content)
+        if "id" not in message:
+            return httpx.Response(202)
+        if self.mode == "down":
+            raise httpx.ConnectError("connection refused", request=request)
+        if self.mode == "hang":
+            await asyncio.sleep(3600)
+        if self.mode == "garbage":
+            return httpx.Response(200, content=b"<html>bad gateway</html>", headers={"content-type": "text/html"})
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": message["id"], "result": {"tools": []}})
+
+
+async def open_breaker(session: MCPSession, server: StubServer) -> None:
+    """连接失败直到熔断器打开，再等待进入半开状态"""
+    server.mode = "down"
+    while session.breaker.state == "closed":
+        try:
+            await session.list_tools()
+        except MCPServerUnavailable:
+            pass
+    await asyncio.sleep(RESET_SECONDS * 1.5)
+    assert session.breaker.state == "half_open"
+
+
+async def main():
+    results = []
+
+    def check(label: str, ok: bool) -> None:
+        print(f"{'通过' if ok else '失败'}: {label}")
+        results.append(ok)
+
+    server = StubServer()
+    config = MCPServerConfig({"name": "stub", "url": "http://stub/mcp", "maxConcurrency": 1})
+    session = MCPSession(config, max_retries=0, backoff=0, transport=httpx.MockTransport(server.handle))
+    session.breaker.failure_threshold = 2
+    session.breaker.reset_timeout = RESET_SECONDS
+
+    # 1. 试探调用被调用方超时取消
+    await open_breaker(session, server)
+    server.mode = "hang"
+    try:
+        await asyncio.wait_for(session.list_tools(), timeout=0.05)
+    except asyncio.TimeoutError:
+        pass
+    server.mode = "ok"
+    try:
+        await session.list_tools()
+        allowed = True
+    except MCPServerUnavailable:
+        allowed = False
+    check("试探调用被取消后，下一次调用被放行", allowed)
+    check("下一次试探成功后熔断器关闭", session.breaker.state == "closed")
+
+    # 2. 试探调用在等待并发信号量时被取消
+    await open_breaker(session, server)
+    server.mode = "ok"
+    await session._semaphore.acquire()
+    probe = asyncio.create_task(session.list_tools())
+    await asyncio.sleep(0.01)
+    probe.cancel()
+    try:
+        await probe
+    except asyncio.CancelledError:
+        pass
+    session._semaphore.release()
+    check("等待信号量时被取消后不再处于试探中", not session.breaker.probing)
+    try:
+        await session.list_tools()
+        allowed = True
+    except MCPServerUnavailable:
+        allowed = False
+    check("等待信号量时被取消后，下一次调用被放行", allowed)
+
+    # 3. 200响应但响应体不是JSON
+    await open_breaker(session, server)
+    server.mode = "garbage"
+    try:
+        await session.list_tools()
+        raised = False
+    except MCPError:
+        raised = True
+    check("非JSON响应返回MCPError", raised)
+    check("非JSON响应计为失败，熔断器重新打开", session.breaker.state == "open" and not session.breaker.probing)
+    await asyncio.sleep(RESET_SECONDS * 1.5)
+    server.mode = "ok"
+    await session.list_tools()
+    check("熔断到期后试探成功，熔断器关闭", session.breaker.state == "closed")
+
+    await session.close()
+    if not all(results):
+        raise SystemExit(1)
+    print("通过：半开状态下的试探调用无论如何结束都不会使熔断器卡住")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+只读副本路由检查
+用两个本地SQLite文件分别充当主库和只读副本（副本不会自动同步，用于模拟复制延迟），验证：
+- 写入只落在主库，副本中没有任何写入
+- 用户写入后立即读取（如创建对话后查询对话列表）走主库，能读到自己的写入
+- 其他用户（即使携带了写入者的主库读取cookie，TestClient的各请求共用同一个cookie）以及超过 REPLICA_PIN_SECONDS 之后的读取走副本
+- 副本追上主库后，读取结果与主库一致
+
+用法：
+    uv run python scripts/check_replica_routing.py
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 在导入应用之前指定主库与副本
+workdir = Path(tempfile.mkdtemp(prefix="agentput-replica-"))
+PRIMARY_FILE, REPLICA_FILE = workdir / "primary.db", workdir / "replica.db"
+PIN_SECONDS = 1.0
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{PRIMARY_FILE}"
+os.environ["DATABASE_REPLICA_URL"] = f"sqlite+aiosqlite:///{REPLICA_FILE}"
+os.environ["REPLICA_PIN_SECONDS"] = str(PIN_SECONDS)
+os.environ["EVENT_BUS_BACKEND"] = "memory"
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi.testclient import TestClient
+
+from backend.app.core.config import settings
+from backend.app.core.database import Base, engine, replica_engine
+from backend.main import app
+
+
+async def create_tables() -> None:
+    for target in (engine, replica_engine):
+        async with target.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+
+def count_rows(path: Path, table: str) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def replicate() -> None:
+    """把主库整体复制到副本，模拟副本追上主库"""
+    source, target = sqlite3.connect(PRIMARY_FILE), sqlite3.connect(REPLICA_FILE)
+    with target:
+        source.backup(target)
+    source.close()
+    target.close()
+
+
+def main():
+    asyncio.run(create_tables())
+    prefix = settings.API_PREFIX
+    results = []
+
+    def check(label: str, ok: bool) -> None:
+        print(f"{'通过' if ok else '失败'}: {label}")
+        results.append(ok)
+
+    with TestClient(app) as client:
+        def login(email: str) -> dict:
+            client.post(f"{prefix}/users/register", json={"name": "check", "email": email, "password": "check-password"})
+            token = client.post(f"{prefix}/users/login", json={"email": email, "password": "check-password"}).json()
+            return {"Authorization": f"Bearer {token['access_token']}"}
+
+        def get(path: str, headers: dict):
+            response = client.get(f"{prefix}{path}", headers=headers)
+            response.raise_for_status()
+            return response.json()
+
+        alice, bob = login("alice@example.com"), login("bob@example.com")
+
+        agent = client.post(f"{prefix}/agents", json={"name": "replica_check", "system_message": "check"}, headers=alice)
+        agent.raise_for_status()
+        team = client.post(
+            f"{prefix}/teams",
+            json={"name": "replica_check", "agents": [agent.json()["id"]], "entry_agent": agent.json()["id"]},
+            headers=alice,
+        )
+        team.raise_for_status()
+        conversation = client.post(f"{prefix}/conversations", json={"team_id": team.json()["id"], "task": "check"}, headers=alice)
+        conversation.raise_for_status()
+        conversation_id = conversation.json()["id"]
+
+        check("写入只落在主库", count_rows(PRIMARY_FILE, "conversations") == 1 and all(
+            count_rows(REPLICA_FILE, table) == 0 for table in ("users", "agents", "teams", "conversations")
+        ))
+        check("创建对话后立即出现在自己的对话列表中", [c["id"] for c in get("/conversations", alice)] == [conversation_id])
+        check("创建对话后立即可以读取详情", get(f"/conversations/{conversation_id}", alice)["id"] == conversation_id)
+        check("其他用户携带写入者的cookie时读取仍走副本（副本尚未同步，看不到新Team）", get("/teams", bob) == [])
+
+        time.sleep(PIN_SECONDS + 0.2)
+        check(f"写入 {PIN_SECONDS:g} 秒后的读取走副本", get("/conversations", alice) == [])
+
+        replicate()
+        check("副本追上主库后读取到相同数据", [c["id"] for c in get("/conversations", alice)] == [conversation_id])
+        check("副本追上主库后其他用户可见新Team", [t["id"] for t in get("/teams", bob)] == [team.json()["id"]])
+
+    if not all(results):
+        raise SystemExit(1)
+    print("通过：只读接口读副本，写入与写入后的读取走主库")
+
+
+if __name__ == "__main__":
+    main()
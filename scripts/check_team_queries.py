@@ -0,0 +1,104 @@
+"""
+Team接口查询次数检查
+创建一个包含大量Agent的Team，统计创建、详情、更新Team各自执行的SQL条数，
+验证Agent的存在性校验和名称查询不会随Agent数量增长（不存在N+1查询）。
+
+用法：
+    uv run python scripts/check_team_queries.py --agents 50
+
+注意：脚本会在目标数据库中创建表和测试数据，请勿指向生产库
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend.app.core.config import settings
+from backend.app.core.database import Base, engine
+from backend.main import app
+
+# 每个接口允许的最大SQL条数（与Agent数量无关）
+MAX_QUERIES = {
+    "创建Team": 4,
+    "Team详情": 3,
+    "更新Team": 5,
+}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+async def create_tables() -> None:
+    setup_engine = create_async_engine(settings.DATABASE_URL)
+    async with setup_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await setup_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Team接口查询次数检查")
+    parser.add_argument("--agents", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(create_tables())
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    prefix = settings.API_PREFIX
+    suffix = uuid.uuid4().hex[:8]
+
+    with TestClient(app) as client:
+        email = f"check-{suffix}@example.com"
+        client.post(f"{prefix}/users/register", json={"name": "check", "email": email, "password": "check-password"})
+        token = client.post(f"{prefix}/users/login", json={"email": email, "password": "check-password"}).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+        agent_ids = []
+        for i in range(args.agents):
+            response = client.post(
+                f"{prefix}/agents",
+                json={"name": f"agent_{suffix}_{i}", "system_message": "check"},
+                headers=headers,
+            )
+            response.raise_for_status()
+            agent_ids.append(response.json()["id"])
+
+        def measure(label, method, url, **kwargs):
+            counter.count = 0
+            response = client.request(method, url, headers=headers, **kwargs)
+            response.raise_for_status()
+            ok = counter.count <= MAX_QUERIES[label]
+            print(f"{label}: {counter.count} 条SQL（上限 {MAX_QUERIES[label]}）{'' if ok else '  超出上限'}")
+            return ok, response.json()
+
+        results = []
+        ok, team = measure(
+            "创建Team", "POST", f"{prefix}/teams",
+            json={"name": f"team_{suffix}", "agents": agent_ids, "entry_agent": agent_ids[0]},
+        )
+        results.append(ok)
+        ok, detail = measure("Team详情", "GET", f"{prefix}/teams/{team['id']}")
+        results.append(ok and len(detail["agent_names"]) == args.agents)
+        ok, _ = measure("更新Team", "PUT", f"{prefix}/teams/{team['id']}", json={"agents": agent_ids[::-1]})
+        results.append(ok)
+
+    if not all(results):
+        raise SystemExit(1)
+    print(f"通过：{args.agents} 个Agent的Team，查询次数与Agent数量无关")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+接口数据库往返次数统计
+依次调用常用的读写接口，统计每个请求与数据库之间的往返次数：
+SQL语句、COMMIT、ROLLBACK，以及连接归还连接池时的重置（rollback-on-return）。
+
+用法：
+    uv run python scripts/count_roundtrips.py
+
+注意：脚本会在目标数据库中创建表和测试数据，请勿指向生产库
+"""
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool.base import reset_none
+
+from backend.app.core.config import settings
+from backend.app.core.database import Base, engine
+from backend.main import app
+
+
+class RoundTripCounter:
+    def __init__(self):
+        self.pool = None
+        self.counts = {"sql": 0, "commit": 0, "rollback": 0, "reset": 0}
+
+    def listen(self, sync_engine) -> None:
+        event.listen(sync_engine, "before_cursor_execute", lambda *args: self._add("sql"))
+        event.listen(sync_engine, "commit", lambda *args: self._add("commit"))
+        event.listen(sync_engine, "rollback", lambda *args: self._add("rollback"))
+        self.pool = sync_engine.pool
+        event.listen(sync_engine.pool, "reset", self._on_reset)
+
+    def _on_reset(self, dbapi_connection, connection_record, reset_state) -> None:
+        # 事务已由COMMIT/ROLLBACK结束，或连接池关闭了归还时重置（pool_reset_on_return=None）时，不会再发送ROLLBACK
+        if not reset_state.transaction_was_reset and self.pool._reset_on_return is not reset_none:
+            self._add("reset")
+
+    def _add(self, kind: str) -> None:
+        self.counts[kind] += 1
+
+    def reset(self) -> None:
+        for kind in self.counts:
+            self.counts[kind] = 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+async def create_tables() -> None:
+    setup_engine = create_async_engine(settings.DATABASE_URL)
+    async with setup_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await setup_engine.dispose()
+
+
+def main():
+    asyncio.run(create_tables())
+    counter = RoundTripCounter()
+    counter.listen(engine.sync_engine)
+    prefix = settings.API_PREFIX
+    suffix = uuid.uuid4().hex[:8]
+    headers = {}
+    print(f"{'接口':<40} {'往返':>5} {'SQL':>5} {'COMMIT':>7} {'ROLLBACK':>9} {'归还重置':>9}")
+
+    with TestClient(app) as client:
+        def call(label, method, url, **kwargs):
+            counter.reset()
+            response = client.request(method, f"{prefix}{url}", headers=headers, **kwargs)
+            response.raise_for_status()
+            c = counter.counts
+            print(f"{label:<40} {counter.total:>5} {c['sql']:>5} {c['commit']:>7} {c['rollback']:>9} {c['reset']:>9}")
+            return response.json() if response.content else None
+
+        email = f"roundtrip-{suffix}@example.com"
+        call("POST /users/register", "POST", "/users/register",
+             json={"name": "rt", "email": email, "password": "roundtrip"})
+        token = call("POST /users/login", "POST", "/users/login", json={"email": email, "password": "roundtrip"})
+        headers["Authorization"] = f"Bearer {token['access_token']}"
+        call("GET /users/profile", "GET", "/users/profile")
+        call("PUT /users/profile", "PUT", "/users/profile", json={"name": "rt2"})
+
+        agent = call("POST /agents", "POST", "/agents", json={"name": f"rt_{suffix}", "system_message": "rt"})
+        call("PUT /agents/{id}", "PUT", f"/agents/{agent['id']}", json={"system_message": "rt2"})
+        call("GET /agents/{id}", "GET", f"/agents/{agent['id']}")
+        call("GET /agents", "GET", "/agents")
+
+        team = call("POST /teams", "POST", "/teams",
+                    json={"name": f"rt_{suffix}", "agents": [agent["id"]], "entry_agent": agent["id"]})
+        call("PUT /teams/{id}", "PUT", f"/teams/{team['id']}", json={"description": "rt"})
+        call("GET /teams/{id}", "GET", f"/teams/{team['id']}")
+        call("GET /teams", "GET", "/teams")
+
+        conversation = call("POST /conversations", "POST", "/conversations",
+                            json={"team_id": team["id"], "task": "rt"})
+        call("GET /conversations/{id}", "GET", f"/conversations/{conversation['id']}")
+        call("GET /conversations", "GET", "/conversations")
+        call("POST /conversations/{id}/cancel", "POST", f"/conversations/{conversation['id']}/cancel")
+
+
+if __name__ == "__main__":
+    main()
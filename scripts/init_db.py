@@ -11,7 +11,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from backend.app.core.database import engine, Base
-from backend.app.models import User, Agent, Team, Conversation, Event
+from backend.app.models import User, Agent, Team, Conversation, Event, EventArchive, ReplaySnapshot
 
 
 async def init_database():